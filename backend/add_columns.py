@@ -18,5 +18,13 @@ async def add_columns():
         except Exception as e:
             print(f"longitude error (maybe exists): {e}")
 
+    # Separate transaction: a failed ALTER above aborts the one it ran in
+    async with engine.begin() as conn:
+        # Blast job heartbeats, for databases that created blast_jobs before they existed
+        for column, definition in [("attempt", "INTEGER DEFAULT 0"), ("heartbeat_at", "TIMESTAMP")]:
+            print(f"Adding blast_jobs.{column} column...")
+            await conn.execute(text(f"ALTER TABLE blast_jobs ADD COLUMN IF NOT EXISTS {column} {definition}"))
+            print(f"blast_jobs.{column} added.")
+
 if __name__ == "__main__":
     asyncio.run(add_columns())
@@ -0,0 +1,33 @@
+import asyncio
+from sqlalchemy import text
+from app.db import engine
+
+# Indexes declared on the models are only created by init_db() for new tables.
+# This script adds them to databases created before they were declared.
+INDEXES = [
+    (
+        "ix_activities_time_range",
+        "CREATE INDEX IF NOT EXISTS ix_activities_time_range ON activities USING gist (tsrange(start_time, end_time))"
+    ),
+    (
+        "ix_users_skills_normalized",
+        "CREATE INDEX IF NOT EXISTS ix_users_skills_normalized ON users USING gin (skills_normalized)"
+    ),
+]
+
+async def add_indexes():
+    # One transaction per index, so a failure doesn't roll back the others
+    for name, statement in INDEXES:
+        print(f"Creating {name}...")
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text(statement))
+            print(f"{name} created.")
+        except Exception as e:
+            print(f"{name} error: {e}")
+            if name == "ix_activities_time_range":
+                print("Activities with end_time before start_time must be fixed first: "
+                      "SELECT id, title FROM activities WHERE end_time < start_time")
+
+if __name__ == "__main__":
+    asyncio.run(add_indexes())
@@ -20,6 +20,21 @@ class Settings(BaseSettings):
     GOOGLE_GENERATIVE_AI_API_KEY: str | None = None
     ADMIN_GOOGLE_GENERATIVE_AI_API_KEY: str | None = None
 
+    # HMAC key for self check-in QR tokens; derived from DATABASE_URL if unset
+    CHECKIN_TOKEN_SECRET: str | None = None
+
+    # How often the leaderboard rollup is rebuilt in the background
+    LEADERBOARD_REFRESH_SECONDS: int = 600
+
+    # How often the in-memory skill index is checked against the users table and rebuilt if stale
+    SKILL_INDEX_CHECK_SECONDS: int = 300
+
+    # Volunteers shortlisted locally and sent to the model for an AI rerank
+    MATCH_RERANK_TOP_K: int = 20
+
+    # How long a crisis dashboard snapshot is served before it is rebuilt
+    CRISIS_SNAPSHOT_TTL_SECONDS: int = 15
+
     model_config = SettingsConfigDict(
         env_file=str(ENV_FILE_PATH),
         extra="ignore"
@@ -14,76 +14,20 @@ settings = get_settings()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
-async def _get_user_response(user: UserDB, db: AsyncSession) -> UserResponse:
-    # Calculate Dynamic Stats
-    from .models.attendance import AttendanceDB
-    from .models.volunteer import VolunteerDB
-    from .models.activity import ActivityDB
-    from sqlalchemy import func
-
-    # Total events attended
-    events_result = await db.execute(select(func.count(AttendanceDB.id)).where(AttendanceDB.user_id == user.id))
-    total_events = events_result.scalar() or 0
-
-    # Volunteer hours earned
-    hours_result = await db.execute(select(func.sum(AttendanceDB.hours_earned)).where(AttendanceDB.user_id == user.id))
-    volunteer_hours = hours_result.scalar() or 0
-
-    # Volunteer count (specific activities of type 'volunteer')
-    vol_query = select(func.count(AttendanceDB.id)).join(ActivityDB, AttendanceDB.activity_id == ActivityDB.id).where(
-        AttendanceDB.user_id == user.id,
-        ActivityDB.activity_type == "volunteer"
-    )
-    vol_count_result = await db.execute(vol_query)
-    volunteer_count = vol_count_result.scalar() or 0
+def build_user_response(user: UserDB) -> UserResponse:
+    """
+    Map a user row to the API response.
 
-    # Meetups count (specific activities of type 'meetup')
-    meetup_query = select(func.count(AttendanceDB.id)).join(ActivityDB, AttendanceDB.activity_id == ActivityDB.id).where(
-        AttendanceDB.user_id == user.id,
-        ActivityDB.activity_type == "meetup"
-    )
-    meetup_count_result = await db.execute(meetup_query)
-    meetups_count = meetup_count_result.scalar() or 0
-
-    # Dynamically build achievements based on real stats
-    achievements = [
-        {
-            "id": "community-star", 
-            "title": "Community Star", 
-            "description": "Participate in community events", 
-            "current": total_events, 
-            "max": 10, 
-            "color": "orange", 
-            "icon": "star"
-        },
-        {
-            "id": "green-warrior", 
-            "title": "Green Warrior", 
-            "description": "Join environment focused drives", 
-            "current": volunteer_count, # Using volunteer count as proxy for now
-            "max": 3, 
-            "color": "green", 
-            "icon": "leaf"
-        },
-        {
-            "id": "time-keeper", 
-            "title": "Time Keeper", 
-            "description": "Accumulate volunteer hours", 
-            "current": volunteer_hours, 
-            "max": 50, 
-            "color": "blue", 
-            "icon": "clock"
-        },
-        {
-            "id": "social-butterfly", 
-            "title": "Social Butterfly", 
-            "description": "Attend networking meetups", 
-            "current": meetups_count, 
-            "max": 10, 
-            "color": "purple", 
-            "icon": "users"
-        }
-    ]
+    Stats and achievement progress are read from the stored columns, which
+    the attendance statements keep up to date (see services/attendance.py),
+    so no extra queries run.
+    """
+    from .services.achievements import present_achievements
+
+    total_events = user.total_events or 0
+    volunteer_count = user.volunteer_count or 0
+    meetups_count = user.meetups_count or 0
+    volunteer_hours = user.volunteer_hours or 0
 
     # Convert SQLAlchemy model to Pydantic response
     return UserResponse(
@@ -99,12 +43,11 @@ async def _get_user_response(user: UserDB, db: AsyncSession) -> UserResponse:
         address=user.address,
         profileDeadline=user.profile_deadline,
         emailVerified=user.email_verified,
-        # Dynamic fields
         total_events=total_events,
         volunteer_count=volunteer_count,
         meetups_count=meetups_count,
         volunteer_hours=volunteer_hours,
-        achievements=achievements
+        achievements=present_achievements(user.achievements)
     )
 
 async def get_current_user(
@@ -141,7 +84,7 @@ async def get_current_user(
         user = result.scalar_one_or_none()
         
         if user:
-            return await _get_user_response(user, db)
+            return build_user_response(user)
     except Exception as e:
         print(f"[AUTH] Local DB check error: {e}")
 
@@ -173,7 +116,7 @@ async def get_current_user(
 
                 from .services.auth import sync_supabase_user
                 user = await sync_supabase_user(user_id, user_email, user_name, user_pic, db)
-                return await _get_user_response(user, db)
+                return build_user_response(user)
 
     except Exception as e:
         print(f"[AUTH] Error verifying token with Supabase: {e}")
@@ -192,3 +135,9 @@ async def get_current_user_optional(
         return await get_current_user(token, db)
     except HTTPException:
         return None
+
+
+def get_loaders(db: AsyncSession = Depends(get_database)):
+    """Per-request batching loaders sharing the request's database session"""
+    from .services.loader import Loaders
+    return Loaders(db)
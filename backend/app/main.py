@@ -14,15 +14,35 @@ load_dotenv()
 
 from .config import get_settings
 from .db import db, init_db, get_database
-from .routers import users, activities, bookings, chat, attendance, volunteers, ai, reports
+from .routers import users, activities, bookings, chat, attendance, volunteers, ai, reports, leaderboard
+from .services.attendance import checkin_writer
+from .services.leaderboard import LeaderboardRefresher
+from .services.skill_index import SkillIndexChecker, skill_index
+from .services.blast import blast_runner
+
+leaderboard_refresher = LeaderboardRefresher(get_settings().LEADERBOARD_REFRESH_SECONDS)
+skill_index_checker = SkillIndexChecker(skill_index, get_settings().SKILL_INDEX_CHECK_SECONDS)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup - create tables
     db.connect()
     await init_db()
+    checkin_writer.start()
+    leaderboard_refresher.start()
+    blast_runner.start()
+    try:
+        await skill_index.load()
+    except Exception as e:
+        # Skill search falls back to SQL until the index is loaded; the checker retries
+        print(f"[SKILL INDEX] Load failed: {e}")
+    skill_index_checker.start()
     yield
     # Shutdown
+    await skill_index_checker.stop()
+    await blast_runner.stop()
+    await leaderboard_refresher.stop()
+    await checkin_writer.stop()
     db.close()
 
 app = FastAPI(title="HolySheet API", version="1.0.0", lifespan=lifespan, debug=True)
@@ -60,6 +80,7 @@ app.include_router(attendance.router, tags=["Admin - Attendance"])
 app.include_router(volunteers.router, tags=["Admin - Volunteers"])
 app.include_router(ai.router, tags=["Admin - AI"])
 app.include_router(reports.router, tags=["Admin - Reports"])
+app.include_router(leaderboard.router, tags=["Leaderboard"])
 
 @app.get("/")
 def read_root():
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ARRAY, JSON, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ARRAY, JSON, Float, Index, func
 from sqlalchemy.dialects.postgresql import UUID
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from typing import Optional, List, Dict
 from datetime import datetime
 import uuid
@@ -22,7 +22,8 @@ class ActivityDB(Base):
     volunteers_needed = Column(Integer, default=5)
     volunteers_registered = Column(Integer, default=0)
     needs_help = Column(Boolean, default=False)
-    attendees = Column(ARRAY(String), default=[])
+    attendees = Column(ARRAY(String), default=[]) # Legacy and no longer written; read the attendance table
+    attended_count = Column(Integer, default=0) # Maintained on every attendance insert
     skills_required = Column(ARRAY(String), default=[])
     image_url = Column(String(500), nullable=True)
     organiser = Column(String(255), nullable=True)
@@ -35,6 +36,11 @@ class ActivityDB(Base):
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
 
+    __table_args__ = (
+        # Range index for schedule overlap checks (services/schedule.py)
+        Index("ix_activities_time_range", func.tsrange(start_time, end_time), postgresql_using="gist"),
+    )
+
 
 # Pydantic Models for API
 class ActivityBase(BaseModel):
@@ -49,7 +55,7 @@ class ActivityBase(BaseModel):
     volunteers_needed: int = 5
     volunteers_registered: int = 0
     needs_help: bool = False
-    attendees: List[str] = []
+    attendees: List[str] = [] # Read-only, derived from the attendance table; ignored on writes
     skills_required: List[str] = []
     image_url: Optional[str] = None
     organiser: Optional[str] = None
@@ -59,7 +65,12 @@ class ActivityBase(BaseModel):
 
 
 class ActivityCreate(ActivityBase):
-    pass
+    @model_validator(mode="after")
+    def check_time_range(self):
+        # tsrange(start_time, end_time) in ix_activities_time_range rejects reversed ranges
+        if self.end_time < self.start_time:
+            raise ValueError("end_time must not be before start_time")
+        return self
 
 
 class ActivityUpdate(BaseModel):
@@ -80,6 +91,12 @@ class ActivityUpdate(BaseModel):
     status: Optional[str] = None
     volunteer_form: Optional[Dict] = None
 
+    @model_validator(mode="after")
+    def check_time_range(self):
+        if self.start_time and self.end_time and self.end_time < self.start_time:
+            raise ValueError("end_time must not be before start_time")
+        return self
+
 
 class ActivityInDB(ActivityBase):
     id: Optional[str] = None
@@ -90,6 +107,7 @@ class ActivityInDB(ActivityBase):
 
 class ActivityResponse(ActivityBase):
     id: Optional[str] = None
+    attended_count: int = 0
     created_by: Optional[str] = None
     created_at: Optional[datetime] = None
 
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List
 from datetime import datetime
 import uuid
 
@@ -11,12 +11,18 @@ class AttendanceDB(Base):
     __tablename__ = "attendance"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Cascaded deletes skip the stats counters: delete_activity removes check-ins
+    # through services/attendance first; after deleting users run reconcile_user_stats.py
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     activity_id = Column(UUID(as_uuid=True), ForeignKey("activities.id", ondelete="CASCADE"), nullable=False, index=True)
     check_in_time = Column(DateTime, default=datetime.utcnow)
     verified_by = Column(UUID(as_uuid=True), nullable=True) # ID of admin/staff who verified
     hours_earned = Column(Integer, default=0)
 
+    __table_args__ = (
+        UniqueConstraint("activity_id", "user_id", name="uq_attendance_activity_user"),
+    )
+
 class AttendanceBase(BaseModel):
     user_id: str
     activity_id: str
@@ -24,6 +30,17 @@ class AttendanceBase(BaseModel):
 class AttendanceCreate(AttendanceBase):
     pass
 
+class AttendanceScan(BaseModel):
+    user_id: str
+    scanned_at: Optional[datetime] = None
+
+class AttendanceBulkCreate(BaseModel):
+    activity_id: str
+    scans: List[AttendanceScan] = Field(..., min_length=1, max_length=2000)
+
+class SelfCheckIn(BaseModel):
+    token: str
+
 class AttendanceResponse(AttendanceBase):
     id: str
     check_in_time: datetime
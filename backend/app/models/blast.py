@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, ARRAY
+from sqlalchemy.dialects.postgresql import UUID
+from pydantic import BaseModel
+from datetime import datetime
+import uuid
+
+from ..db import Base
+
+class BlastJobDB(Base):
+    """A WhatsApp recruitment blast for an activity, built in the background by services/blast.py."""
+    __tablename__ = "blast_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    activity_id = Column(UUID(as_uuid=True), ForeignKey("activities.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_by = Column(UUID(as_uuid=True), nullable=True)
+    status = Column(String(20), nullable=False, default="queued") # queued, running, completed, failed
+    match_skills = Column(Boolean, default=True)
+    only_available = Column(Boolean, default=True)
+    skills = Column(ARRAY(String), default=[]) # Normalized skills used for the prefilter
+    message_template = Column(Text, nullable=True)
+    total_candidates = Column(Integer, default=0) # Counted when the job starts, for progress
+    processed = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    attempt = Column(Integer, default=0) # Bumped on every claim; a worker only writes while it holds the latest
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True) # Bumped per batch while running
+    finished_at = Column(DateTime, nullable=True)
+
+class BlastResultDB(Base):
+    """One personalized message of a blast; `seq` orders the results for paging."""
+    __tablename__ = "blast_results"
+
+    job_id = Column(UUID(as_uuid=True), ForeignKey("blast_jobs.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String(255), nullable=True)
+    phone = Column(String(50), nullable=False)
+    skills = Column(ARRAY(String), default=[])
+    whatsapp_link = Column(Text, nullable=False)
+
+class BlastJobCreate(BaseModel):
+    activity_id: str
+    match_skills: bool = True
+    only_available: bool = True
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List
 from datetime import datetime
 import uuid
 
@@ -32,6 +32,11 @@ class BookingCreate(BookingBase):
     pass
 
 
+class BookingBatchCreate(BaseModel):
+    activity_ids: List[str] = Field(..., min_length=1, max_length=50)
+    notes: Optional[str] = None
+
+
 class BookingResponse(BookingBase):
     id: Optional[str] = None
     user_id: Optional[str] = None
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+from ..db import Base
+
+class LeaderboardEntryDB(Base):
+    """
+    Precomputed volunteer hours ranking, rebuilt by services/leaderboard.py.
+
+    One row per user per board. A board is a (period, activity_type) pair
+    where period is "all" or "YYYY-MM" and activity_type is "all" or a type.
+    """
+    __tablename__ = "leaderboard_entries"
+
+    period = Column(String(7), primary_key=True)
+    activity_type = Column(String(50), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    hours = Column(Integer, nullable=False, default=0)
+    events = Column(Integer, nullable=False, default=0)
+    rank = Column(Integer, nullable=False)
+    participants = Column(Integer, nullable=False)  # Users on the same board
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Top-K reads walk this index in rank order
+        Index("ix_leaderboard_board_rank", "period", "activity_type", "rank"),
+    )
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: str
+    name: str
+    image: Optional[str] = None
+    hours: int
+    events: int
+
+class LeaderboardResponse(BaseModel):
+    period: str
+    activity_type: str
+    refreshed_at: Optional[datetime] = None
+    participants: int = 0
+    entries: List[LeaderboardEntry] = []
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum, ARRAY, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum, ARRAY, JSON, Index, DDL, event, inspect
 from sqlalchemy.dialects.postgresql import UUID
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Iterable, Optional, List
 from datetime import datetime
 from enum import Enum
 import uuid
@@ -36,6 +36,7 @@ class UserDB(Base):
     role = Column(String(50), default="user")
     tier = Column(String(50), default="ad-hoc")
     skills = Column(ARRAY(String), default=[])
+    skills_normalized = Column(ARRAY(String), default=[]) # Maintained from skills, see normalize_skills
     phone_number = Column(String(50), nullable=True)
     is_verified = Column(Boolean, default=False)
     address = Column(JSON, nullable=True)
@@ -57,6 +58,70 @@ class UserDB(Base):
     # Achievements Progress (JSON array of achievement objects)
     achievements = Column(JSON, default=[])
 
+    __table_args__ = (
+        # Skill overlap (&&) searches
+        Index("ix_users_skills_normalized", skills_normalized, postgresql_using="gin"),
+    )
+
+
+def normalize_skill(skill: str) -> str:
+    """Case and whitespace insensitive form of a skill: " First  AID" -> "first aid" """
+    return " ".join(skill.split()).lower()
+
+
+def normalize_skills(skills: Optional[Iterable[str]]) -> List[str]:
+    return sorted({normalize_skill(s) for s in skills or [] if s and s.strip()})
+
+
+# skills_normalized is maintained by a trigger, so rows written outside the ORM
+# (the Next.js app, Core inserts, raw SQL) stay searchable too. The SQL
+# normalize_skills() matches the Python one above; ORDER BY "C" collation
+# sorts by code point like sorted(). migrate_skills.py installs these on
+# existing databases.
+SKILLS_NORMALIZED_DDL = [
+    r"""
+    CREATE OR REPLACE FUNCTION normalize_skills(skills VARCHAR[]) RETURNS VARCHAR[]
+    LANGUAGE sql IMMUTABLE AS $$
+        SELECT ARRAY(
+            SELECT DISTINCT lower(btrim(regexp_replace(s, '\s+', ' ', 'g'))) COLLATE "C"
+            FROM unnest(skills) AS s
+            WHERE btrim(regexp_replace(s, '\s+', ' ', 'g')) <> ''
+            ORDER BY 1
+        )::VARCHAR[]
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION users_sync_skills_normalized() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.skills_normalized := normalize_skills(NEW.skills);
+        RETURN NEW;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS users_skills_normalized ON users",
+    """
+    CREATE TRIGGER users_skills_normalized
+    BEFORE INSERT OR UPDATE OF skills, skills_normalized ON users
+    FOR EACH ROW EXECUTE FUNCTION users_sync_skills_normalized()
+    """,
+]
+
+for _statement in SKILLS_NORMALIZED_DDL:
+    event.listen(UserDB.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+
+# The trigger is authoritative; these keep loaded objects in step without a refresh
+@event.listens_for(UserDB, "before_insert")
+def _set_skills_normalized(mapper, connection, target):
+    target.skills_normalized = normalize_skills(target.skills)
+
+
+@event.listens_for(UserDB, "before_update")
+def _sync_skills_normalized(mapper, connection, target):
+    if inspect(target).attrs.skills.history.has_changes():
+        target.skills_normalized = normalize_skills(target.skills)
+
 
 # Pydantic Models for API
 class Address(BaseModel):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, ARRAY
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, ARRAY, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
@@ -18,6 +18,10 @@ class VolunteerDB(Base):
     applied_at = Column(DateTime, default=datetime.utcnow)
     skills_offered = Column(ARRAY(String), default=[])
 
+    __table_args__ = (
+        UniqueConstraint("activity_id", "user_id", name="uq_event_volunteers_activity_user"),
+    )
+
 class VolunteerBase(BaseModel):
     activity_id: str
     role: str = "Volunteer"
@@ -33,3 +37,7 @@ class VolunteerResponse(VolunteerBase):
     applied_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+class PlanAssignment(BaseModel):
+    activity_id: str
+    volunteer_id: str
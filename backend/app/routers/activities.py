@@ -6,9 +6,11 @@ from sqlalchemy import select, or_, and_, delete
 from uuid import UUID
 
 from ..db import get_database
-from ..models.activity import ActivityDB, ActivityResponse, ActivityCreate, ActivityBase
+from ..models.activity import ActivityDB, ActivityResponse, ActivityCreate
 from ..models.user import UserResponse
 from ..dependencies import get_current_user
+from ..services.crisis import crisis_snapshots
+from ..services.attendance import attendee_ids, remove_activity_attendance
 
 router = APIRouter()
 
@@ -20,10 +22,11 @@ async def get_activity_feed(
     db: AsyncSession = Depends(get_database)
 ):
     now = datetime.utcnow()
-    query = select(ActivityDB).where(ActivityDB.start_time >= now).order_by(ActivityDB.start_time)
+    query = select(ActivityDB).where(ActivityDB.start_time >= now).order_by(ActivityDB.start_time).limit(100)
     
     result = await db.execute(query)
     activities = result.scalars().all()
+    attended = await attendee_ids(db, [a.id for a in activities])
     
     data = [
         {
@@ -39,13 +42,14 @@ async def get_activity_feed(
             "volunteers_needed": a.volunteers_needed,
             "volunteers_registered": a.volunteers_registered,
             "needs_help": a.needs_help,
-            "attendees": a.attendees or [],
+            "attendees": attended.get(a.id, []),
+            "attended_count": a.attended_count or 0,
             "skills_required": a.skills_required or [],
             "image_url": a.image_url,
             "organiser": a.organiser,
             "status": a.status
         }
-        for a in activities[:100]
+        for a in activities
     ]
     
     return data
@@ -106,6 +110,7 @@ async def filter_activities(
                 filtered.append(act)
         activities = filtered
     
+    attended = await attendee_ids(db, [a.id for a in activities])
     return [
         {
             "id": str(a.id),
@@ -120,7 +125,8 @@ async def filter_activities(
             "volunteers_needed": a.volunteers_needed,
             "volunteers_registered": a.volunteers_registered,
             "needs_help": a.needs_help,
-            "attendees": a.attendees or [],
+            "attendees": attended.get(a.id, []),
+            "attended_count": a.attended_count or 0,
             "skills_required": a.skills_required or [],
             "image_url": a.image_url,
             "organiser": a.organiser,
@@ -156,7 +162,6 @@ async def create_activity(
         volunteers_needed=activity.volunteers_needed,
         volunteers_registered=activity.volunteers_registered,
         needs_help=activity.needs_help,
-        attendees=activity.attendees,
         skills_required=activity.skills_required,
         image_url=activity.image_url,
         organiser=activity.organiser,
@@ -182,7 +187,8 @@ async def create_activity(
         volunteers_needed=new_activity.volunteers_needed,
         volunteers_registered=new_activity.volunteers_registered,
         needs_help=new_activity.needs_help,
-        attendees=new_activity.attendees or [],
+        attendees=[],
+        attended_count=0,
         skills_required=new_activity.skills_required or [],
         image_url=new_activity.image_url,
         organiser=new_activity.organiser,
@@ -213,7 +219,8 @@ async def get_activity(
     
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
-        
+    
+    attended = await attendee_ids(db, [activity.id])
     return ActivityResponse(
         id=str(activity.id),
         title=activity.title,
@@ -227,7 +234,8 @@ async def get_activity(
         volunteers_needed=activity.volunteers_needed,
         volunteers_registered=activity.volunteers_registered,
         needs_help=activity.needs_help,
-        attendees=activity.attendees or [],
+        attendees=attended.get(activity.id, []),
+        attended_count=activity.attended_count or 0,
         skills_required=activity.skills_required or [],
         image_url=activity.image_url,
         organiser=activity.organiser,
@@ -242,7 +250,7 @@ async def get_activity(
 @router.put("/admin/activities/{activity_id}", response_model=ActivityResponse)
 async def update_activity(
     activity_id: str,
-    activity: ActivityBase,
+    activity: ActivityCreate,
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_database)
 ):
@@ -265,13 +273,14 @@ async def update_activity(
         raise HTTPException(status_code=404, detail="Activity not found")
     
     # Update fields
-    for field, value in activity.model_dump(exclude_unset=True).items():
+    for field, value in activity.model_dump(exclude_unset=True, exclude={"attendees"}).items():
         setattr(existing, field, value)
     existing.updated_at = datetime.utcnow()
     
     await db.commit()
     await db.refresh(existing)
     
+    attended = await attendee_ids(db, [existing.id])
     return ActivityResponse(
         id=str(existing.id),
         title=existing.title,
@@ -285,7 +294,8 @@ async def update_activity(
         volunteers_needed=existing.volunteers_needed,
         volunteers_registered=existing.volunteers_registered,
         needs_help=existing.needs_help,
-        attendees=existing.attendees or [],
+        attendees=attended.get(existing.id, []),
+        attended_count=existing.attended_count or 0,
         skills_required=existing.skills_required or [],
         image_url=existing.image_url,
         organiser=existing.organiser,
@@ -320,8 +330,12 @@ async def delete_activity(
     if not existing:
         raise HTTPException(status_code=404, detail="Activity not found")
     
+    # Check-ins would cascade with the activity without touching attendees' stats
+    await remove_activity_attendance(db, existing)
     await db.execute(delete(ActivityDB).where(ActivityDB.id == uuid_id))
     await db.commit()
+    # Core deletes bypass the ORM hooks that normally drop dashboard snapshots
+    crisis_snapshots.invalidate()
     
     return {"message": "Activity deleted successfully"}
 
@@ -359,6 +373,7 @@ async def get_all_activities(
     query = query.order_by(ActivityDB.start_time)
     result = await db.execute(query)
     activities = result.scalars().all()
+    attended = await attendee_ids(db, [a.id for a in activities])
     
     return [
         {
@@ -374,7 +389,8 @@ async def get_all_activities(
             "volunteers_needed": a.volunteers_needed,
             "volunteers_registered": a.volunteers_registered,
             "needs_help": a.needs_help,
-            "attendees": a.attendees or [],
+            "attendees": attended.get(a.id, []),
+            "attended_count": a.attended_count or 0,
             "skills_required": a.skills_required or [],
             "image_url": a.image_url,
             "organiser": a.organiser,
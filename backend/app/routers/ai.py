@@ -5,14 +5,19 @@ from time import time
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func
 from uuid import UUID
+from typing import Optional
 
 from ..db import get_database
 from ..models.user import UserDB, UserResponse
 from ..models.activity import ActivityDB
 from ..dependencies import get_current_user
 from ..services import ai as ai_service
+from ..services.matching import availability_mask, load_roster, rank_volunteers
+from ..services.schedule import busy_user_ids
+from ..config import get_settings
 
 router = APIRouter()
+settings = get_settings()
 
 request_counts = defaultdict(list)
 RATE_LIMIT = 10
@@ -65,13 +70,15 @@ async def summarize_feedback(
 @router.post("/admin/ai/match-volunteers")
 async def match_volunteers_for_activity(
     activity_id: str = Body(..., embed=True),
+    rerank: bool = Body(False, embed=True),
+    top_k: Optional[int] = Body(None, embed=True, ge=1, le=100),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_database)
 ):
     if not is_admin_or_staff(current_user.role):
         raise HTTPException(status_code=403, detail="Forbidden")
     
-    if not check_rate_limit(str(current_user.id)):
+    if rerank and not check_rate_limit(str(current_user.id)):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     
     try:
@@ -85,20 +92,40 @@ async def match_volunteers_for_activity(
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
-    vol_result = await db.execute(select(UserDB).where(UserDB.role == "volunteer"))
-    volunteers = vol_result.scalars().all()
-    
-    # Format for AI service
-    vol_dicts = [{"name": v.name, "skills": v.skills or []} for v in volunteers]
-    act_dict = {"title": activity.title, "skills_required": activity.skills_required or []}
+    act_dict = {
+        "title": activity.title,
+        "skills_required": activity.skills_required or [],
+        "activity_type": activity.activity_type,
+        "start_time": activity.start_time
+    }
     
-    matches = await ai_service.match_volunteers(act_dict, vol_dicts)
+    # Candidates: volunteers free at that time having one of the required
+    # skills, ranked locally. The model only ever sees the top K of them,
+    # whatever the roster size.
+    busy = await busy_user_ids(db, activity.start_time, activity.end_time)
+    k = top_k or settings.MATCH_RERANK_TOP_K
+    wanted = k if rerank else 10
+    roster = await load_roster(db, skills=activity.skills_required or None)
+    available = availability_mask(roster, busy)
+    if activity.skills_required and available.sum() < wanted:
+        # Too few skilled volunteers free; rank everyone instead
+        roster = await load_roster(db)
+        available = availability_mask(roster, busy)
+    matches = rank_volunteers(roster, act_dict, limit=wanted, mask=available)
+    
+    reranked, usage = False, None
+    if rerank:
+        matches, reranked, usage = await ai_service.rerank_volunteers(act_dict, matches)
     
     return {
         "activity_id": str(activity.id),
         "activity_title": activity.title,
         "skills_required": activity.skills_required or [],
-        "total_volunteers_found": len(volunteers),
+        "total_volunteers_found": len(roster),
+        "available_volunteers": int(available.sum()),
+        "candidates_sent": len(matches) if rerank else 0,
+        "reranked": reranked,
+        "token_usage": usage,
         "matches": matches[:10]
     }
 
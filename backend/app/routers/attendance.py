@@ -1,20 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from datetime import datetime
-import qrcode
-import io
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import Response, StreamingResponse
+from datetime import datetime, timezone
+from typing import Optional
+import asyncio
 import base64
+import hashlib
+import json
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from uuid import UUID
 
 from ..db import get_database
-from ..models.user import UserDB, UserResponse
+from ..models.user import UserResponse
 from ..models.activity import ActivityDB
-from ..models.attendance import AttendanceDB
-from ..dependencies import get_current_user
+from ..models.attendance import AttendanceDB, AttendanceBulkCreate, SelfCheckIn
+from ..dependencies import get_current_user, get_loaders
+from ..services.loader import Loaders
+from ..services.attendance import record_attendance, record_attendance_bulk, remove_attendance, checkin_writer
+from ..services.pubsub import attendance_broker
+from ..services.checkin_token import InvalidCheckinToken, verify_checkin_token
+from ..services.qr import QR_MEDIA_TYPES, activity_qr_data, current_window, render_qr_async
 
 router = APIRouter()
 
+# Seconds between SSE comment pings, keeps proxies from closing idle streams
+STREAM_HEARTBEAT_SECONDS = 15
+
 def is_admin_or_staff(role: str) -> bool:
     return role in ["admin", "staff"]
 
@@ -38,28 +49,14 @@ async def mark_attendance(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid ID format")
     
-    # Check if activity exists
-    result = await db.execute(select(ActivityDB).where(ActivityDB.id == activity_uuid))
-    activity = result.scalar_one_or_none()
-    if not activity:
-        raise HTTPException(status_code=404, detail="Activity not found")
+    result = await record_attendance(db, activity_uuid, user_uuid, verified_by=UUID(current_user.id))
     
-    # Check if user exists
-    user_result = await db.execute(select(UserDB).where(UserDB.id == user_uuid))
-    user = user_result.scalar_one_or_none()
-    if not user:
+    if not result["activity_found"]:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    if not result["user_found"]:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Check if already marked
-    att_result = await db.execute(
-        select(AttendanceDB).where(
-            AttendanceDB.activity_id == activity_uuid,
-            AttendanceDB.user_id == user_uuid
-        )
-    )
-    existing_attendance = att_result.scalar_one_or_none()
-    
-    if existing_attendance:
+    if result["already_attended"]:
         return {
             "message": "User already marked as attended",
             "activity_id": activity_id,
@@ -67,32 +64,145 @@ async def mark_attendance(
             "already_attended": True
         }
     
-    # Create attendance record
-    # Calculate hours: end_time - start_time
-    duration = activity.end_time - activity.start_time
-    hours = int(duration.total_seconds() / 3600) or 2 # default 2 hours if too short
+    return {
+        "message": "Attendance marked successfully",
+        "activity_id": activity_id,
+        "user_id": user_id,
+        "hours_earned": result["hours_earned"],
+        "already_attended": False
+    }
+
+
+@router.delete("/admin/attendance/mark")
+async def unmark_attendance(
+    activity_id: str,
+    user_id: str,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Remove a user's check-in for an activity"""
+    if not is_admin_or_staff(current_user.role):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin or staff can mark attendance"
+        )
     
-    attendance = AttendanceDB(
-        activity_id=activity_uuid,
-        user_id=user_uuid,
-        hours_earned=hours,
-        verified_by=UUID(current_user.id)
-    )
+    try:
+        activity_uuid = UUID(activity_id)
+        user_uuid = UUID(user_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid ID format")
     
-    # Also update the legacy attendees list for compatibility
-    if not activity.attendees:
-        activity.attendees = []
-    activity.attendees = list(activity.attendees) + [user_id]
+    result = await remove_attendance(db, activity_uuid, user_uuid)
     
-    db.add(attendance)
-    await db.commit()
+    if not result["activity_found"]:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    if not result["removed"]:
+        raise HTTPException(status_code=404, detail="User has not checked in")
     
     return {
-        "message": "Attendance marked successfully",
+        "message": "Attendance removed",
         "activity_id": activity_id,
         "user_id": user_id,
-        "hours_earned": hours,
-        "already_attended": False
+        "total_attended": result["attended_count"]
+    }
+
+
+@router.post("/admin/attendance/bulk")
+async def mark_attendance_bulk(
+    bulk_req: AttendanceBulkCreate,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Sync a batch of offline QR scans for one activity"""
+    if not is_admin_or_staff(current_user.role):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin or staff can mark attendance"
+        )
+    
+    try:
+        activity_uuid = UUID(bulk_req.activity_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid activity ID")
+    
+    now = datetime.utcnow()
+    results = []
+    earliest = {}  # user_id -> index into results of the scan that will be inserted
+    for scan in bulk_req.scans:
+        item = {"user_id": scan.user_id, "status": None}
+        results.append(item)
+        try:
+            user_uuid = UUID(scan.user_id)
+        except ValueError:
+            item["status"] = "invalid_id"
+            continue
+        
+        # Device clocks drift; never record a check-in in the future
+        scanned_at = scan.scanned_at or now
+        if scanned_at.tzinfo:
+            scanned_at = scanned_at.astimezone(timezone.utc).replace(tzinfo=None)
+        scanned_at = min(scanned_at, now)
+        item["scanned_at"] = scanned_at
+        
+        # Keep the earliest scan per user, later ones are duplicates
+        previous = earliest.get(user_uuid)
+        if previous is None or scanned_at < results[previous]["scanned_at"]:
+            if previous is not None:
+                results[previous]["status"] = "duplicate"
+            earliest[user_uuid] = len(results) - 1
+        else:
+            item["status"] = "duplicate"
+    
+    scans = [(user_uuid, results[index]["scanned_at"]) for user_uuid, index in earliest.items()]
+    if scans:
+        outcome = await record_attendance_bulk(db, activity_uuid, scans, verified_by=UUID(current_user.id))
+        if not outcome["activity_found"]:
+            raise HTTPException(status_code=404, detail="Activity not found")
+        
+        for user_uuid, index in earliest.items():
+            if user_uuid in outcome["inserted"]:
+                results[index]["status"] = "checked_in"
+                results[index]["hours_earned"] = outcome["hours_earned"]
+            elif user_uuid in outcome["known"]:
+                results[index]["status"] = "already_attended"
+            else:
+                results[index]["status"] = "unknown_user"
+    
+    for item in results:
+        if "scanned_at" in item:
+            item["scanned_at"] = item["scanned_at"].isoformat()
+    
+    return {
+        "activity_id": bulk_req.activity_id,
+        "total_scans": len(results),
+        "checked_in": sum(1 for item in results if item["status"] == "checked_in"),
+        "results": results
+    }
+
+
+@router.post("/attendance/check-in")
+async def self_check_in(
+    check_in: SelfCheckIn,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Check the current user in by scanning the activity's QR code"""
+    try:
+        activity_uuid = verify_checkin_token(check_in.token)
+    except InvalidCheckinToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = await checkin_writer.submit(activity_uuid, UUID(current_user.id))
+    
+    if result["status"] == "activity_not_found":
+        raise HTTPException(status_code=404, detail="Activity not found")
+    
+    return {
+        "message": "Checked in successfully" if result["status"] == "checked_in" else "Already checked in",
+        "activity_id": str(activity_uuid),
+        "user_id": current_user.id,
+        "hours_earned": result.get("hours_earned"),
+        "already_attended": result["status"] == "already_attended"
     }
 
 
@@ -100,7 +210,8 @@ async def mark_attendance(
 async def get_attendance(
     activity_id: str,
     current_user: UserResponse = Depends(get_current_user),
-    db: AsyncSession = Depends(get_database)
+    db: AsyncSession = Depends(get_database),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Get live attendance count and list for an activity"""
     if not is_admin_or_staff(current_user.role):
@@ -114,48 +225,147 @@ async def get_attendance(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid activity ID")
     
-    result = await db.execute(select(ActivityDB).where(ActivityDB.id == activity_uuid))
-    activity = result.scalar_one_or_none()
+    activity = await loaders.activities.load(activity_uuid)
     
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
-    attendee_ids = activity.attendees or []
+    total_attended = activity.attended_count or 0
     capacity = activity.capacity or 0
     
     # Get attendee details
-    attendees = []
-    for attendee_id in attendee_ids:
-        try:
-            user_uuid = UUID(attendee_id)
-            user_result = await db.execute(select(UserDB).where(UserDB.id == user_uuid))
-            user = user_result.scalar_one_or_none()
-            if user:
-                attendees.append({
-                    "id": str(user.id),
-                    "name": user.name,
-                    "email": user.email
-                })
-        except ValueError:
-            pass
+    att_result = await db.execute(
+        select(AttendanceDB)
+        .where(AttendanceDB.activity_id == activity_uuid)
+        .order_by(AttendanceDB.check_in_time)
+    )
+    records = att_result.scalars().all()
+    users = await loaders.users.load_many(att.user_id for att in records)
+    attendees = [
+        {
+            "id": str(user.id),
+            "name": user.name,
+            "email": user.email,
+            "check_in_time": att.check_in_time.isoformat() if att.check_in_time else None,
+            "hours_earned": att.hours_earned
+        }
+        for att, user in zip(records, users)
+        if user
+    ]
     
     return {
         "activity_id": str(activity.id),
         "title": activity.title,
-        "total_attended": len(attendee_ids),
+        "total_attended": total_attended,
         "capacity": capacity,
-        "attendance_percentage": int((len(attendee_ids) / capacity * 100)) if capacity > 0 else 0,
+        "attendance_percentage": int((total_attended / capacity * 100)) if capacity > 0 else 0,
         "attendees": attendees
     }
 
 
-@router.get("/admin/activities/{activity_id}/qr")
-async def generate_qr_code(
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _unseen(event: dict, checked_in: set) -> Optional[dict]:
+    """
+    The part of a delta not yet reflected in the stream, updating `checked_in`
+    (who the client has seen checked in). None if there is nothing new.
+    """
+    if event["type"] == "check_in":
+        attendees = [a for a in event["attendees"] if a["user_id"] not in checked_in]
+        if not attendees:
+            return None
+        checked_in.update(a["user_id"] for a in attendees)
+        return {**event, "attendees": attendees}
+    if event["type"] == "check_out":
+        if event["user_id"] not in checked_in:
+            return None
+        checked_in.discard(event["user_id"])
+    return event
+
+
+@router.get("/admin/activities/{activity_id}/attendance/stream")
+async def stream_attendance(
     activity_id: str,
+    request: Request,
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_database)
 ):
-    """Generate QR code for activity check-in"""
+    """
+    Server-sent events stream of check-ins for an activity.
+
+    Sends a `snapshot` with the current totals, then a `check_in` event per
+    committed check-in (single, bulk or self check-in) and a `check_out` per
+    removal, each only once its change isn't already in the snapshot. A
+    `resync` event means the client fell behind and should re-fetch the
+    attendance list.
+    """
+    if not is_admin_or_staff(current_user.role):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin or staff can view attendance"
+        )
+    
+    try:
+        activity_uuid = UUID(activity_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid activity ID")
+    
+    # Subscribe before reading the snapshot so no check-in falls between the
+    # two. Deltas published in the meantime may already be in the snapshot;
+    # they are dropped by comparing against who was checked in.
+    subscription = attendance_broker.subscribe(activity_uuid)
+    try:
+        result = await db.execute(
+            select(ActivityDB.title, ActivityDB.capacity).where(ActivityDB.id == activity_uuid)
+        )
+        activity = result.one_or_none()
+        
+        if not activity:
+            raise HTTPException(status_code=404, detail="Activity not found")
+        
+        result = await db.execute(select(AttendanceDB.user_id).where(AttendanceDB.activity_id == activity_uuid))
+        checked_in = {str(user_id) for user_id in result.scalars().all()}
+        await db.close()
+    except BaseException:
+        subscription.close()
+        raise
+    
+    snapshot = {
+        "activity_id": activity_id,
+        "title": activity.title,
+        "capacity": activity.capacity or 0,
+        "total_attended": len(checked_in)
+    }
+    
+    async def events():
+        try:
+            yield _sse("snapshot", snapshot)
+            while not await request.is_disconnected():
+                try:
+                    event = await subscription.get(STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                if event is None:
+                    yield _sse("resync", {"activity_id": activity_id})
+                    break
+                event = _unseen(event, checked_in)
+                if event is not None:
+                    yield _sse(event["type"], event)
+        finally:
+            subscription.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _get_qr_activity(activity_id: str, current_user: UserResponse, db: AsyncSession) -> ActivityDB:
     if not is_admin_or_staff(current_user.role):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -173,17 +383,22 @@ async def generate_qr_code(
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
-    qr_data = f"HOLYSHEET:ACTIVITY:{activity_id}:{datetime.utcnow().isoformat()}"
-    
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
+    return activity
+
+
+@router.get("/admin/activities/{activity_id}/qr")
+async def generate_qr_code(
+    activity_id: str,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Generate QR code for activity check-in"""
+    activity = await _get_qr_activity(activity_id, current_user, db)
     
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    img_base64 = base64.b64encode(buffer.getvalue()).decode()
+    window, _ = current_window()
+    qr_data = activity_qr_data(activity.id, window)
+    png = await render_qr_async(qr_data, "png")
+    img_base64 = base64.b64encode(png).decode()
     
     return {
         "activity_id": str(activity.id),
@@ -191,3 +406,32 @@ async def generate_qr_code(
         "qr_code": f"data:image/png;base64,{img_base64}",
         "qr_data": qr_data
     }
+
+
+@router.get("/admin/activities/{activity_id}/qr.{fmt}")
+async def get_qr_image(
+    activity_id: str,
+    fmt: str,
+    request: Request,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Serve the check-in QR code as a cacheable PNG or SVG image"""
+    if fmt not in QR_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail="Unsupported QR format")
+    
+    activity = await _get_qr_activity(activity_id, current_user, db)
+    
+    window, remaining = current_window()
+    qr_data = activity_qr_data(activity.id, window)
+    etag = f'"{hashlib.sha1(f"{qr_data}:{fmt}".encode()).hexdigest()}"'
+    headers = {
+        "Cache-Control": f"private, max-age={remaining}",
+        "ETag": etag
+    }
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    content = await render_qr_async(qr_data, fmt)
+    return Response(content=content, media_type=QR_MEDIA_TYPES[fmt], headers=headers)
@@ -1,19 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response
+from typing import Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from uuid import UUID
 
 from ..db import get_database
-from ..models.booking import BookingDB, BookingCreate
+from ..models.booking import BookingDB, BookingCreate, BookingBatchCreate
 from ..models.activity import ActivityDB
 from ..models.user import UserResponse
 from ..dependencies import get_current_user
-from ..services.calendar import generate_google_calendar_link, generate_ics_content
+from ..services.calendar import get_activity_google_link, get_activity_ics
+from ..services.tier import get_remaining_weekly_bookings
+from ..services.bookings import list_user_bookings
+from ..services.schedule import find_conflicts, get_user_schedule, lock_user_schedule, overlaps, serialize_entry
 
 router = APIRouter()
 
 
+def is_admin_or_staff(role: str) -> bool:
+    return role in ["admin", "staff"]
+
+
+def _calendar_links(booking_id, activity: ActivityDB) -> dict:
+    return {
+        "googleCalendar": get_activity_google_link(activity),
+        "ics": f"/bookings/{booking_id}/calendar.ics"
+    }
+
+
 @router.post("/bookings")
 async def create_booking(
     booking_req: BookingCreate,
@@ -32,6 +48,20 @@ async def create_booking(
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
+    # Held until the commit below, so concurrent bookings are checked one at a time
+    await lock_user_schedule(db, UUID(current_user.id))
+    conflicts = await find_conflicts(
+        db, UUID(current_user.id), activity.start_time, activity.end_time, exclude_activity_id=activity.id
+    )
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "This activity overlaps with your existing schedule",
+                "conflicts": [serialize_entry(c) for c in conflicts]
+            }
+        )
+    
     # Create Booking
     new_booking = BookingDB(
         user_id=UUID(current_user.id),
@@ -45,28 +75,184 @@ async def create_booking(
     await db.commit()
     await db.refresh(new_booking)
     
-    # Generate Links
-    google_link = generate_google_calendar_link(
-        activity.title,
-        activity.description or "",
-        activity.location or "",
-        activity.start_time,
-        activity.end_time
-    )
-    
-    ics_content = generate_ics_content(
-        activity.title,
-        activity.description or "",
-        activity.location or "",
-        activity.start_time,
-        activity.end_time
-    )
-    
     return {
         "message": "Booking successful",
         "bookingId": str(new_booking.id),
-        "links": {
-            "googleCalendar": google_link,
-            "ics": ics_content
+        "links": _calendar_links(new_booking.id, activity)
+    }
+
+
+@router.get("/user/bookings")
+async def get_user_bookings(
+    scope: str = Query("upcoming", pattern="^(upcoming|past)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """List the current user's upcoming or past bookings, one page at a time"""
+    try:
+        return await list_user_bookings(db, UUID(current_user.id), scope=scope, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/bookings/{booking_id}/calendar.ics")
+async def get_booking_calendar(
+    booking_id: str,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Download the ICS file for a booking"""
+    try:
+        booking_uuid = UUID(booking_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Booking ID")
+
+    result = await db.execute(
+        select(BookingDB, ActivityDB)
+        .join(ActivityDB, BookingDB.activity_id == ActivityDB.id)
+        .where(BookingDB.id == booking_uuid)
+    )
+    row = result.first()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Booking not found")
+
+    booking, activity = row
+    if str(booking.user_id) != current_user.id and not is_admin_or_staff(current_user.role):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+    return Response(
+        content=get_activity_ics(activity),
+        media_type="text/calendar; charset=utf-8",
+        headers={
+            "Content-Disposition": f'attachment; filename="booking_{booking_id}.ics"',
+            "Cache-Control": "private, max-age=300"
         }
+    )
+
+
+@router.post("/bookings/batch")
+async def create_bookings_batch(
+    batch_req: BookingBatchCreate,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Book several activities for the current user in one transaction.
+
+    Every item gets its own result; items that fail validation do not
+    prevent the rest of the batch from being booked.
+    """
+    user_uuid = UUID(current_user.id)
+
+    results = []
+    requested = []
+    seen = set()
+    for raw_id in batch_req.activity_ids:
+        item = {"activity_id": raw_id, "status": None, "bookingId": None}
+        results.append(item)
+        try:
+            activity_uuid = UUID(raw_id)
+        except ValueError:
+            item["status"] = "invalid_id"
+            continue
+        if activity_uuid in seen:
+            item["status"] = "duplicate"
+            continue
+        seen.add(activity_uuid)
+        requested.append((item, activity_uuid))
+
+    activity_ids = [activity_uuid for _, activity_uuid in requested]
+
+    if activity_ids:
+        await lock_user_schedule(db, user_uuid)
+
+        # Lock the rows so concurrent batches cannot overbook the same activity
+        result = await db.execute(
+            select(ActivityDB)
+            .where(ActivityDB.id.in_(activity_ids))
+            .order_by(ActivityDB.id)
+            .with_for_update()
+        )
+        activities = {a.id: a for a in result.scalars().all()}
+
+        count_result = await db.execute(
+            select(BookingDB.activity_id, func.count(BookingDB.id))
+            .where(BookingDB.activity_id.in_(activity_ids), BookingDB.status == "confirmed")
+            .group_by(BookingDB.activity_id)
+        )
+        booked_counts = dict(count_result.all())
+
+        existing_result = await db.execute(
+            select(BookingDB.activity_id).where(
+                BookingDB.user_id == user_uuid,
+                BookingDB.activity_id.in_(activity_ids),
+                BookingDB.status == "confirmed"
+            )
+        )
+        already_booked = set(existing_result.scalars().all())
+
+        # One window covering the whole batch; individual overlaps are checked below
+        found = list(activities.values())
+        schedule = await get_user_schedule(
+            db,
+            user_uuid,
+            min(a.start_time for a in found),
+            max(a.end_time for a in found)
+        ) if found else []
+    else:
+        activities, booked_counts, already_booked, schedule = {}, {}, set(), []
+
+    # Only the weekly allowance applies: activities have no allowed_tiers column,
+    # so can_user_book's per-activity tier restriction has nothing to check
+    remaining = await get_remaining_weekly_bookings(current_user.tier, current_user.id, db)
+
+    new_bookings = []
+    now = datetime.utcnow()
+    for item, activity_uuid in requested:
+        activity = activities.get(activity_uuid)
+        if not activity:
+            item["status"] = "not_found"
+        elif activity_uuid in already_booked:
+            item["status"] = "already_booked"
+        elif activity.capacity is not None and booked_counts.get(activity_uuid, 0) >= activity.capacity:
+            item["status"] = "full"
+        elif any(
+            e["activity_id"] != str(activity_uuid) and overlaps(e, {"start_time": activity.start_time, "end_time": activity.end_time})
+            for e in schedule
+        ):
+            item["status"] = "conflict"
+        elif remaining is not None and remaining <= 0:
+            item["status"] = "tier_limit_exceeded"
+        else:
+            booking = BookingDB(
+                user_id=user_uuid,
+                activity_id=activity_uuid,
+                status="confirmed",
+                booked_at=now,
+                notes=batch_req.notes
+            )
+            new_bookings.append((item, booking))
+            schedule.append({
+                "activity_id": str(activity_uuid),
+                "start_time": activity.start_time,
+                "end_time": activity.end_time
+            })
+            booked_counts[activity_uuid] = booked_counts.get(activity_uuid, 0) + 1
+            if remaining is not None:
+                remaining -= 1
+
+    db.add_all([booking for _, booking in new_bookings])
+    await db.commit()
+
+    for item, booking in new_bookings:
+        item["status"] = "booked"
+        item["bookingId"] = str(booking.id)
+        item["links"] = _calendar_links(booking.id, activities[booking.activity_id])
+
+    return {
+        "message": f"Booked {len(new_bookings)} of {len(results)} activities",
+        "booked": len(new_bookings),
+        "results": results
     }
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+
+from ..db import get_database
+from ..models.user import UserResponse
+from ..models.leaderboard import LeaderboardResponse
+from ..dependencies import get_current_user
+from ..services.leaderboard import ALL, get_top, get_rank, refresh_leaderboard
+
+router = APIRouter()
+
+def is_admin_or_staff(role: str) -> bool:
+    return role in ["admin", "staff"]
+
+PERIOD_PATTERN = r"^(all|\d{4}-(0[1-9]|1[0-2]))$"
+
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    period: str = Query(ALL, pattern=PERIOD_PATTERN, description='"all" or a month as YYYY-MM'),
+    activity_type: str = Query(ALL, max_length=50, description='"all" or an activity type'),
+    limit: int = Query(10, ge=1, le=100),
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Top volunteers by hours for a period and activity type"""
+    return await get_top(db, period, activity_type, limit)
+
+
+@router.get("/leaderboard/me")
+async def get_my_rank(
+    period: str = Query(ALL, pattern=PERIOD_PATTERN),
+    activity_type: str = Query(ALL, max_length=50),
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """The current user's rank on a leaderboard"""
+    rank = await get_rank(db, UUID(current_user.id), period, activity_type)
+    if rank is None:
+        return {"period": period, "activity_type": activity_type, "rank": None, "hours": 0, "events": 0}
+    return rank
+
+
+@router.post("/admin/leaderboard/refresh")
+async def refresh(
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Rebuild the leaderboard now instead of waiting for the next scheduled refresh"""
+    if not is_admin_or_staff(current_user.role):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin or staff can refresh the leaderboard"
+        )
+    
+    entries = await refresh_leaderboard(db)
+    return {"message": "Leaderboard refreshed", "entries": entries}
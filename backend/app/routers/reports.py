@@ -11,7 +11,9 @@ from uuid import UUID
 from ..db import get_database
 from ..models.user import UserDB, UserResponse
 from ..models.activity import ActivityDB
-from ..dependencies import get_current_user
+from ..models.attendance import AttendanceDB
+from ..dependencies import get_current_user, get_loaders
+from ..services.loader import Loaders
 
 router = APIRouter()
 
@@ -59,7 +61,7 @@ async def generate_weekly_report(
     # Calculate stats
     total_activities = len(activities)
     total_capacity = sum(act.capacity or 0 for act in activities)
-    total_attended = sum(len(act.attendees or []) for act in activities)
+    total_attended = sum(act.attended_count or 0 for act in activities)
     
     # Volunteer stats
     total_volunteers_needed = sum(act.volunteers_needed or 0 for act in activities)
@@ -87,7 +89,7 @@ async def generate_weekly_report(
                 "date": act.start_time.strftime("%Y-%m-%d %H:%M") if act.start_time else None,
                 "location": act.location,
                 "capacity": act.capacity or 0,
-                "attended": len(act.attendees or []),
+                "attended": act.attended_count or 0,
                 "volunteers_needed": act.volunteers_needed or 0,
                 "volunteers_registered": act.volunteers_registered or 0
             }
@@ -100,7 +102,8 @@ async def generate_weekly_report(
 async def export_activity_csv(
     activity_id: str,
     current_user: UserResponse = Depends(get_current_user),
-    db: AsyncSession = Depends(get_database)
+    db: AsyncSession = Depends(get_database),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Export activity details as CSV"""
     if not is_admin_or_staff(current_user.role):
@@ -114,29 +117,27 @@ async def export_activity_csv(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid activity ID")
     
-    result = await db.execute(select(ActivityDB).where(ActivityDB.id == uuid_id))
-    activity = result.scalar_one_or_none()
+    activity = await loaders.activities.load(uuid_id)
     
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
     # Get attendee details
-    attendee_ids = activity.attendees or []
-    attendees = []
-    
-    for attendee_id in attendee_ids:
-        try:
-            user_uuid = UUID(attendee_id)
-            user_result = await db.execute(select(UserDB).where(UserDB.id == user_uuid))
-            user = user_result.scalar_one_or_none()
-            if user:
-                attendees.append({
-                    "name": user.name,
-                    "email": user.email,
-                    "phone": user.phone_number or "N/A"
-                })
-        except ValueError:
-            pass
+    att_result = await db.execute(
+        select(AttendanceDB.user_id)
+        .where(AttendanceDB.activity_id == uuid_id)
+        .order_by(AttendanceDB.check_in_time)
+    )
+    users = await loaders.users.load_many(att_result.scalars().all())
+    attendees = [
+        {
+            "name": user.name,
+            "email": user.email,
+            "phone": user.phone_number or "N/A"
+        }
+        for user in users
+        if user
+    ]
     
     # Generate CSV
     output = io.StringIO()
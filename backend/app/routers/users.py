@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
 from pydantic import BaseModel
 from typing import Optional
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from uuid import UUID
 
 from ..db import get_database
 from ..models.user import UserDB, UserResponse
-from ..dependencies import get_current_user
+from ..dependencies import get_current_user, build_user_response
+from ..services.schedule import get_user_schedule, scan_conflicts, serialize_entry
+from ..services.user_stats import reconcile_user_stats
+from ..services.achievements import reevaluate_achievements
 
 router = APIRouter()
 
@@ -40,33 +44,65 @@ async def update_profile(
     await db.commit()
     await db.refresh(user)
     
-    return UserResponse(
-        id=str(user.id),
-        name=user.name,
-        email=user.email,
-        image=user.image,
-        role=user.role,
-        tier=user.tier,
-        skills=user.skills or [],
-        phoneNumber=user.phone_number,
-        isVerified=user.is_verified,
-        address=user.address,
-        profileDeadline=user.profile_deadline,
-        emailVerified=user.email_verified,
-        # New fields
-        total_events=user.total_events or 0,
-        volunteer_count=user.volunteer_count or 0,
-        meetups_count=user.meetups_count or 0,
-        volunteer_hours=user.volunteer_hours or 0,
-        achievements=user.achievements or []
-    )
+    return build_user_response(user)
 
 @router.get("/user/profile", response_model=UserResponse)
 async def get_profile(current_user: UserResponse = Depends(get_current_user)):
     return current_user
 
+@router.get("/user/schedule/conflicts")
+async def get_schedule_conflicts(
+    include_past: bool = False,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Scan the current user's bookings and volunteer shifts for overlaps"""
+    start = None if include_past else datetime.utcnow()
+    entries = await get_user_schedule(db, UUID(current_user.id), start=start)
+    conflicts = scan_conflicts(entries)
+
+    return {
+        "total_entries": len(entries),
+        "total_conflicts": len(conflicts),
+        "conflicts": [
+            {"first": serialize_entry(c["first"]), "second": serialize_entry(c["second"])}
+            for c in conflicts
+        ]
+    }
+
 # --- Admin Routes for Users ---
 
+@router.post("/admin/users/stats/reconcile")
+async def reconcile_stats(
+    batch_size: int = Query(500, ge=50, le=5000),
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Recompute stored user stats from attendance and fix any drift"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can reconcile user stats"
+        )
+    
+    return await reconcile_user_stats(db, batch_size=batch_size)
+
+
+@router.post("/admin/users/achievements/reevaluate")
+async def reevaluate_user_achievements(
+    batch_size: int = Query(500, ge=50, le=5000),
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Recompute every user's achievements after the rules changed"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can re-evaluate achievements"
+        )
+    
+    return await reevaluate_achievements(db, batch_size=batch_size)
+
 @router.patch("/admin/users/{user_id}/tier")
 async def update_user_tier(
     user_id: str,
@@ -1,53 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, func
 from uuid import UUID
 
 from ..db import get_database
-from ..models.user import UserDB, UserResponse, UserRole
+from ..models.user import UserDB, UserResponse
 from ..models.activity import ActivityDB
-from ..models.volunteer import VolunteerDB, VolunteerCreate
+from ..models.volunteer import VolunteerDB, VolunteerCreate, PlanAssignment
 from ..models.form_response import FormResponseDB
+from ..models.blast import BlastJobDB, BlastJobCreate
 from ..dependencies import get_current_user
+from ..services.schedule import find_conflicts, get_schedules_between, lock_user_schedule, serialize_entry
+from ..services.matching import load_roster, suggest_for_activities
+from ..services.assignment import plan_assignments
+from ..services.tier import get_week_boundaries
+from ..services.skills import search_volunteers_by_skills
+from ..services.skill_index import skill_index
+from ..services.crisis import crisis_snapshots
+from ..services.blast import blast_runner, create_blast_job, get_blast_results
+from ..services.rosters import list_volunteers, list_activity_volunteers
+from ..services.volunteering import register_volunteer, withdraw_volunteer, reconcile_volunteer_counts
 
 router = APIRouter()
 
 def is_admin_or_staff(role: str) -> bool:
     return role in ["admin", "staff"]
 
+def _split(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else []
+
+
 @router.get("/admin/volunteers")
 async def get_all_volunteers(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    sort: str = Query("name", pattern="^(name|hours)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    skills: Optional[str] = Query(None, description="Comma separated; volunteers with any of them"),
+    tier: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma separated columns to return; all by default"),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_database)
 ):
-    """Get all users with volunteer role (Admin/Staff only)"""
+    """Page through users with volunteer role (Admin/Staff only)"""
     if not is_admin_or_staff(current_user.role):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Forbidden"
         )
     
-    # Fetch users where role is 'volunteer'
-    query = select(UserDB).where(UserDB.role == "volunteer")
-    result = await db.execute(query)
-    users = result.scalars().all()
-    
-    return [
-        {
-            "id": str(u.id),
-            "name": u.name,
-            "email": u.email,
-            "role": u.role,
-            "tier": u.tier, # This is the Engagement Type
-            "location": u.location,
-            "phone_number": u.phone_number,
-            "total_events": u.total_events,
-            "volunteer_hours": u.volunteer_hours,
-            "skills": u.skills
-        }
-        for u in users
-    ]
+    try:
+        return await list_volunteers(
+            db,
+            sort=sort,
+            descending=order == "desc",
+            limit=limit,
+            cursor=cursor,
+            skills=_split(skills),
+            tier=tier,
+            fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/volunteers/register")
 async def register_as_volunteer(
@@ -68,45 +86,92 @@ async def register_as_volunteer(
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
 
-    # Check if already registered
-    vol_result = await db.execute(
-        select(VolunteerDB).where(
-            VolunteerDB.activity_id == activity_uuid,
-            VolunteerDB.user_id == user_uuid
-        )
+    # Held until register_volunteer commits, so concurrent sign-ups are checked one at a time
+    await lock_user_schedule(db, user_uuid)
+    conflicts = await find_conflicts(
+        db, user_uuid, activity.start_time, activity.end_time, exclude_activity_id=activity.id
     )
-    if vol_result.scalar_one_or_none():
-        raise HTTPException(status_code=400, detail="User already registered for this activity")
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "This shift overlaps with your existing schedule",
+                "conflicts": [serialize_entry(c) for c in conflicts]
+            }
+        )
 
-    # Create volunteer record
-    new_volunteer = VolunteerDB(
-        user_id=user_uuid,
-        activity_id=activity_uuid,
+    # Insert and increment in one statement; the unique constraint rejects duplicates
+    registration = await register_volunteer(
+        db,
+        activity_uuid,
+        user_uuid,
         role=register_req.role,
         skills_offered=register_req.skills_offered,
         status="confirmed" # Auto-confirm for now or set to pending
     )
+    if registration["volunteer_id"] is None:
+        raise HTTPException(status_code=400, detail="User already registered for this activity")
 
-    # Increment activity volunteer count
-    activity.volunteers_registered = (activity.volunteers_registered or 0) + 1
+    return {
+        "message": "Registration successful",
+        "volunteer_id": str(registration["volunteer_id"]),
+        "status": registration["status"],
+        "volunteers_registered": registration["volunteers_registered"]
+    }
 
-    db.add(new_volunteer)
-    await db.commit()
-    await db.refresh(new_volunteer)
+
+@router.post("/volunteers/withdraw")
+async def withdraw_as_volunteer(
+    activity_id: str = Body(..., embed=True),
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Withdraw the current user's volunteer registration for an activity"""
+    try:
+        activity_uuid = UUID(activity_id)
+        user_uuid = UUID(current_user.id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid ID format")
+
+    result = await withdraw_volunteer(db, activity_uuid, user_uuid)
+    if not result["withdrawn"]:
+        raise HTTPException(status_code=404, detail="No active registration for this activity")
 
     return {
-        "message": "Registration successful",
-        "volunteer_id": str(new_volunteer.id),
-        "status": new_volunteer.status
+        "message": "Withdrawal successful",
+        "volunteers_registered": result["volunteers_registered"]
     }
 
+
+@router.post("/admin/volunteers/reconcile-counts")
+async def reconcile_registration_counts(
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Recompute activities.volunteers_registered from volunteer registrations"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can reconcile volunteer counts"
+        )
+
+    updated = await reconcile_volunteer_counts(db)
+    return {"activities_updated": updated}
+
 @router.get("/admin/activities/{activity_id}/volunteers")
 async def get_activity_volunteers(
     activity_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    sort: str = Query("applied_at", pattern="^(applied_at|name|hours)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Comma separated, e.g. confirmed,pending"),
+    skills: Optional[str] = Query(None, description="Comma separated; volunteers with any of them"),
+    fields: Optional[str] = Query(None, description="Comma separated columns to return; all by default"),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_database)
 ):
-    """Get list of volunteers registered for an activity"""
+    """Page through volunteers registered for an activity"""
     if not is_admin_or_staff(current_user.role):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -118,26 +183,20 @@ async def get_activity_volunteers(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid Activity ID")
     
-    # Query VolunteerDB joined with UserDB
-    query = select(VolunteerDB, UserDB).join(UserDB, VolunteerDB.user_id == UserDB.id).where(
-        VolunteerDB.activity_id == activity_uuid
-    )
-    result = await db.execute(query)
-    rows = result.all()
-    
-    volunteers = []
-    for vol_rec, user_rec in rows:
-        volunteers.append({
-            "id": str(user_rec.id),
-            "name": user_rec.name,
-            "email": user_rec.email,
-            "role": vol_rec.role,
-            "status": vol_rec.status,
-            "applied_at": vol_rec.applied_at.isoformat() if vol_rec.applied_at else None,
-            "skills": vol_rec.skills_offered
-        })
-    
-    return volunteers
+    try:
+        return await list_activity_volunteers(
+            db,
+            activity_uuid,
+            sort=sort,
+            descending=order == "desc",
+            limit=limit,
+            cursor=cursor,
+            statuses=_split(status_filter),
+            skills=_split(skills),
+            fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/admin/activities/{activity_id}/form-responses")
@@ -185,126 +244,242 @@ def is_admin_or_staff(role: str) -> bool:
 @router.get("/admin/volunteers/by-skills")
 async def get_volunteers_by_skills(
     skills: str,
+    match: str = Query("any", pattern="^(any|all)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_database)
 ):
-    """Find volunteers with specific skills"""
+    """Find volunteers with specific skills, best matches first"""
     if not is_admin_or_staff(current_user.role):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admin or staff can access volunteer management"
         )
     
-    skill_list = [s.strip() for s in skills.split(",")]
-    
-    # Get all volunteers
-    result = await db.execute(select(UserDB).where(UserDB.role == "volunteer"))
-    all_volunteers = result.scalars().all()
-    
-    # Filter by skills in Python (since ARRAY contains is complex in SQLAlchemy)
-    volunteers = []
-    for vol in all_volunteers:
-        vol_skills = vol.skills or []
-        matching = [s for s in vol_skills if s in skill_list]
-        if matching:
-            volunteers.append({
-                "id": str(vol.id),
-                "name": vol.name,
-                "email": vol.email,
-                "phone": vol.phone_number,
-                "skills": vol_skills,
-                "matching_skills": matching,
-                "tier": vol.tier
-            })
+    skill_list = [s.strip() for s in skills.split(",") if s.strip()]
+    if not skill_list:
+        raise HTTPException(status_code=400, detail="No skills given")
     
-    return {
-        "requested_skills": skill_list,
-        "total_found": len(volunteers),
-        "volunteers": volunteers
-    }
+    try:
+        return await search_volunteers_by_skills(db, skill_list, limit=limit, cursor=cursor, match=match)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/admin/volunteers/skill-index")
+async def get_skill_index_stats(
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Size and memory use of the in-memory skill index"""
+    if not is_admin_or_staff(current_user.role):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    
+    return skill_index.stats()
+
+
+@router.post("/admin/volunteers/skill-index/check")
+async def check_skill_index(
+    repair: bool = False,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Compare the skill index with the database, rebuilding it if asked and out of sync"""
+    if not is_admin_or_staff(current_user.role):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    
+    return await skill_index.check_consistency(db, repair=repair)
 
 
 @router.get("/admin/volunteers/crisis-dashboard")
 async def get_crisis_dashboard(
-    days_ahead: int = 7,
+    days_ahead: int = Query(7, ge=1, le=90),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_database)
 ):
-    """Get activities with unmet volunteer quotas"""
+    """Get activities with unmet volunteer quotas, most urgent first"""
     if not is_admin_or_staff(current_user.role):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admin or staff can access crisis dashboard"
         )
     
+    return await crisis_snapshots.get(db, days_ahead)
+
+
+def _shift(activity: ActivityDB, shortage: int) -> dict:
+    """Activity fields used by services/matching.py and services/assignment.py"""
+    return {
+        "id": activity.id,
+        "title": activity.title,
+        "skills_required": activity.skills_required or [],
+        "activity_type": activity.activity_type,
+        "start_time": activity.start_time,
+        "end_time": activity.end_time,
+        "shortage": shortage
+    }
+
+
+@router.post("/admin/volunteers/match-batch")
+async def match_volunteers_batch(
+    days_ahead: int = Body(7, embed=True, ge=1, le=60),
+    limit: Optional[int] = Body(None, embed=True, ge=1, le=100),
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Suggest volunteers for every understaffed activity in the next `days_ahead` days"""
+    if not is_admin_or_staff(current_user.role):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    
     now = datetime.utcnow()
     future_date = now + timedelta(days=days_ahead)
+    shortage = ActivityDB.volunteers_needed - func.coalesce(ActivityDB.volunteers_registered, 0)
     
-    query = select(ActivityDB).where(
-        and_(
+    # Least filled first, then soonest, so the most urgent activities get first pick
+    result = await db.execute(
+        select(ActivityDB, shortage.label("shortage"))
+        .where(
             ActivityDB.start_time >= now,
             ActivityDB.start_time <= future_date,
-            ActivityDB.volunteers_needed > 0
+            shortage > 0
+        )
+        .order_by(
+            func.coalesce(ActivityDB.volunteers_registered, 0) * 1.0 / ActivityDB.volunteers_needed,
+            ActivityDB.start_time
         )
-    ).order_by(ActivityDB.start_time)
+    )
+    activities = [_shift(activity, missing) for activity, missing in result.all()]
     
-    result = await db.execute(query)
-    activities = result.scalars().all()
-    
-    crisis_items = []
-    for activity in activities:
-        volunteers_needed = activity.volunteers_needed or 0
-        volunteers_registered = activity.volunteers_registered or 0
-        shortage = max(0, volunteers_needed - volunteers_registered)
-        
-        fill_percentage = 0
-        if volunteers_needed > 0:
-            fill_percentage = int((volunteers_registered / volunteers_needed) * 100)
-        
-        status_label = "ok"
-        if fill_percentage < 50:
-            status_label = "critical"
-        elif fill_percentage < 100:
-            status_label = "warning"
-        
-        hours_until = (activity.start_time - now).total_seconds() / 3600 if activity.start_time else 0
-        
-        crisis_items.append({
-            "activity_id": str(activity.id),
-            "title": activity.title,
-            "start_time": activity.start_time.isoformat() if activity.start_time else None,
-            "hours_until": int(hours_until),
-            "location": activity.location,
-            "volunteers_needed": volunteers_needed,
-            "volunteers_registered": volunteers_registered,
-            "shortage": shortage,
-            "fill_percentage": fill_percentage,
-            "status": status_label,
-            "skills_required": activity.skills_required or [],
-            "needs_help": activity.needs_help
-        })
+    roster = await load_roster(db)
+    commitments = []
+    if activities:
+        window_start = min(a["start_time"] for a in activities)
+        window_end = max(a["end_time"] for a in activities)
+        commitments = await get_schedules_between(db, window_start, window_end)
     
-    # Sort by urgency
-    crisis_items.sort(key=lambda x: (
-        0 if x["status"] == "critical" else 1 if x["status"] == "warning" else 2,
-        x["hours_until"]
-    ))
+    # CPU-bound for large rosters; keep it off the event loop
+    plans = await asyncio.to_thread(suggest_for_activities, roster, activities, commitments, limit=limit)
+    
+    items = [
+        {
+            "activity_id": str(act["id"]),
+            "title": act["title"],
+            "start_time": act["start_time"].isoformat(),
+            "end_time": act["end_time"].isoformat(),
+            "skills_required": act["skills_required"],
+            "shortage": act["shortage"],
+            "unfilled": act["shortage"] - len(suggestions),
+            "suggestions": suggestions
+        }
+        for act, suggestions in zip(activities, plans)
+    ]
     
     return {
-        "total_activities": len(crisis_items),
-        "critical_count": len([i for i in crisis_items if i["status"] == "critical"]),
-        "warning_count": len([i for i in crisis_items if i["status"] == "warning"]),
-        "activities": crisis_items
+        "days_ahead": days_ahead,
+        "total_volunteers": len(roster),
+        "total_activities": len(items),
+        "total_suggested": sum(len(i["suggestions"]) for i in items),
+        "activities": items
     }
 
 
-@router.post("/admin/volunteers/generate-blast")
+@router.post("/admin/volunteers/assignment-plan")
+async def plan_volunteer_assignments(
+    week_of: Optional[datetime] = Body(None, embed=True),
+    pinned: List[PlanAssignment] = Body([], embed=True),
+    exclude: List[str] = Body([], embed=True),
+    require_skills: bool = Body(True, embed=True),
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """
+    Assign volunteers to fill every understaffed activity in the week of `week_of`.
+
+    To re-solve after a withdrawal, send the previous plan minus the withdrawn
+    assignment as `pinned` and the volunteer in `exclude`; only the vacated
+    seats are filled again.
+    """
+    if not is_admin_or_staff(current_user.role):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    
+    try:
+        pinned_pairs = [(UUID(p.volunteer_id), UUID(p.activity_id)) for p in pinned]
+        excluded = {UUID(user_id) for user_id in exclude}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid volunteer or activity ID")
+    
+    if week_of and week_of.tzinfo:
+        week_of = week_of.astimezone(timezone.utc).replace(tzinfo=None)
+    week_start, week_end = get_week_boundaries(week_of or datetime.utcnow())
+    shortage = ActivityDB.volunteers_needed - func.coalesce(ActivityDB.volunteers_registered, 0)
+    result = await db.execute(
+        select(ActivityDB, shortage.label("shortage"))
+        .where(
+            ActivityDB.start_time >= max(week_start, datetime.utcnow()),
+            ActivityDB.start_time <= week_end,
+            shortage > 0
+        )
+        .order_by(ActivityDB.start_time)
+    )
+    activities = [_shift(activity, missing) for activity, missing in result.all()]
+    
+    if pinned_pairs and activities:
+        # Pinned volunteers who have since registered are already counted in the shortage
+        registered = await db.execute(
+            select(VolunteerDB.user_id, VolunteerDB.activity_id).where(
+                VolunteerDB.activity_id.in_([a["id"] for a in activities]),
+                VolunteerDB.status != "withdrawn"
+            )
+        )
+        already = set(map(tuple, registered.all()))
+        pinned_pairs = [pair for pair in pinned_pairs if pair not in already]
+    
+    roster = await load_roster(db)
+    commitments = await get_schedules_between(db, week_start, week_end)
+    
+    started = time.perf_counter()
+    # Seconds of pure-Python CPU on a full roster; run it off the event loop
+    plan = await asyncio.to_thread(plan_assignments, roster, activities, commitments, pinned_pairs, excluded, require_skills)
+    solve_ms = round((time.perf_counter() - started) * 1000, 1)
+    
+    return {
+        "week_start": week_start.isoformat(),
+        "week_end": week_end.isoformat(),
+        "total_volunteers": len(roster),
+        "total_activities": len(activities),
+        "seats": plan["seats"],
+        "filled": plan["filled"],
+        "total_score": plan["total_score"],
+        "solve_ms": solve_ms,
+        "activities": [
+            {
+                "activity_id": str(act["id"]),
+                "title": act["title"],
+                "start_time": act["start_time"].isoformat(),
+                "end_time": act["end_time"].isoformat(),
+                "skills_required": act["skills_required"],
+                "shortage": act["shortage"],
+                "unfilled": unfilled,
+                "assignments": assigned
+            }
+            for act, assigned, unfilled in zip(activities, plan["assignments"], plan["unfilled"])
+        ]
+    }
+
+
+@router.post("/admin/volunteers/generate-blast", status_code=status.HTTP_202_ACCEPTED)
 async def generate_volunteer_blast(
     activity_id: str = Body(..., embed=True),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_database)
 ):
-    """Generate WhatsApp blast message for volunteer recruitment"""
+    """
+    Generate WhatsApp blast messages for every volunteer with a phone number.
+
+    Kept for older clients: it queues the same background job as
+    POST /admin/volunteers/blast-jobs without the skill and availability
+    filters. Poll the job and page through its results for the targets.
+    """
     if not is_admin_or_staff(current_user.role):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -316,50 +491,122 @@ async def generate_volunteer_blast(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid activity ID")
     
-    result = await db.execute(select(ActivityDB).where(ActivityDB.id == activity_uuid))
-    activity = result.scalar_one_or_none()
-    
+    activity = await db.get(ActivityDB, activity_uuid)
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
-    # Get all volunteers
-    vol_result = await db.execute(select(UserDB).where(UserDB.role == "volunteer"))
-    volunteers = vol_result.scalars().all()
+    job = await create_blast_job(db, activity, UUID(current_user.id), match_skills=False, only_available=False)
+    blast_runner.submit(job.id)
     
-    shortage = (activity.volunteers_needed or 0) - (activity.volunteers_registered or 0)
-    activity_date = activity.start_time.strftime("%A, %B %d at %I:%M %p") if activity.start_time else "TBA"
+    return {
+        **_blast_job(job),
+        "activity_title": activity.title,
+        "shortage": (activity.volunteers_needed or 0) - (activity.volunteers_registered or 0),
+        "message_template": job.message_template
+    }
+
+
+def _blast_job(job: BlastJobDB) -> dict:
+    total = job.total_candidates or 0
+    return {
+        "job_id": str(job.id),
+        "activity_id": str(job.activity_id),
+        "status": job.status,
+        "skills": job.skills or [],
+        "only_available": job.only_available,
+        "message_template": job.message_template,
+        "total_candidates": total,
+        "processed": job.processed or 0,
+        "progress": round((job.processed or 0) / total * 100, 1) if total else (100.0 if job.status == "completed" else 0.0),
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "heartbeat_at": job.heartbeat_at.isoformat() if job.heartbeat_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+async def _get_blast_job(db: AsyncSession, job_id: str) -> BlastJobDB:
+    try:
+        job_uuid = UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+    
+    job = await db.get(BlastJobDB, job_uuid)
+    if not job:
+        raise HTTPException(status_code=404, detail="Blast job not found")
+    return job
+
+
+@router.post("/admin/volunteers/blast-jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_volunteer_blast_job(
+    job_req: BlastJobCreate,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Start building a WhatsApp blast in the background; poll the job for progress"""
+    if not is_admin_or_staff(current_user.role):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin or staff can generate blast messages"
+        )
+    
+    try:
+        activity_uuid = UUID(job_req.activity_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid activity ID")
+    
+    activity = await db.get(ActivityDB, activity_uuid)
+    if not activity:
+        raise HTTPException(status_code=404, detail="Activity not found")
     
-    message_template = f"""Hi {{name}}! 👋
+    job = await create_blast_job(
+        db,
+        activity,
+        UUID(current_user.id),
+        match_skills=job_req.match_skills,
+        only_available=job_req.only_available
+    )
+    blast_runner.submit(job.id)
+    
+    return _blast_job(job)
 
-We need {shortage} more volunteer(s) for:
-📅 {activity.title}
-🕐 {activity_date}
-📍 {activity.location or 'TBA'}
 
-Would you be available to help? Your support makes a difference! 🙌
+@router.get("/admin/volunteers/blast-jobs/{job_id}")
+async def get_volunteer_blast_job(
+    job_id: str,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Status and progress of a blast job"""
+    if not is_admin_or_staff(current_user.role):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    
+    return _blast_job(await _get_blast_job(db, job_id))
+
 
-Reply YES to confirm."""
+@router.get("/admin/volunteers/blast-jobs/{job_id}/results")
+async def get_volunteer_blast_results(
+    job_id: str,
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Page through a blast job's messages; available while the job is still running"""
+    if not is_admin_or_staff(current_user.role):
+        raise HTTPException(status_code=403, detail="Forbidden")
     
-    blast_targets = []
-    for vol in volunteers:
-        phone = vol.phone_number or ""
-        if phone:
-            clean_phone = ''.join(filter(str.isdigit, phone))
-            personalized_msg = message_template.replace("{name}", vol.name or "there")
-            
-            blast_targets.append({
-                "volunteer_id": str(vol.id),
-                "name": vol.name,
-                "phone": phone,
-                "skills": vol.skills or [],
-                "whatsapp_link": f"https://wa.me/{clean_phone}?text={personalized_msg}"
-            })
+    job = await _get_blast_job(db, job_id)
+    page = await get_blast_results(db, job.id, after=cursor, limit=limit)
+    last_cursor = page.pop("last_cursor")
+    if page["next_cursor"] is None and job.status in ("queued", "running"):
+        # More results are still being written; poll again from here
+        page["next_cursor"] = last_cursor
     
     return {
-        "activity_id": str(activity.id),
-        "activity_title": activity.title,
-        "shortage": shortage,
-        "message_template": message_template,
-        "total_targets": len(blast_targets),
-        "targets": blast_targets
+        "job_id": str(job.id),
+        "status": job.status,
+        "processed": job.processed or 0,
+        **page
     }
@@ -0,0 +1,241 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import select, func, literal, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.user import UserDB, normalize_skill, normalize_skills
+from ..models.attendance import AttendanceDB
+from ..models.activity import ActivityDB
+
+
+@dataclass(frozen=True)
+class AchievementRule:
+    """
+    A threshold over the user's attendance.
+
+    `measure` is "events" (count check-ins) or "hours" (sum hours earned).
+    Only check-ins at activities of `activity_type` and/or requiring `skill`
+    count when those are set. Skills compare normalized (see normalize_skill),
+    the same way in Python and in SQL.
+    """
+    id: str
+    title: str
+    description: str
+    threshold: int
+    color: str
+    icon: str
+    measure: str = "events"
+    activity_type: Optional[str] = None
+    skill: Optional[str] = None
+
+    def matches(self, activity_type: Optional[str], skills: Iterable[str]) -> bool:
+        if self.activity_type and activity_type != self.activity_type:
+            return False
+        if self.skill and normalize_skill(self.skill) not in normalize_skills(skills):
+            return False
+        return True
+
+    def contribution(self, activity_type: Optional[str], skills: Iterable[str], hours: int) -> int:
+        """How much one check-in moves this rule's progress"""
+        if not self.matches(activity_type, skills):
+            return 0
+        return (hours or 0) if self.measure == "hours" else 1
+
+    def aggregate(self):
+        """SQL expression computing this rule's progress over attendance joined with activities"""
+        value = AttendanceDB.hours_earned if self.measure == "hours" else AttendanceDB.id
+        conditions = []
+        if self.activity_type:
+            conditions.append(ActivityDB.activity_type == self.activity_type)
+        if self.skill:
+            required = func.normalize_skills(ActivityDB.skills_required, type_=ARRAY(String))
+            conditions.append(literal(normalize_skill(self.skill), String) == any_(required))
+
+        agg = func.sum(value) if self.measure == "hours" else func.count(value)
+        if conditions:
+            agg = agg.filter(*conditions)
+        return func.coalesce(agg, 0)
+
+
+# Add, change or retire achievements here, then run the bulk re-evaluation
+# (POST /admin/users/achievements/reevaluate) to backfill progress.
+ACHIEVEMENT_RULES: Sequence[AchievementRule] = (
+    AchievementRule(
+        id="community-star",
+        title="Community Star",
+        description="Participate in community events",
+        threshold=10,
+        color="orange",
+        icon="star"
+    ),
+    AchievementRule(
+        id="green-warrior",
+        title="Green Warrior",
+        description="Join environment focused drives",
+        threshold=3,
+        color="green",
+        icon="leaf",
+        activity_type="volunteer"
+    ),
+    AchievementRule(
+        id="time-keeper",
+        title="Time Keeper",
+        description="Accumulate volunteer hours",
+        threshold=50,
+        color="blue",
+        icon="clock",
+        measure="hours"
+    ),
+    AchievementRule(
+        id="social-butterfly",
+        title="Social Butterfly",
+        description="Attend networking meetups",
+        threshold=10,
+        color="purple",
+        icon="users",
+        activity_type="meetup"
+    ),
+)
+
+
+def _entry(rule: AchievementRule, current: int, unlocked_at: Optional[str], stamp: bool = True) -> dict:
+    current = max(current, 0)
+    if current < rule.threshold:
+        unlocked_at = None
+    elif unlocked_at is None and stamp:
+        unlocked_at = datetime.utcnow().isoformat()
+
+    return {
+        "id": rule.id,
+        "title": rule.title,
+        "description": rule.description,
+        "current": current,
+        "max": rule.threshold,
+        "color": rule.color,
+        "icon": rule.icon,
+        "unlocked": current >= rule.threshold,
+        "unlocked_at": unlocked_at
+    }
+
+
+def present_achievements(stored: Optional[List[dict]]) -> List[dict]:
+    """
+    Stored progress laid over the current registry.
+
+    Rule text always comes from the registry, rules the user has no progress
+    for yet show zero and retired rules are hidden.
+    """
+    by_id = {a.get("id"): a for a in stored or [] if isinstance(a, dict)}
+    return [
+        _entry(rule, by_id.get(rule.id, {}).get("current", 0), by_id.get(rule.id, {}).get("unlocked_at"), stamp=False)
+        for rule in ACHIEVEMENT_RULES
+    ]
+
+
+def apply_attendance(
+    stored: Optional[List[dict]],
+    activity_type: Optional[str],
+    skills: Iterable[str],
+    hours: int,
+    sign: int = 1
+) -> List[dict]:
+    """Progress after one check-in (sign=1) or removed check-in (sign=-1)"""
+    skills = list(skills or [])
+    by_id = {a.get("id"): a for a in stored or [] if isinstance(a, dict)}
+    achievements = []
+    for rule in ACHIEVEMENT_RULES:
+        previous = by_id.get(rule.id, {})
+        current = previous.get("current", 0) + sign * rule.contribution(activity_type, skills, hours)
+        achievements.append(_entry(rule, current, previous.get("unlocked_at")))
+    return achievements
+
+
+_users = UserDB.__table__
+SAVE_ACHIEVEMENTS = (
+    _users.update()
+    .where(_users.c.id == bindparam("b_id"))
+    .values(achievements=bindparam("b_achievements"))
+)
+
+
+async def record_achievement_progress(
+    db: AsyncSession,
+    user_ids: Sequence[UUID],
+    activity_type: Optional[str],
+    skills: Iterable[str],
+    hours: int,
+    sign: int = 1
+):
+    """
+    Apply a check-in (or its removal) at one activity to each user's stored
+    achievements. Call inside the transaction that wrote the attendance rows;
+    those statements already hold the user row locks.
+    """
+    if not user_ids:
+        return
+
+    result = await db.execute(select(UserDB.id, UserDB.achievements).where(UserDB.id.in_(user_ids)))
+    await db.execute(SAVE_ACHIEVEMENTS, [
+        {"b_id": user_id, "b_achievements": apply_attendance(stored, activity_type, skills, hours, sign)}
+        for user_id, stored in result.all()
+    ])
+
+
+async def reevaluate_achievements(db: AsyncSession, batch_size: int = 500) -> dict:
+    """
+    Recompute every user's achievements from attendance after rules change.
+
+    Walks users in keyset batches, each batch computing all rules in one
+    grouped query and saving in one executemany, so memory stays constant.
+    """
+    scanned = updated = 0
+    after: Optional[UUID] = None
+
+    while True:
+        batch = select(UserDB.id).order_by(UserDB.id).limit(batch_size)
+        if after is not None:
+            batch = batch.where(UserDB.id > after)
+        batch = batch.subquery()
+
+        progress = (
+            select(batch.c.id, *[rule.aggregate().label(rule.id) for rule in ACHIEVEMENT_RULES])
+            .select_from(batch)
+            .outerjoin(AttendanceDB, AttendanceDB.user_id == batch.c.id)
+            .outerjoin(ActivityDB, ActivityDB.id == AttendanceDB.activity_id)
+            .group_by(batch.c.id)
+            .subquery()
+        )
+        query = (
+            select(UserDB.id, UserDB.achievements, *[progress.c[rule.id] for rule in ACHIEVEMENT_RULES])
+            .join(progress, progress.c.id == UserDB.id)
+            .order_by(UserDB.id)
+        )
+        rows = (await db.execute(query)).all()
+        if not rows:
+            break
+
+        changes = []
+        for row in rows:
+            by_id = {a.get("id"): a for a in row.achievements or [] if isinstance(a, dict)}
+            achievements = [
+                _entry(rule, int(row._mapping[progress.c[rule.id]]), by_id.get(rule.id, {}).get("unlocked_at"))
+                for rule in ACHIEVEMENT_RULES
+            ]
+            if achievements != row.achievements:
+                changes.append({"b_id": row.id, "b_achievements": achievements})
+
+        if changes:
+            await db.execute(SAVE_ACHIEVEMENTS, changes)
+        await db.commit()
+
+        scanned += len(rows)
+        updated += len(changes)
+        if len(rows) < batch_size:
+            break
+        after = rows[-1].id
+
+    return {"scanned": scanned, "updated": updated}
@@ -6,7 +6,7 @@ Combines Admin Copilot (formerly ai_service.py) and User Agent (formerly agent.p
 import os
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from uuid import UUID
 
 from google import genai
@@ -53,68 +53,91 @@ Summary (one sentence):"""
         return f"Error generating summary: {str(e)}"
 
 
-async def match_volunteers(activity_dict: Dict, volunteers: List[Dict]) -> List[Dict]:
-    """Analyze activity requirements and rank volunteers by suitability"""
-    if not volunteers:
-        return []
-    
+def build_rerank_prompt(activity_dict: Dict, candidates: List[Dict]) -> str:
     activity_title = activity_dict.get("title", "")
     skills_required = activity_dict.get("skills_required", [])
-    start_time = activity_dict.get("start_time", datetime.utcnow())
+    start_time = activity_dict.get("start_time") or datetime.utcnow()
     
     volunteer_profiles = []
-    for vol in volunteers:
-        profile = f"{vol.get('name', 'Unknown')} - Skills: {', '.join(vol.get('skills', []))}"
+    for i, vol in enumerate(candidates, start=1):
+        profile = f"{i}. {vol.get('name', 'Unknown')} - Skills: {', '.join(vol.get('skills', []))} - Local score: {vol.get('score')}"
         volunteer_profiles.append(profile)
     
     profiles_text = "\n".join(volunteer_profiles)
     
-    prompt = f"""You are a volunteer coordinator AI for MINDS activity hub.
+    return f"""You are a volunteer coordinator AI for MINDS activity hub.
 
 Activity: {activity_title}
 Required Skills: {', '.join(skills_required) if skills_required else 'None specified'}
 Date: {start_time.strftime('%A, %B %d at %I:%M %p')}
 
-Available Volunteers:
+Shortlisted Volunteers:
 {profiles_text}
 
-Rank these volunteers by suitability (1-100 confidence score). Return ONLY a JSON array with this format:
-[{{"name": "Volunteer Name", "score": 95, "reason": "Perfect match for required skills"}}]
+Rerank these volunteers by suitability (1-100 confidence score). Return ONLY a JSON array with this format:
+[{{"id": 1, "score": 95, "reason": "Perfect match for required skills"}}]
 
 JSON:"""
+
+
+def token_usage(response) -> Optional[Dict]:
+    """Prompt/response token counts reported by the model, if any"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": usage.prompt_token_count,
+        "response_tokens": usage.candidates_token_count,
+        "total_tokens": usage.total_token_count
+    }
+
+
+async def rerank_volunteers(activity_dict: Dict, candidates: List[Dict]) -> Tuple[List[Dict], bool, Optional[Dict]]:
+    """
+    Ask the model to reorder locally shortlisted candidates (services/matching.py).
+
+    Only the candidates are sent, so the prompt size is bounded by the
+    shortlist, not the roster. Returns the candidates in the model's order
+    with its score and reason, whether the model's order was used, and token
+    usage. On any failure the local ranking is returned unchanged, with the
+    usage of the model call if one was made.
+    """
+    if not candidates or not admin_client:
+        return candidates, False, None
+    
+    prompt = build_rerank_prompt(activity_dict, candidates)
     
+    usage = None
     try:
-        if not admin_client: return []
         response = admin_client.models.generate_content(
             model="gemini-3-flash-preview",
             contents=prompt
         )
+        usage = token_usage(response)
         
         response_text = response.text.strip()
         if response_text.startswith("```"):
             lines = response_text.split("\n")
             response_text = "\n".join(lines[1:-1])
         
-        matches = json.loads(response_text)
-        return matches
+        ranked = []
+        seen = set()
+        for item in json.loads(response_text):
+            index = int(item.get("id", 0)) - 1
+            if 0 <= index < len(candidates) and index not in seen:
+                seen.add(index)
+                ranked.append({
+                    **candidates[index],
+                    "local_score": candidates[index].get("score"),
+                    "score": item.get("score", candidates[index].get("score")),
+                    "reason": item.get("reason") or candidates[index].get("reason")
+                })
+        # Anything the model dropped keeps its local position at the end
+        ranked.extend(c for i, c in enumerate(candidates) if i not in seen)
+        return ranked, True, usage
     except Exception as e:
-        # Fallback: simple skill matching
-        results = []
-        for vol in volunteers:
-            vol_skills = set(vol.get("skills", []))
-            required_skills_set = set(skills_required)
-            matching_skills = vol_skills.intersection(required_skills_set)
-            
-            score = 50
-            if matching_skills:
-                score = min(100, 60 + len(matching_skills) * 20)
-            
-            results.append({
-                "name": vol.get("name"),
-                "score": score,
-                "reason": f"Matches {len(matching_skills)} required skill(s)" if matching_skills else "General volunteer"
-            })
-        return sorted(results, key=lambda x: x["score"], reverse=True)
+        print(f"[AI] Rerank failed, using local ranking: {e}")
+        return candidates, False, usage
 
 
 async def process_query(query: str, context: Dict) -> str:
@@ -300,7 +323,7 @@ AGENT_TOOLS = [
             ),
             types.FunctionDeclaration(
                 name="get_user_bookings",
-                description="Get the user's current bookings.",
+                description="Get the user's upcoming confirmed bookings (activities that have not started yet), soonest first.",
                 parameters=types.Schema(type=types.Type.OBJECT, properties={})
             )
         ]
@@ -386,9 +409,8 @@ async def book_activity(db: AsyncSession, user_id: str, user_tier: str, activity
     """Book an activity for the user."""
     from ..models.activity import ActivityDB
     from ..models.booking import BookingDB
-    # Assuming calendar logic will be imported or mocked if not present in services.ai
-    # For now, simplify or mock calendar link if function is missing in this file context
-    import urllib.parse
+    from .calendar import get_activity_google_link
+    from .schedule import find_conflicts, lock_user_schedule
     
     try:
         uuid_id = UUID(activity_id)
@@ -401,6 +423,12 @@ async def book_activity(db: AsyncSession, user_id: str, user_tier: str, activity
     if not activity:
         return {"success": False, "message": "Activity not found"}
     
+    await lock_user_schedule(db, UUID(user_id))
+    conflicts = await find_conflicts(db, UUID(user_id), activity.start_time, activity.end_time, exclude_activity_id=uuid_id)
+    if conflicts:
+        titles = ", ".join(c["title"] for c in conflicts)
+        return {"success": False, "message": f"'{activity.title}' overlaps with your existing schedule: {titles}"}
+    
     new_booking = BookingDB(
         user_id=UUID(user_id),
         activity_id=uuid_id,
@@ -411,17 +439,7 @@ async def book_activity(db: AsyncSession, user_id: str, user_tier: str, activity
     db.add(new_booking)
     await db.commit()
     
-    # Simple calendar link gen inline
-    text = urllib.parse.quote(activity.title or "Activity")
-    details = urllib.parse.quote(activity.description or "")
-    location = urllib.parse.quote(activity.location or "")
-    dates = ""
-    if activity.start_time:
-        start = activity.start_time.strftime("%Y%m%dT%H%M%S")
-        end = (activity.end_time or (activity.start_time + timedelta(hours=1))).strftime("%Y%m%dT%H%M%S")
-        dates = f"&dates={start}/{end}"
-        
-    calendar_link = f"https://www.google.com/calendar/render?action=TEMPLATE&text={text}&details={details}&location={location}{dates}"
+    calendar_link = get_activity_google_link(activity) if activity.start_time and activity.end_time else None
     
     return {
         "success": True,
@@ -433,32 +451,31 @@ async def book_activity(db: AsyncSession, user_id: str, user_tier: str, activity
 
 
 async def get_user_bookings(db: AsyncSession, user_id: str) -> List[dict]:
-    """Get user's current bookings."""
-    from ..models.booking import BookingDB
-    from ..models.activity import ActivityDB
+    """
+    Get the user's upcoming confirmed bookings, soonest first.
+
+    Activities that have already started are left out: the assistant uses
+    this to talk about what the user has coming up, not their history.
+    """
+    from .bookings import fetch_user_bookings
     
     try:
         user_uuid = UUID(user_id)
     except ValueError:
         return []
     
-    result = await db.execute(
-        select(BookingDB).where(BookingDB.user_id == user_uuid, BookingDB.status == "confirmed").limit(10)
-    )
-    bookings = result.scalars().all()
+    rows, _ = await fetch_user_bookings(db, user_uuid, scope="upcoming", limit=10, statuses=("confirmed",))
     
-    booking_list = []
-    for booking in bookings:
-        act_result = await db.execute(select(ActivityDB).where(ActivityDB.id == booking.activity_id))
-        activity = act_result.scalar_one_or_none()
-        booking_list.append({
+    return [
+        {
             "booking_id": str(booking.id),
-            "activity_title": activity.title if activity else "Unknown",
-            "date": activity.start_time.strftime("%Y-%m-%d %H:%M") if activity and activity.start_time else "Unknown",
-            "location": activity.location if activity else "TBD",
+            "activity_title": activity.title,
+            "date": activity.start_time.strftime("%Y-%m-%d %H:%M") if activity.start_time else "Unknown",
+            "location": activity.location or "TBD",
             "status": booking.status
-        })
-    return booking_list
+        }
+        for booking, activity in rows
+    ]
 
 
 async def execute_tool(tool_name: str, args: dict, db: AsyncSession, user_id: str, user_tier: str) -> Any:
@@ -0,0 +1,301 @@
+"""
+Volunteer-to-shift assignment as a min-cost max-flow problem.
+
+    source -> volunteer           capacity: shifts left under their tier's weekly limit
+    volunteer -> (volunteer, slot) capacity 1
+    (volunteer, slot) -> shift     capacity 1, cost 100 - match score
+    shift -> sink                  capacity: the shift's shortage
+
+A slot is a group of shifts chained together by overlapping times, so a
+volunteer takes at most one shift per slot and never two overlapping shifts.
+This is conservative: of 9-12, 11-14 and 13-16 only one can be taken, even
+though the first and last don't overlap. Seats left open are retried in
+further passes with earlier results pinned, where only real overlaps block.
+
+The flow fills as many seats as possible and, among those plans, maximizes
+the total match score from services/matching.py. Each shift only considers
+its best candidates (CANDIDATES_PER_SEAT per seat), which keeps the network
+small enough to solve thousands of volunteers x hundreds of shifts in a
+couple of seconds.
+"""
+
+import heapq
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from ..models.user import normalize_skills
+from .matching import Roster, commitment_conflicts, match_item, score_matrix, top_indices
+from .tier import TIER_LIMITS
+
+CANDIDATES_PER_SEAT = 4
+MIN_CANDIDATES = 20
+MAX_COST = 100  # scores are in [0, 100]
+MAX_PASSES = 3
+
+WEEKLY_LIMITS = {tier.value: limit for tier, limit in TIER_LIMITS.items()}
+
+
+class MinCostFlow:
+    """
+    Primal-dual min-cost flow on integer costs.
+
+    Each phase runs Dijkstra on reduced costs to update the node potentials,
+    then pushes a blocking flow along every shortest path at once, so the
+    number of phases is bounded by the number of distinct path costs rather
+    than by the total flow.
+    """
+
+    def __init__(self, nodes: int = 0):
+        self.graph: List[List[list]] = [[] for _ in range(nodes)]
+
+    def add_node(self) -> int:
+        self.graph.append([])
+        return len(self.graph) - 1
+
+    def add_edge(self, u: int, v: int, capacity: int, cost: int) -> Tuple[int, int]:
+        """Returns (u, index) of the edge, to read its remaining capacity after solving"""
+        self.graph[u].append([v, capacity, cost, len(self.graph[v])])
+        self.graph[v].append([u, 0, -cost, len(self.graph[u]) - 1])
+        return u, len(self.graph[u]) - 1
+
+    def residual(self, edge: Tuple[int, int]) -> int:
+        u, i = edge
+        return self.graph[u][i][1]
+
+    def _shortest_paths(self, s: int, potential: List[int]) -> List[Optional[int]]:
+        graph = self.graph
+        dist: List[Optional[int]] = [None] * len(graph)
+        dist[s] = 0
+        heap = [(0, s)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            base = d + potential[u]
+            for v, capacity, cost, _ in graph[u]:
+                if capacity > 0:
+                    nd = base + cost - potential[v]
+                    dv = dist[v]
+                    if dv is None or nd < dv:
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, v))
+        return dist
+
+    def _blocking_flow(self, s: int, t: int, potential: List[int]) -> int:
+        """Push flow along zero reduced cost edges (Dinic on the admissible graph)"""
+        graph = self.graph
+
+        level = [-1] * len(graph)
+        level[s] = 0
+        queue = deque([s])
+        while queue:
+            u = queue.popleft()
+            pu = potential[u]
+            for v, capacity, cost, _ in graph[u]:
+                if level[v] < 0 and capacity > 0 and cost + pu == potential[v]:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        if level[t] < 0:
+            return 0
+
+        cursor = [0] * len(graph)
+        pushed = 0
+        path: List[list] = []
+        u = s
+        while True:
+            if u == t:
+                # Every edge out of a volunteer's slot has capacity 1, so this is usually 1
+                amount = min(edge[1] for edge in path)
+                for edge in path:
+                    edge[1] -= amount
+                    graph[edge[0]][edge[3]][1] += amount
+                pushed += amount
+                path.clear()
+                u = s
+                continue
+
+            edges = graph[u]
+            i = cursor[u]
+            next_level = level[u] + 1
+            pu = potential[u]
+            while i < len(edges):
+                edge = edges[i]
+                v = edge[0]
+                if level[v] == next_level and edge[1] > 0 and edge[2] + pu == potential[v]:
+                    break
+                i += 1
+            cursor[u] = i
+            if i == len(edges):
+                # Dead end: never come back here in this phase
+                if u == s:
+                    return pushed
+                level[u] = -1
+                edge = path.pop()
+                u = graph[edge[0]][edge[3]][0]
+                cursor[u] += 1
+                continue
+
+            path.append(edges[i])
+            u = edges[i][0]
+
+    def solve(self, s: int, t: int) -> Tuple[int, int]:
+        """Maximum flow from s to t at minimum cost; returns (flow, cost)"""
+        potential = [0] * len(self.graph)
+        flow = cost = 0
+        while True:
+            dist = self._shortest_paths(s, potential)
+            if dist[t] is None:
+                return flow, cost
+            for v, d in enumerate(dist):
+                if d is not None:
+                    potential[v] += d
+            pushed = self._blocking_flow(s, t, potential)
+            flow += pushed
+            cost += pushed * (potential[t] - potential[s])
+
+
+def overlap_slots(activities: Sequence[Dict]) -> List[int]:
+    """Slot number of each activity; activities chained by overlapping times share a slot"""
+    order = sorted(range(len(activities)), key=lambda j: activities[j]["start_time"])
+    slots = [0] * len(activities)
+    slot, slot_end = -1, None
+    for j in order:
+        if slot_end is None or activities[j]["start_time"] >= slot_end:
+            slot += 1
+            slot_end = activities[j]["end_time"]
+        else:
+            slot_end = max(slot_end, activities[j]["end_time"])
+        slots[j] = slot
+    return slots
+
+
+def weekly_capacity(tier: str, committed: int, slots: int) -> int:
+    limit = WEEKLY_LIMITS.get(tier)
+    return slots if limit is None else max(0, min(slots, limit - committed))
+
+
+def _solve_pass(
+    roster: Roster,
+    scores: np.ndarray,
+    eligible: np.ndarray,
+    seats: List[int],
+    committed: np.ndarray,
+    slots: List[int]
+) -> List[Tuple[int, int]]:
+    """One min-cost flow over each shift's best eligible candidates; returns (volunteer, shift) pairs"""
+    slot_count = max(slots) + 1 if slots else 0
+    capacity = [weekly_capacity(tier, int(c), slot_count) for tier, c in zip(roster.tiers, committed)]
+    eligible = eligible & (np.array(capacity) > 0)[:, None]
+
+    source, sink = 0, 1
+    network = MinCostFlow(2 + len(seats))
+
+    volunteer_nodes: Dict[int, int] = {}
+    slot_nodes: Dict[Tuple[int, int], int] = {}
+    assignment_edges = []
+    for j, wanted in enumerate(seats):
+        if not wanted:
+            continue
+        network.add_edge(2 + j, sink, wanted, 0)
+        candidates = top_indices(scores[:, j], max(wanted * CANDIDATES_PER_SEAT, MIN_CANDIDATES), eligible[:, j])
+        for i in candidates.tolist():
+            if i not in volunteer_nodes:
+                volunteer_nodes[i] = network.add_node()
+                network.add_edge(source, volunteer_nodes[i], capacity[i], 0)
+            key = (i, slots[j])
+            if key not in slot_nodes:
+                slot_nodes[key] = network.add_node()
+                network.add_edge(volunteer_nodes[i], slot_nodes[key], 1, 0)
+            cost = MAX_COST - int(round(float(scores[i, j])))
+            assignment_edges.append((i, j, network.add_edge(slot_nodes[key], 2 + j, 1, cost)))
+
+    network.solve(source, sink)
+    return [(i, j) for i, j, edge in assignment_edges if network.residual(edge) == 0]
+
+
+def plan_assignments(
+    roster: Roster,
+    activities: Sequence[Dict],
+    commitments: Iterable = (),
+    pinned: Sequence[Tuple[UUID, UUID]] = (),
+    excluded: Set[UUID] = frozenset(),
+    require_skills: bool = True
+) -> Dict:
+    """
+    Assign volunteers to `activities` (dicts with id, start_time, end_time,
+    skills_required, activity_type and shortage).
+
+    `commitments` are (user_id, start_time, end_time) rows of existing
+    bookings and shifts in the planning week; they block overlapping shifts
+    and count towards tier limits. `pinned` (user_id, activity_id) pairs are
+    kept as they are, which is how a plan is re-solved incrementally: when
+    someone withdraws, pin the rest of the previous plan and exclude them,
+    so only the vacated seats are filled again. With `require_skills`,
+    volunteers only fill shifts they have at least one required skill for.
+
+    Seats left open by a pass, because of slot grouping or because every
+    pruned candidate was used elsewhere, get up to MAX_PASSES - 1 more
+    passes with the earlier results pinned and fresh candidates.
+    """
+    activity_index = {act["id"]: j for j, act in enumerate(activities)}
+    volunteer_index = {user_id: i for i, user_id in enumerate(roster.ids)}
+
+    scores = score_matrix(roster, activities)
+    allowed = np.ones(scores.shape, dtype=bool)
+    for user_id in excluded:
+        if user_id in volunteer_index:
+            allowed[volunteer_index[user_id]] = False
+    if require_skills:
+        has_skill = roster.matrix > 0
+        for j, act in enumerate(activities):
+            wanted_skills = normalize_skills(act.get("skills_required"))
+            if wanted_skills:
+                cols = [roster.vocabulary[s] for s in wanted_skills if s in roster.vocabulary]
+                allowed[:, j] &= has_skill[:, cols].any(axis=1)
+
+    commitments = list(commitments)
+    committed = np.zeros(len(roster), dtype=np.int64)
+    for user_id, _, _ in commitments:
+        i = volunteer_index.get(user_id)
+        if i is not None:
+            committed[i] += 1
+
+    seats = [max(0, act.get("shortage") or 0) for act in activities]
+    slots = overlap_slots(activities)
+    assigned: List[List[Dict]] = [[] for _ in activities]
+
+    def take(i: int, j: int, is_pinned: bool):
+        seats[j] = max(0, seats[j] - 1)
+        committed[i] += 1
+        commitments.append((roster.ids[i], activities[j]["start_time"], activities[j]["end_time"]))
+        assigned[j].append({**match_item(roster, i, scores[i, j], activities[j]), "pinned": is_pinned})
+
+    for user_id, activity_id in pinned:
+        if user_id in volunteer_index and activity_id in activity_index:
+            take(volunteer_index[user_id], activity_index[activity_id], True)
+    open_seats = sum(seats)
+
+    for _ in range(MAX_PASSES):
+        if not any(seats):
+            break
+        eligible = allowed & ~commitment_conflicts(roster, activities, commitments)
+        found = _solve_pass(roster, scores, eligible, seats, committed, slots)
+        if not found:
+            break
+        for i, j in found:
+            take(i, j, False)
+
+    for items in assigned:
+        items.sort(key=lambda item: -item["score"])
+    new_items = [item for items in assigned for item in items if not item["pinned"]]
+
+    return {
+        "seats": open_seats,
+        "filled": len(new_items),
+        "total_score": round(sum(item["score"] for item in new_items), 1),
+        "assignments": assigned,
+        "unfilled": seats
+    }
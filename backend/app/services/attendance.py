@@ -0,0 +1,424 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, text, func, cast, String
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import async_session_maker
+from ..models.attendance import AttendanceDB
+from .achievements import record_achievement_progress
+from .pubsub import attendance_broker
+
+# Hours credited for an activity: its whole-hour duration, or 2 if shorter than an hour
+HOURS_EARNED_SQL = "COALESCE(NULLIF(TRUNC(EXTRACT(EPOCH FROM (a.end_time - a.start_time)) / 3600)::int, 0), 2)"
+
+# Applies one attendance row (`ins`/`del` joined with `act`) to the user's
+# stored stats. Used with sign "+" on check-in and "-" on removal so the
+# profile counters change in the same statement as the attendance table.
+USER_STATS_DELTA_SQL = """
+        total_events = GREATEST(COALESCE(u.total_events, 0) {sign} 1, 0),
+        volunteer_hours = GREATEST(COALESCE(u.volunteer_hours, 0) {sign} COALESCE(hours_earned, 0), 0),
+        volunteer_count = GREATEST(COALESCE(u.volunteer_count, 0) {sign} CASE WHEN act.activity_type = 'volunteer' THEN 1 ELSE 0 END, 0),
+        meetups_count = GREATEST(COALESCE(u.meetups_count, 0) {sign} CASE WHEN act.activity_type = 'meetup' THEN 1 ELSE 0 END, 0)"""
+
+# Looks up the activity and user, inserts the attendance row and bumps
+# activities.attended_count and the user's stats in one round-trip (achievement
+# progress follows in the same transaction, see services/achievements.py). The
+# unique constraint on (activity_id, user_id) makes concurrent scans of the
+# same person a no-op.
+MARK_ATTENDANCE = text(f"""
+WITH act AS (
+    SELECT a.id, a.activity_type, a.skills_required, {HOURS_EARNED_SQL} AS hours
+    FROM activities a
+    WHERE a.id = CAST(:activity_id AS uuid)
+),
+usr AS (
+    SELECT u.id, u.name FROM users u WHERE u.id = CAST(:user_id AS uuid)
+),
+ins AS (
+    INSERT INTO attendance (id, user_id, activity_id, check_in_time, verified_by, hours_earned)
+    SELECT gen_random_uuid(), usr.id, act.id, CAST(:check_in_time AS timestamp), CAST(:verified_by AS uuid), act.hours
+    FROM act, usr
+    ON CONFLICT (activity_id, user_id) DO NOTHING
+    RETURNING hours_earned, check_in_time
+),
+cnt AS (
+    UPDATE activities
+    SET attended_count = COALESCE(attended_count, 0) + 1
+    WHERE id = CAST(:activity_id AS uuid) AND EXISTS (SELECT 1 FROM ins)
+    RETURNING attended_count
+),
+stats AS (
+    UPDATE users u
+    SET {USER_STATS_DELTA_SQL.format(sign='+')}
+    FROM ins, act
+    WHERE u.id = CAST(:user_id AS uuid)
+)
+SELECT
+    EXISTS (SELECT 1 FROM act) AS activity_found,
+    EXISTS (SELECT 1 FROM usr) AS user_found,
+    (SELECT name FROM usr) AS user_name,
+    (SELECT activity_type FROM act) AS activity_type,
+    (SELECT skills_required FROM act) AS skills_required,
+    (SELECT hours_earned FROM ins) AS hours_earned,
+    (SELECT check_in_time FROM ins) AS check_in_time,
+    (SELECT attended_count FROM cnt) AS attended_count
+""")
+
+
+async def attendee_ids(db: AsyncSession, activity_ids: Iterable[UUID]) -> Dict[UUID, List[str]]:
+    """Checked-in user ids per activity, in check-in order, from one grouped query"""
+    activity_ids = list(activity_ids)
+    if not activity_ids:
+        return {}
+    result = await db.execute(
+        select(
+            AttendanceDB.activity_id,
+            func.array_agg(aggregate_order_by(cast(AttendanceDB.user_id, String), AttendanceDB.check_in_time))
+        )
+        .where(AttendanceDB.activity_id.in_(activity_ids))
+        .group_by(AttendanceDB.activity_id)
+    )
+    return dict(result.all())
+
+
+def publish_check_ins(activity_id: UUID, attendees: List[dict], total_attended: Optional[int]):
+    """Push a check-in delta to live attendance streams of the activity."""
+    attendance_broker.publish(activity_id, {
+        "type": "check_in",
+        "activity_id": str(activity_id),
+        "attendees": attendees,
+        "total_attended": total_attended
+    })
+
+
+async def record_attendance(
+    db: AsyncSession,
+    activity_id: UUID,
+    user_id: UUID,
+    verified_by: Optional[UUID] = None,
+    check_in_time: Optional[datetime] = None
+) -> dict:
+    """
+    Record a single check-in and commit.
+
+    `already_attended` is True when the activity and user exist but the user
+    was checked in before; `hours_earned` is only set for new check-ins.
+    """
+    result = await db.execute(MARK_ATTENDANCE, {
+        "activity_id": activity_id,
+        "user_id": user_id,
+        "verified_by": verified_by,
+        "check_in_time": check_in_time or datetime.utcnow()
+    })
+    row = result.one()
+    inserted = row.hours_earned is not None
+    if inserted:
+        await record_achievement_progress(db, [user_id], row.activity_type, row.skills_required, row.hours_earned)
+    await db.commit()
+
+    if inserted:
+        publish_check_ins(activity_id, [{
+            "user_id": str(user_id),
+            "name": row.user_name,
+            "check_in_time": row.check_in_time.isoformat(),
+            "hours_earned": row.hours_earned
+        }], row.attended_count)
+
+    return {
+        "activity_found": row.activity_found,
+        "user_found": row.user_found,
+        "already_attended": row.activity_found and row.user_found and not inserted,
+        "hours_earned": row.hours_earned,
+        "check_in_time": row.check_in_time,
+        "attended_count": row.attended_count
+    }
+
+
+# Reverse of MARK_ATTENDANCE: deletes the check-in and takes it back out of
+# activities.attended_count and the user's stats.
+UNMARK_ATTENDANCE = text(f"""
+WITH act AS (
+    SELECT a.id, a.activity_type, a.skills_required
+    FROM activities a
+    WHERE a.id = CAST(:activity_id AS uuid)
+),
+del AS (
+    DELETE FROM attendance
+    WHERE activity_id = CAST(:activity_id AS uuid) AND user_id = CAST(:user_id AS uuid)
+    RETURNING user_id, hours_earned
+),
+cnt AS (
+    UPDATE activities
+    SET attended_count = GREATEST(COALESCE(attended_count, 0) - 1, 0)
+    WHERE id = CAST(:activity_id AS uuid) AND EXISTS (SELECT 1 FROM del)
+    RETURNING attended_count
+),
+stats AS (
+    UPDATE users u
+    SET {USER_STATS_DELTA_SQL.format(sign='-')}
+    FROM del, act
+    WHERE u.id = del.user_id
+)
+SELECT
+    EXISTS (SELECT 1 FROM act) AS activity_found,
+    EXISTS (SELECT 1 FROM del) AS removed,
+    (SELECT activity_type FROM act) AS activity_type,
+    (SELECT skills_required FROM act) AS skills_required,
+    (SELECT hours_earned FROM del) AS hours_earned,
+    (SELECT attended_count FROM cnt) AS attended_count
+""")
+
+
+# Deletes every check-in at an activity that is about to be deleted and takes
+# them back out of the attendees' stats. The attendance FK would cascade
+# anyway, but past the counters.
+UNMARK_ACTIVITY_ATTENDANCE = text(f"""
+WITH act AS (
+    SELECT a.id, a.activity_type
+    FROM activities a
+    WHERE a.id = CAST(:activity_id AS uuid)
+),
+del AS (
+    DELETE FROM attendance
+    WHERE activity_id = CAST(:activity_id AS uuid)
+    RETURNING user_id, hours_earned
+),
+stats AS (
+    UPDATE users u
+    SET {USER_STATS_DELTA_SQL.format(sign='-')}
+    FROM del, act
+    WHERE u.id = del.user_id
+)
+SELECT user_id, hours_earned FROM del
+""")
+
+
+async def remove_activity_attendance(db: AsyncSession, activity) -> int:
+    """
+    Remove all check-ins at `activity` from the attendees' stats and
+    achievements ahead of deleting it. Doesn't commit, so the caller's delete
+    lands in the same transaction. Returns how many check-ins were removed.
+    """
+    result = await db.execute(UNMARK_ACTIVITY_ATTENDANCE, {"activity_id": activity.id})
+    by_hours: Dict[int, List[UUID]] = defaultdict(list)
+    for user_id, hours_earned in result.all():
+        by_hours[hours_earned or 0].append(user_id)
+
+    for hours, user_ids in by_hours.items():
+        await record_achievement_progress(
+            db, user_ids, activity.activity_type, activity.skills_required or [], hours, sign=-1
+        )
+    return sum(len(user_ids) for user_ids in by_hours.values())
+
+
+async def remove_attendance(db: AsyncSession, activity_id: UUID, user_id: UUID) -> dict:
+    """Delete a check-in and commit. `removed` is False if there was none."""
+    result = await db.execute(UNMARK_ATTENDANCE, {"activity_id": activity_id, "user_id": user_id})
+    row = result.one()
+    if row.removed:
+        await record_achievement_progress(
+            db, [user_id], row.activity_type, row.skills_required, row.hours_earned, sign=-1
+        )
+    await db.commit()
+
+    if row.removed:
+        attendance_broker.publish(activity_id, {
+            "type": "check_out",
+            "activity_id": str(activity_id),
+            "user_id": str(user_id),
+            "total_attended": row.attended_count
+        })
+
+    return {
+        "activity_found": row.activity_found,
+        "removed": row.removed,
+        "attended_count": row.attended_count
+    }
+
+
+# Bulk variant of MARK_ATTENDANCE for replayed scanner queues. Scans arrive as
+# parallel arrays and are inserted with a single INSERT ... SELECT; unknown
+# users are filtered by the join and repeats by the unique constraint.
+MARK_ATTENDANCE_BULK = text(f"""
+WITH act AS (
+    SELECT a.id, a.activity_type, a.skills_required, {HOURS_EARNED_SQL} AS hours
+    FROM activities a
+    WHERE a.id = CAST(:activity_id AS uuid)
+),
+scans AS (
+    SELECT s.user_id, s.scanned_at
+    FROM unnest(CAST(:user_ids AS uuid[]), CAST(:scanned_at AS timestamp[])) AS s(user_id, scanned_at)
+),
+known AS (
+    SELECT scans.user_id, scans.scanned_at
+    FROM scans JOIN users u ON u.id = scans.user_id
+),
+ins AS (
+    INSERT INTO attendance (id, user_id, activity_id, check_in_time, verified_by, hours_earned)
+    SELECT gen_random_uuid(), known.user_id, act.id, known.scanned_at, CAST(:verified_by AS uuid), act.hours
+    FROM act, known
+    ON CONFLICT (activity_id, user_id) DO NOTHING
+    RETURNING user_id, check_in_time, hours_earned
+),
+cnt AS (
+    UPDATE activities
+    SET attended_count = COALESCE(attended_count, 0) + (SELECT COUNT(*) FROM ins)
+    WHERE id = CAST(:activity_id AS uuid) AND EXISTS (SELECT 1 FROM ins)
+    RETURNING attended_count
+),
+stats AS (
+    UPDATE users u
+    SET {USER_STATS_DELTA_SQL.format(sign='+')}
+    FROM ins, act
+    WHERE u.id = ins.user_id
+)
+SELECT
+    EXISTS (SELECT 1 FROM act) AS activity_found,
+    (SELECT activity_type FROM act) AS activity_type,
+    (SELECT skills_required FROM act) AS skills_required,
+    (SELECT hours FROM act) AS hours_earned,
+    (SELECT attended_count FROM cnt) AS attended_count,
+    COALESCE((SELECT array_agg(user_id) FROM known), '{{}}') AS known_ids,
+    COALESCE((SELECT array_agg(user_id ORDER BY user_id) FROM ins), '{{}}') AS inserted_ids,
+    COALESCE((SELECT array_agg(u.name ORDER BY ins.user_id) FROM ins JOIN users u ON u.id = ins.user_id), '{{}}') AS inserted_names,
+    COALESCE((SELECT array_agg(check_in_time ORDER BY user_id) FROM ins), '{{}}') AS inserted_times
+""")
+
+
+async def record_attendance_bulk(
+    db: AsyncSession,
+    activity_id: UUID,
+    scans: List[Tuple[UUID, datetime]],
+    verified_by: Optional[UUID] = None
+) -> dict:
+    """
+    Record many check-ins for one activity with a single statement and commit.
+
+    `scans` must hold at most one entry per user. Returns the sets of users
+    that exist (`known`) and that were newly checked in (`inserted`).
+    """
+    result = await db.execute(MARK_ATTENDANCE_BULK, {
+        "activity_id": activity_id,
+        "user_ids": [user_id for user_id, _ in scans],
+        "scanned_at": [scanned_at for _, scanned_at in scans],
+        "verified_by": verified_by
+    })
+    row = result.one()
+    await record_achievement_progress(db, row.inserted_ids, row.activity_type, row.skills_required, row.hours_earned)
+    await db.commit()
+
+    if row.inserted_ids:
+        publish_check_ins(activity_id, [
+            {
+                "user_id": str(user_id),
+                "name": name,
+                "check_in_time": check_in_time.isoformat(),
+                "hours_earned": row.hours_earned
+            }
+            for user_id, name, check_in_time in zip(row.inserted_ids, row.inserted_names, row.inserted_times)
+        ], row.attended_count)
+
+    return {
+        "activity_found": row.activity_found,
+        "hours_earned": row.hours_earned,
+        "attended_count": row.attended_count,
+        "known": set(row.known_ids),
+        "inserted": set(row.inserted_ids)
+    }
+
+
+class AttendanceBatchWriter:
+    """
+    Coalesces self check-ins into bulk inserts.
+
+    Requests arriving within `max_delay` seconds of each other (up to
+    `max_batch`) are grouped per activity and written with
+    MARK_ATTENDANCE_BULK, so an arrival spike costs a handful of statements
+    instead of one transaction per person.
+    """
+
+    def __init__(self, max_batch: int = 500, max_delay: float = 0.05):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, activity_id: UUID, user_id: UUID) -> dict:
+        """Queue a check-in and wait for the batch containing it to be written."""
+        if self._task is None:
+            raise RuntimeError("Attendance batch writer is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((activity_id, user_id, datetime.utcnow(), future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                print(f"[ATTENDANCE] Batch write failed: {e}")
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _flush(self, batch: list):
+        by_activity = defaultdict(dict)  # activity_id -> user_id -> (scanned_at, [futures])
+        for activity_id, user_id, scanned_at, future in batch:
+            entry = by_activity[activity_id].setdefault(user_id, (scanned_at, []))
+            entry[1].append(future)
+
+        async with async_session_maker() as session:
+            for activity_id, users in by_activity.items():
+                scans = [(user_id, scanned_at) for user_id, (scanned_at, _) in users.items()]
+                outcome = await record_attendance_bulk(session, activity_id, scans)
+
+                for user_id, (_, futures) in users.items():
+                    if not outcome["activity_found"]:
+                        result = {"status": "activity_not_found"}
+                    elif user_id in outcome["inserted"]:
+                        result = {"status": "checked_in", "hours_earned": outcome["hours_earned"]}
+                    elif user_id in outcome["known"]:
+                        result = {"status": "already_attended"}
+                    else:
+                        result = {"status": "unknown_user"}
+
+                    for future in futures:
+                        if not future.done():
+                            future.set_result(result)
+
+
+checkin_writer = AttendanceBatchWriter()
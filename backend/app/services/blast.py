@@ -0,0 +1,307 @@
+"""
+Background WhatsApp blasts.
+
+A job streams matching volunteers from a server-side cursor in batches of
+BATCH_SIZE and writes one personalized message per volunteer to
+blast_results, committing progress after each batch. Volunteers are
+prefiltered in SQL: a phone number, the activity's skills (looked up in the
+skill index, or the GIN index on skills_normalized until it is loaded) and
+no overlapping booking or shift. Memory stays flat
+however large the roster is, and the request that creates the job returns
+immediately.
+
+Jobs run one at a time per process. A job is claimed with a conditional
+UPDATE, so with several workers each job still runs once. A running job
+bumps heartbeat_at with every batch; every worker periodically requeues jobs
+whose heartbeat is older than STALE_AFTER, and picks up queued jobs nobody
+is working on. Each claim bumps `attempt`, and a worker's writes only apply
+while it holds the latest attempt, so a worker that was merely slow can't
+write over a job another worker took over.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from urllib.parse import quote
+from uuid import UUID
+
+from sqlalchemy import select, update, delete, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import async_session_maker
+from ..models.activity import ActivityDB
+from ..models.blast import BlastJobDB, BlastResultDB
+from ..models.user import UserDB, normalize_skills
+from .schedule import busy_users_query
+from .skill_index import VOLUNTEER_ROLE, has_any_skill
+
+BATCH_SIZE = 1000
+# A running job without a heartbeat for this long is assumed to have died with its process
+STALE_AFTER = timedelta(minutes=2)
+# How often each worker looks for stale and unclaimed jobs
+RECOVER_INTERVAL_SECONDS = 30
+
+
+class _ClaimLost(Exception):
+    """The job was requeued and claimed again while this worker was running it"""
+
+
+def build_message_template(activity: ActivityDB) -> str:
+    shortage = (activity.volunteers_needed or 0) - (activity.volunteers_registered or 0)
+    activity_date = activity.start_time.strftime("%A, %B %d at %I:%M %p") if activity.start_time else "TBA"
+
+    return f"""Hi {{name}}! 👋
+
+We need {shortage} more volunteer(s) for:
+📅 {activity.title}
+🕐 {activity_date}
+📍 {activity.location or 'TBA'}
+
+Would you be available to help? Your support makes a difference! 🙌
+
+Reply YES to confirm."""
+
+
+def whatsapp_link(phone: str, message: str) -> Optional[str]:
+    """wa.me click-to-chat link with the message URL-encoded, or None without a usable number"""
+    digits = "".join(filter(str.isdigit, phone or ""))
+    if not digits:
+        return None
+    return f"https://wa.me/{digits}?text={quote(message, safe='')}"
+
+
+def candidates_query(activity: ActivityDB, skills: list, only_available: bool):
+    query = select(UserDB.id, UserDB.name, UserDB.phone_number, UserDB.skills).where(
+        UserDB.role == VOLUNTEER_ROLE,
+        UserDB.phone_number.isnot(None),
+        UserDB.phone_number != ""
+    )
+    if skills:
+        query = query.where(has_any_skill(skills))
+    if only_available:
+        query = query.where(UserDB.id.not_in(busy_users_query(activity.start_time, activity.end_time)))
+    return query
+
+
+async def create_blast_job(
+    db: AsyncSession,
+    activity: ActivityDB,
+    created_by: Optional[UUID],
+    match_skills: bool = True,
+    only_available: bool = True
+) -> BlastJobDB:
+    job = BlastJobDB(
+        activity_id=activity.id,
+        created_by=created_by,
+        status="queued",
+        match_skills=match_skills,
+        only_available=only_available,
+        skills=normalize_skills(activity.skills_required) if match_skills else [],
+        message_template=build_message_template(activity)
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def _touch_job(session: AsyncSession, job_id: UUID, attempt: int, **values):
+    """
+    Bump the heartbeat (and set `values`) of a job this worker still owns.
+
+    The UPDATE locks the job row until the caller commits, so results written
+    in the same transaction can't race a requeue. Raises _ClaimLost otherwise.
+    """
+    result = await session.execute(
+        update(BlastJobDB)
+        .where(BlastJobDB.id == job_id, BlastJobDB.attempt == attempt, BlastJobDB.status == "running")
+        .values(heartbeat_at=datetime.utcnow(), **values)
+    )
+    if result.rowcount != 1:
+        raise _ClaimLost()
+
+
+async def run_blast_job(job_id: UUID):
+    """Claim a queued job and build its results; no-op if someone else claimed it"""
+    async with async_session_maker() as writer:
+        now = datetime.utcnow()
+        claimed = await writer.execute(
+            update(BlastJobDB)
+            .where(BlastJobDB.id == job_id, BlastJobDB.status == "queued")
+            .values(
+                status="running",
+                attempt=func.coalesce(BlastJobDB.attempt, 0) + 1,
+                started_at=now,
+                heartbeat_at=now,
+                processed=0,
+                error=None
+            )
+            .returning(
+                BlastJobDB.attempt, BlastJobDB.activity_id, BlastJobDB.skills,
+                BlastJobDB.only_available, BlastJobDB.message_template
+            )
+        )
+        job = claimed.one_or_none()
+        if job is None:
+            await writer.rollback()
+            return
+        # Results of an earlier, interrupted attempt
+        await writer.execute(delete(BlastResultDB).where(BlastResultDB.job_id == job_id))
+        await writer.commit()
+
+        try:
+            activity = await writer.get(ActivityDB, job.activity_id)
+            if activity is None:
+                raise ValueError("Activity not found")
+
+            query = candidates_query(activity, job.skills, job.only_available)
+            total = (await writer.execute(select(func.count()).select_from(query.subquery()))).scalar()
+            await _touch_job(writer, job_id, job.attempt, total_candidates=total)
+            await writer.commit()
+
+            processed = 0
+            async with async_session_maker() as reader:
+                result = await reader.stream(query.order_by(UserDB.id).execution_options(yield_per=BATCH_SIZE))
+                async for rows in result.partitions():
+                    batch = []
+                    for user_id, name, phone, skills in rows:
+                        link = whatsapp_link(phone, job.message_template.replace("{name}", name or "there"))
+                        if link:
+                            batch.append({
+                                "job_id": job_id,
+                                "seq": processed + len(batch) + 1,
+                                "user_id": user_id,
+                                "name": name,
+                                "phone": phone,
+                                "skills": skills or [],
+                                "whatsapp_link": link
+                            })
+                    processed += len(batch)
+                    await _touch_job(writer, job_id, job.attempt, processed=processed)
+                    if batch:
+                        await writer.execute(insert(BlastResultDB), batch)
+                    await writer.commit()
+
+            await _touch_job(writer, job_id, job.attempt, status="completed", finished_at=datetime.utcnow())
+            await writer.commit()
+        except _ClaimLost:
+            await writer.rollback()
+            print(f"[BLAST] Job {job_id} was taken over by another worker")
+        except Exception as e:
+            await writer.rollback()
+            print(f"[BLAST] Job {job_id} failed: {e}")
+            try:
+                await _touch_job(writer, job_id, job.attempt, status="failed", error=str(e), finished_at=datetime.utcnow())
+                await writer.commit()
+            except _ClaimLost:
+                await writer.rollback()
+
+
+async def get_blast_results(db: AsyncSession, job_id: UUID, after: int = 0, limit: int = 100) -> dict:
+    """
+    Page of a job's results in seq order; pass the returned next_cursor as
+    `after`. `last_cursor` is where to resume once more results are written.
+    """
+    result = await db.execute(
+        select(BlastResultDB)
+        .where(BlastResultDB.job_id == job_id, BlastResultDB.seq > after)
+        .order_by(BlastResultDB.seq)
+        .limit(limit + 1)
+    )
+    rows = result.scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "targets": [
+            {
+                "volunteer_id": str(row.user_id),
+                "name": row.name,
+                "phone": row.phone,
+                "skills": row.skills or [],
+                "whatsapp_link": row.whatsapp_link
+            }
+            for row in rows
+        ],
+        "next_cursor": rows[-1].seq if has_more else None,
+        "last_cursor": rows[-1].seq if rows else after
+    }
+
+
+async def requeue_stale_jobs(session: AsyncSession) -> list:
+    """Put running jobs whose heartbeat stopped back in the queue; returns their ids"""
+    heartbeat = func.coalesce(BlastJobDB.heartbeat_at, BlastJobDB.started_at)
+    result = await session.execute(
+        update(BlastJobDB)
+        .where(BlastJobDB.status == "running", heartbeat < datetime.utcnow() - STALE_AFTER)
+        .values(status="queued", processed=0)
+        .returning(BlastJobDB.id)
+    )
+    stale = result.scalars().all()
+    await session.commit()
+    return stale
+
+
+class BlastRunner:
+    """
+    Runs submitted blast jobs one after another in the background, and every
+    RECOVER_INTERVAL_SECONDS requeues stale jobs and picks up queued ones.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: set = set()
+        self._tasks: list = []
+
+    def start(self):
+        if not self._tasks:
+            self._queue = asyncio.Queue()
+            self._pending = set()
+            self._tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._recover())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def submit(self, job_id: UUID):
+        if not self._tasks:
+            raise RuntimeError("Blast runner is not running")
+        if job_id not in self._pending:
+            self._pending.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _recover(self):
+        while True:
+            try:
+                async with async_session_maker() as session:
+                    stale = await requeue_stale_jobs(session)
+                    if stale:
+                        print(f"[BLAST] Requeued {len(stale)} stalled job(s)")
+                    # Queued jobs may belong to a worker that went away; a
+                    # claim is conditional, so picking one up twice is harmless
+                    queued = await session.execute(
+                        select(BlastJobDB.id).where(BlastJobDB.status == "queued").order_by(BlastJobDB.created_at)
+                    )
+                    for job_id in queued.scalars().all():
+                        self.submit(job_id)
+            except Exception as e:
+                print(f"[BLAST] Recovering jobs failed: {e}")
+            await asyncio.sleep(RECOVER_INTERVAL_SECONDS)
+
+    async def _run(self):
+        while True:
+            job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            try:
+                await run_blast_job(job_id)
+            except Exception as e:
+                print(f"[BLAST] Job {job_id} failed: {e}")
+
+
+blast_runner = BlastRunner()
@@ -0,0 +1,108 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.booking import BookingDB
+from ..models.activity import ActivityDB
+
+BOOKING_SCOPES = ("upcoming", "past")
+ACTIVE_BOOKING_STATUSES = ("confirmed", "attended")
+
+
+def encode_cursor(start_time: datetime, booking_id: UUID) -> str:
+    payload = json.dumps({"t": start_time.isoformat(), "id": str(booking_id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Raises ValueError for malformed cursors."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(payload["t"]), UUID(payload["id"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def fetch_user_bookings(
+    db: AsyncSession,
+    user_id: UUID,
+    scope: str = "upcoming",
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    statuses: Tuple[str, ...] = ACTIVE_BOOKING_STATUSES
+) -> Tuple[List[Tuple[BookingDB, ActivityDB]], bool]:
+    """
+    One page of a user's (booking, activity) rows in a single query, and
+    whether more follow.
+
+    Upcoming bookings are ordered soonest first and past bookings most recent
+    first; pages are keyed on (activity start_time, booking id) so deep pages
+    cost the same as the first one.
+    """
+    if scope not in BOOKING_SCOPES:
+        raise ValueError(f"scope must be one of {', '.join(BOOKING_SCOPES)}")
+
+    now = datetime.utcnow()
+    query = (
+        select(BookingDB, ActivityDB)
+        .join(ActivityDB, BookingDB.activity_id == ActivityDB.id)
+        .where(BookingDB.user_id == user_id, BookingDB.status.in_(statuses))
+    )
+
+    sort_key = tuple_(ActivityDB.start_time, BookingDB.id)
+    if scope == "upcoming":
+        query = query.where(ActivityDB.start_time >= now).order_by(ActivityDB.start_time, BookingDB.id)
+    else:
+        query = query.where(ActivityDB.start_time < now).order_by(ActivityDB.start_time.desc(), BookingDB.id.desc())
+
+    if cursor:
+        after = decode_cursor(cursor)
+        query = query.where(sort_key > after if scope == "upcoming" else sort_key < after)
+
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+
+    return rows[:limit], len(rows) > limit
+
+
+async def list_user_bookings(
+    db: AsyncSession,
+    user_id: UUID,
+    scope: str = "upcoming",
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    statuses: Tuple[str, ...] = ACTIVE_BOOKING_STATUSES
+) -> dict:
+    """Page through a user's bookings with their activities (see fetch_user_bookings)"""
+    rows, has_more = await fetch_user_bookings(db, user_id, scope, limit, cursor, statuses)
+
+    items = [
+        {
+            "booking_id": str(booking.id),
+            "activity_id": str(activity.id),
+            "status": booking.status,
+            "booked_at": booking.booked_at.isoformat() if booking.booked_at else None,
+            "notes": booking.notes,
+            "activity": {
+                "title": activity.title,
+                "start_time": activity.start_time.isoformat() if activity.start_time else None,
+                "end_time": activity.end_time.isoformat() if activity.end_time else None,
+                "location": activity.location,
+                "image_url": activity.image_url,
+                "activity_type": activity.activity_type
+            }
+        }
+        for booking, activity in rows
+    ]
+
+    next_cursor = None
+    if has_more and rows:
+        last_booking, last_activity = rows[-1]
+        next_cursor = encode_cursor(last_activity.start_time, last_booking.id)
+
+    return {"scope": scope, "items": items, "next_cursor": next_cursor}
@@ -1,6 +1,11 @@
 from datetime import datetime
+from functools import lru_cache
+from typing import Optional
 from urllib.parse import urlencode
 
+# RFC 5545 limits content lines to 75 octets, excluding the CRLF
+ICS_LINE_LIMIT = 75
+
 def generate_google_calendar_link(
     title: str,
     description: str,
@@ -27,35 +32,129 @@ def generate_google_calendar_link(
 
     return f"{base_url}?{urlencode(params)}"
 
+def escape_ics_text(value: str) -> str:
+    """Escape a TEXT property value (RFC 5545 section 3.3.11)."""
+    return (
+        value.replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+        .replace('\r', '\\n')
+    )
+
+def fold_ics_line(line: str) -> str:
+    """Fold a content line at 75 octets without splitting UTF-8 characters."""
+    if len(line.encode('utf-8')) <= ICS_LINE_LIMIT:
+        return line
+
+    chunks = []
+    current = ''
+    current_size = 0
+    # Continuation lines start with a space, which counts towards the limit
+    limit = ICS_LINE_LIMIT
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if current_size + char_size > limit:
+            chunks.append(current)
+            current = ''
+            current_size = 0
+            limit = ICS_LINE_LIMIT - 1
+        current += char
+        current_size += char_size
+    chunks.append(current)
+
+    return '\r\n '.join(chunks)
+
 def generate_ics_content(
     title: str,
     description: str,
     location: str,
     start_time: datetime,
-    end_time: datetime
+    end_time: datetime,
+    uid: Optional[str] = None,
+    dtstamp: Optional[datetime] = None
 ) -> str:
     def format_time(dt: datetime) -> str:
         return dt.strftime('%Y%m%dT%H%M%SZ')
 
-    now = format_time(datetime.utcnow())
+    now = format_time(dtstamp or datetime.utcnow())
     start = format_time(start_time)
     end = format_time(end_time)
-    
-    # Simple sanitization for description to avoid breaking ICS format
-    clean_desc = description.replace('\n', '\\n')
-
-    return f"""BEGIN:VCALENDAR
-VERSION:2.0
-PRODID:-//HolySheet//Booking System//EN
-CALSCALE:GREGORIAN
-BEGIN:VEVENT
-DTSTAMP:{now}
-UID:{now}-{start}@holysheet.com
-DTSTART:{start}
-DTEND:{end}
-SUMMARY:{title}
-DESCRIPTION:{clean_desc}\\n\\nLocation: {location}
-LOCATION:{location}
-STATUS:CONFIRMED
-END:VEVENT
-END:VCALENDAR"""
+    details = f"{description}\n\nLocation: {location}"
+
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//HolySheet//Booking System//EN",
+        "CALSCALE:GREGORIAN",
+        "BEGIN:VEVENT",
+        f"DTSTAMP:{now}",
+        f"UID:{uid or f'{now}-{start}'}@holysheet.com",
+        f"DTSTART:{start}",
+        f"DTEND:{end}",
+        f"SUMMARY:{escape_ics_text(title)}",
+        f"DESCRIPTION:{escape_ics_text(details)}",
+        f"LOCATION:{escape_ics_text(location)}",
+        "STATUS:CONFIRMED",
+        "END:VEVENT",
+        "END:VCALENDAR",
+    ]
+
+    return "\r\n".join(fold_ics_line(line) for line in lines) + "\r\n"
+
+# --- Per-activity memoization ---
+# Activities change rarely compared to how often they are booked, so the
+# rendered artifacts are cached per (activity_id, updated_at). Any edit bumps
+# updated_at and naturally produces a new cache key.
+
+@lru_cache(maxsize=1024)
+def _activity_ics(
+    activity_id: str,
+    updated_at: Optional[datetime],
+    title: str,
+    description: str,
+    location: str,
+    start_time: datetime,
+    end_time: datetime
+) -> str:
+    return generate_ics_content(
+        title,
+        description,
+        location,
+        start_time,
+        end_time,
+        uid=activity_id,
+        dtstamp=updated_at
+    )
+
+@lru_cache(maxsize=1024)
+def _activity_google_link(
+    activity_id: str,
+    updated_at: Optional[datetime],
+    title: str,
+    description: str,
+    location: str,
+    start_time: datetime,
+    end_time: datetime
+) -> str:
+    return generate_google_calendar_link(title, description, location, start_time, end_time)
+
+def _activity_cache_key(activity) -> tuple:
+    return (
+        str(activity.id),
+        activity.updated_at,
+        activity.title,
+        activity.description or "",
+        activity.location or "",
+        activity.start_time,
+        activity.end_time,
+    )
+
+def get_activity_ics(activity) -> str:
+    """Cached ICS body for an ActivityDB row."""
+    return _activity_ics(*_activity_cache_key(activity))
+
+def get_activity_google_link(activity) -> str:
+    """Cached Google Calendar link for an ActivityDB row."""
+    return _activity_google_link(*_activity_cache_key(activity))
@@ -0,0 +1,87 @@
+"""
+Stateless check-in tokens for self-service attendance.
+
+A token names an activity and a QR refresh window and carries a truncated
+HMAC-SHA256 signature, so it can be verified in pure CPU without touching the
+database. Tokens rotate with the QR code and stay valid for one extra window
+to cover people who scanned just before the rotation.
+"""
+
+import base64
+import hashlib
+import hmac
+import logging
+from typing import Optional
+from uuid import UUID
+
+from ..config import get_settings
+from .qr import current_window
+
+TOKEN_VERSION = "v1"
+QR_PREFIX = "HOLYSHEET:CHECKIN:"
+SIGNATURE_BYTES = 16
+GRACE_WINDOWS = 1
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def _load_secret() -> bytes:
+    """
+    CHECKIN_TOKEN_SECRET, or a key derived from DATABASE_URL when it is unset.
+
+    Every worker and restart of a deployment shares DATABASE_URL (and its
+    password), so a derived key still lets any process verify tokens issued
+    by another. A dedicated secret is preferred so it can be rotated alone.
+    """
+    if settings.CHECKIN_TOKEN_SECRET:
+        return settings.CHECKIN_TOKEN_SECRET.encode()
+    logger.warning("CHECKIN_TOKEN_SECRET is not set; deriving the check-in token key from DATABASE_URL")
+    return hmac.new(settings.DATABASE_URL.encode(), b"holysheet-checkin-token", hashlib.sha256).digest()
+
+
+_secret = _load_secret()
+
+
+class InvalidCheckinToken(ValueError):
+    pass
+
+
+def _sign(payload: str) -> str:
+    digest = hmac.new(_secret, payload.encode(), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def issue_checkin_token(activity_id: UUID, window: Optional[int] = None) -> str:
+    if window is None:
+        window, _ = current_window()
+    payload = f"{TOKEN_VERSION}.{activity_id.hex}.{window}"
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_checkin_token(token: str) -> UUID:
+    """Return the activity id of a valid token. Raises InvalidCheckinToken."""
+    if token.startswith(QR_PREFIX):
+        token = token[len(QR_PREFIX):]
+
+    parts = token.split(".")
+    if len(parts) != 4 or parts[0] != TOKEN_VERSION:
+        raise InvalidCheckinToken("Malformed check-in token")
+
+    version, activity_hex, window_str, signature = parts
+    # Compare bytes: compare_digest rejects str with non-ASCII characters
+    expected = _sign(f"{version}.{activity_hex}.{window_str}")
+    if not hmac.compare_digest(signature.encode(), expected.encode()):
+        raise InvalidCheckinToken("Invalid check-in token")
+
+    try:
+        window = int(window_str)
+        activity_id = UUID(hex=activity_hex)
+    except ValueError:
+        raise InvalidCheckinToken("Malformed check-in token")
+
+    current, _ = current_window()
+    if not current - GRACE_WINDOWS <= window <= current:
+        raise InvalidCheckinToken("Check-in token has expired")
+
+    return activity_id
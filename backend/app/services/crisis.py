@@ -0,0 +1,152 @@
+"""
+Crisis dashboard snapshots.
+
+Shortage, fill percentage, status and the urgency order are computed in one
+query; the result is cached per `days_ahead` for CRISIS_SNAPSHOT_TTL_SECONDS
+and dropped as soon as an activity or volunteer registration changes, so
+coordinators polling the dashboard mostly read from memory. The cache is
+process-local, like the skill index.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Integer, case, cast, event, extract, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models.activity import ActivityDB
+from ..models.volunteer import VolunteerDB
+
+CRITICAL_BELOW = 50
+WARNING_BELOW = 100
+
+
+def crisis_query(now: datetime, until: datetime):
+    registered = func.coalesce(ActivityDB.volunteers_registered, 0)
+    fill_percentage = registered * 100 // ActivityDB.volunteers_needed
+    status_rank = case((fill_percentage < CRITICAL_BELOW, 0), (fill_percentage < WARNING_BELOW, 1), else_=2)
+    status_label = case((fill_percentage < CRITICAL_BELOW, "critical"), (fill_percentage < WARNING_BELOW, "warning"), else_="ok")
+    hours_until = cast(func.floor(extract("epoch", ActivityDB.start_time - now) / 3600), Integer)
+
+    return (
+        select(
+            ActivityDB.id,
+            ActivityDB.title,
+            ActivityDB.start_time,
+            ActivityDB.location,
+            ActivityDB.volunteers_needed,
+            registered.label("volunteers_registered"),
+            func.greatest(ActivityDB.volunteers_needed - registered, 0).label("shortage"),
+            fill_percentage.label("fill_percentage"),
+            status_label.label("status"),
+            hours_until.label("hours_until"),
+            ActivityDB.skills_required,
+            ActivityDB.needs_help,
+            func.count().filter(status_rank == 0).over().label("critical_count"),
+            func.count().filter(status_rank == 1).over().label("warning_count")
+        )
+        .where(
+            ActivityDB.start_time >= now,
+            ActivityDB.start_time <= until,
+            ActivityDB.volunteers_needed > 0
+        )
+        .order_by(status_rank, hours_until, ActivityDB.start_time)
+    )
+
+
+async def build_crisis_snapshot(db: AsyncSession, days_ahead: int) -> dict:
+    now = datetime.utcnow()
+    result = await db.execute(crisis_query(now, now + timedelta(days=days_ahead)))
+    rows = result.all()
+
+    return {
+        "total_activities": len(rows),
+        "critical_count": rows[0].critical_count if rows else 0,
+        "warning_count": rows[0].warning_count if rows else 0,
+        "generated_at": now.isoformat(),
+        "activities": [
+            {
+                "activity_id": str(row.id),
+                "title": row.title,
+                "start_time": row.start_time.isoformat() if row.start_time else None,
+                "hours_until": row.hours_until,
+                "location": row.location,
+                "volunteers_needed": row.volunteers_needed,
+                "volunteers_registered": row.volunteers_registered,
+                "shortage": row.shortage,
+                "fill_percentage": row.fill_percentage,
+                "status": row.status,
+                "skills_required": row.skills_required or [],
+                "needs_help": row.needs_help
+            }
+            for row in rows
+        ]
+    }
+
+
+class CrisisSnapshots:
+    """Snapshots per days_ahead, rebuilt after `ttl` seconds or on invalidate()"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._snapshots: Dict[int, Tuple[float, dict]] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._generation = 0
+
+    def _fresh(self, days_ahead: int) -> Optional[dict]:
+        cached = self._snapshots.get(days_ahead)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        return None
+
+    async def get(self, db: AsyncSession, days_ahead: int) -> dict:
+        snapshot = self._fresh(days_ahead)
+        if snapshot is not None:
+            return snapshot
+
+        # One rebuild per key at a time; concurrent pollers wait for it
+        async with self._locks.setdefault(days_ahead, asyncio.Lock()):
+            snapshot = self._fresh(days_ahead)
+            if snapshot is not None:
+                return snapshot
+            generation = self._generation
+            snapshot = await build_crisis_snapshot(db, days_ahead)
+            # Don't cache a snapshot that a change made stale while it was built
+            if generation == self._generation:
+                self._snapshots[days_ahead] = (time.monotonic() + self.ttl, snapshot)
+            return snapshot
+
+    def invalidate(self):
+        self._generation += 1
+        self._snapshots.clear()
+
+
+crisis_snapshots = CrisisSnapshots(get_settings().CRISIS_SNAPSHOT_TTL_SECONDS)
+
+
+# --- ORM hooks: committed activity or registration changes drop the snapshots ---
+
+_DIRTY_KEY = "crisis_snapshots_dirty"
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_dirty(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (ActivityDB, VolunteerDB)):
+            session.info[_DIRTY_KEY] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate(session):
+    if session.info.pop(_DIRTY_KEY, False):
+        crisis_snapshots.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop(_DIRTY_KEY, None)
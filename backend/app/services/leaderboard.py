@@ -0,0 +1,143 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import async_session_maker
+from ..models.user import UserDB
+from ..models.leaderboard import LeaderboardEntryDB
+
+ALL = "all"
+
+# Rebuilds every board in one pass over attendance. GROUPING SETS produce the
+# global, per-month, per-type and per-month-per-type totals together, and the
+# window functions rank each board. Runs in one transaction, so readers keep
+# seeing the previous rollup until it commits.
+REFRESH_LEADERBOARD = text("""
+WITH base AS (
+    SELECT
+        att.user_id,
+        to_char(att.check_in_time, 'YYYY-MM') AS month,
+        COALESCE(a.activity_type, 'volunteer') AS activity_type,
+        COALESCE(att.hours_earned, 0) AS hours
+    FROM attendance att
+    JOIN activities a ON a.id = att.activity_id
+    WHERE att.check_in_time IS NOT NULL
+),
+totals AS (
+    SELECT
+        CASE WHEN GROUPING(month) = 1 THEN 'all' ELSE month END AS period,
+        CASE WHEN GROUPING(activity_type) = 1 THEN 'all' ELSE activity_type END AS activity_type,
+        user_id,
+        SUM(hours) AS hours,
+        COUNT(*) AS events
+    FROM base
+    GROUP BY GROUPING SETS (
+        (user_id),
+        (user_id, month),
+        (user_id, activity_type),
+        (user_id, month, activity_type)
+    )
+)
+INSERT INTO leaderboard_entries (period, activity_type, user_id, hours, events, rank, participants, refreshed_at)
+SELECT
+    period, activity_type, user_id, hours, events,
+    RANK() OVER (PARTITION BY period, activity_type ORDER BY hours DESC),
+    COUNT(*) OVER (PARTITION BY period, activity_type),
+    :refreshed_at
+FROM totals
+""")
+
+
+async def refresh_leaderboard(db: AsyncSession) -> int:
+    """Rebuild the rollup from attendance and commit. Returns the number of rows."""
+    # Serialise concurrent refreshes (background task vs. on-demand)
+    await db.execute(text("SELECT pg_advisory_xact_lock(hashtext('leaderboard_refresh'))"))
+    await db.execute(text("DELETE FROM leaderboard_entries"))
+    result = await db.execute(REFRESH_LEADERBOARD, {"refreshed_at": datetime.utcnow()})
+    await db.commit()
+    return result.rowcount
+
+
+async def get_top(db: AsyncSession, period: str = ALL, activity_type: str = ALL, limit: int = 10) -> dict:
+    """Top `limit` users of a board, read in rank order off ix_leaderboard_board_rank"""
+    result = await db.execute(
+        select(LeaderboardEntryDB, UserDB.name, UserDB.image)
+        .join(UserDB, UserDB.id == LeaderboardEntryDB.user_id)
+        .where(
+            LeaderboardEntryDB.period == period,
+            LeaderboardEntryDB.activity_type == activity_type
+        )
+        .order_by(LeaderboardEntryDB.rank, LeaderboardEntryDB.user_id)
+        .limit(limit)
+    )
+    rows = result.all()
+
+    return {
+        "period": period,
+        "activity_type": activity_type,
+        "refreshed_at": rows[0][0].refreshed_at if rows else None,
+        "participants": rows[0][0].participants if rows else 0,
+        "entries": [
+            {
+                "rank": entry.rank,
+                "user_id": str(entry.user_id),
+                "name": name,
+                "image": image,
+                "hours": entry.hours,
+                "events": entry.events
+            }
+            for entry, name, image in rows
+        ]
+    }
+
+
+async def get_rank(db: AsyncSession, user_id: UUID, period: str = ALL, activity_type: str = ALL) -> Optional[dict]:
+    """A user's position on a board via a primary key lookup, or None if unranked"""
+    entry = await db.get(LeaderboardEntryDB, (period, activity_type, user_id))
+    if entry is None:
+        return None
+
+    return {
+        "period": period,
+        "activity_type": activity_type,
+        "rank": entry.rank,
+        "participants": entry.participants,
+        "hours": entry.hours,
+        "events": entry.events,
+        "refreshed_at": entry.refreshed_at
+    }
+
+
+class LeaderboardRefresher:
+    """Rebuilds the leaderboard rollup every `interval` seconds in the background."""
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                async with async_session_maker() as session:
+                    rows = await refresh_leaderboard(session)
+                print(f"[LEADERBOARD] Refreshed {rows} entries")
+            except Exception as e:
+                print(f"[LEADERBOARD] Refresh failed: {e}")
+            await asyncio.sleep(self.interval)
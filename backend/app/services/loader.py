@@ -0,0 +1,108 @@
+"""
+Request-scoped batching loader (DataLoader pattern).
+
+Every `load()` issued in the same event-loop tick is collected and resolved
+with a single `WHERE id = ANY(:ids)` query. Results are memoized for the
+lifetime of the loader, which is one request when obtained through
+`dependencies.get_loaders`.
+
+Loaders sharing a session also share a lock, so their batches run one after
+another: an AsyncSession can't execute two statements at once.
+"""
+
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set, Union
+from uuid import UUID
+
+from sqlalchemy import select, any_, bindparam, ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.user import UserDB
+from ..models.activity import ActivityDB
+
+Key = Union[str, UUID]
+
+
+class EntityLoader:
+    def __init__(self, db: AsyncSession, model, lock: Optional[asyncio.Lock] = None):
+        self._db = db
+        self._model = model
+        self._lock = lock or asyncio.Lock()
+        self._cache: Dict[UUID, asyncio.Future] = {}
+        self._pending: List[UUID] = []
+        # The event loop only keeps weak references to tasks
+        self._dispatches: Set[asyncio.Task] = set()
+
+    def load(self, key: Key) -> asyncio.Future:
+        """Schedule a lookup by primary key. Raises ValueError for malformed ids."""
+        key = key if isinstance(key, UUID) else UUID(str(key))
+
+        future = self._cache.get(key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[key] = future
+
+        if not self._pending:
+            # Runs once the caller yields, after all loads of this tick are queued
+            task = loop.create_task(self._dispatch())
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+        self._pending.append(key)
+
+        return future
+
+    async def load_many(self, keys: Iterable[Key]) -> List[Optional[object]]:
+        """Resolve many ids with one query. Malformed or unknown ids resolve to None."""
+        futures = []
+        for key in keys:
+            try:
+                futures.append(self.load(key))
+            except ValueError:
+                futures.append(None)
+
+        results = await asyncio.gather(*(f for f in futures if f is not None))
+        resolved = iter(results)
+        return [next(resolved) if f is not None else None for f in futures]
+
+    def prime(self, entity) -> None:
+        """Seed the cache with an entity that was already fetched."""
+        if entity.id not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(entity)
+            self._cache[entity.id] = future
+
+    async def _dispatch(self):
+        keys, self._pending = self._pending, []
+
+        try:
+            async with self._lock:
+                result = await self._db.execute(
+                    select(self._model).where(
+                        self._model.id == any_(bindparam("ids", keys, type_=ARRAY(PGUUID(as_uuid=True))))
+                    )
+                )
+                found = {entity.id: entity for entity in result.scalars().all()}
+        except Exception as e:
+            for key in keys:
+                future = self._cache.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key in keys:
+            future = self._cache[key]
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+class Loaders:
+    """Loaders available to a single request."""
+
+    def __init__(self, db: AsyncSession):
+        lock = asyncio.Lock()
+        self.users = EntityLoader(db, UserDB, lock)
+        self.activities = EntityLoader(db, ActivityDB, lock)
@@ -0,0 +1,308 @@
+"""
+Deterministic volunteer ranking.
+
+The roster is turned into a volunteer x skill matrix once per request and
+every activity is scored against it with vectorized NumPy operations:
+
+- skills: coverage of the activity's required skills, each weighted by its
+  rarity across the roster (IDF), so scarce skills count for more
+- hours: volunteer hours earned recently
+- tier: how often the volunteer has committed to come
+- experience: prior attendance at activities of the same type
+
+The LLM is optional and only reranks the top of this list (services/ai.py).
+"""
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.user import UserDB, normalize_skill, normalize_skills
+from ..models.attendance import AttendanceDB
+from ..models.activity import ActivityDB
+from .skill_index import has_any_skill
+
+RECENT_DAYS = 90
+
+MATCH_WEIGHTS = {
+    "skills": 0.55,
+    "experience": 0.2,
+    "hours": 0.15,
+    "tier": 0.1,
+}
+
+TIER_WEIGHTS = {
+    "three-plus-a-week": 1.0,
+    "twice-a-week": 0.75,
+    "weekly": 0.5,
+    "once-a-week": 0.5,
+    "ad-hoc": 0.25,
+}
+
+
+@dataclass
+class Roster:
+    ids: List[UUID]
+    names: List[str]
+    skills: List[List[str]]
+    tiers: List[str]
+    phones: List[Optional[str]]
+    vocabulary: Dict[str, int]
+    matrix: np.ndarray          # n x m, 1.0 where the volunteer has the skill
+    idf: np.ndarray             # m
+    recent_hours: np.ndarray    # n
+    tier_weight: np.ndarray     # n
+    type_counts: Dict[str, np.ndarray] = field(default_factory=dict)  # activity type -> n
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def build_roster(volunteers: Sequence, history: Iterable = ()) -> Roster:
+    """
+    Build a roster from volunteer rows (id, name, skills, skills_normalized,
+    tier, phone_number) and history rows (user_id, activity_type, events,
+    recent_hours).
+    """
+    n = len(volunteers)
+    vocabulary: Dict[str, int] = {}
+    rows, cols = [], []
+    for i, vol in enumerate(volunteers):
+        for skill in vol.skills_normalized or normalize_skills(vol.skills):
+            rows.append(i)
+            cols.append(vocabulary.setdefault(skill, len(vocabulary)))
+
+    matrix = np.zeros((n, len(vocabulary)), dtype=np.float32)
+    matrix[rows, cols] = 1.0
+
+    df = matrix.sum(axis=0)
+    idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+
+    index = {vol.id: i for i, vol in enumerate(volunteers)}
+    recent_hours = np.zeros(n, dtype=np.float32)
+    type_counts: Dict[str, np.ndarray] = {}
+    for user_id, activity_type, events, hours in history:
+        i = index.get(user_id)
+        if i is None:
+            continue
+        recent_hours[i] += hours or 0
+        counts = type_counts.setdefault(activity_type or "volunteer", np.zeros(n, dtype=np.float32))
+        counts[i] += events or 0
+
+    return Roster(
+        ids=[vol.id for vol in volunteers],
+        names=[vol.name for vol in volunteers],
+        skills=[vol.skills or [] for vol in volunteers],
+        tiers=[vol.tier or "ad-hoc" for vol in volunteers],
+        phones=[vol.phone_number for vol in volunteers],
+        vocabulary=vocabulary,
+        matrix=matrix,
+        idf=idf,
+        recent_hours=recent_hours,
+        tier_weight=np.array([TIER_WEIGHTS.get(vol.tier or "ad-hoc", 0.25) for vol in volunteers], dtype=np.float32),
+        type_counts=type_counts
+    )
+
+
+async def load_roster(db: AsyncSession, skills: Optional[Iterable[str]] = None) -> Roster:
+    """
+    Volunteers and their attendance history in two queries. With `skills`,
+    only volunteers having at least one of them (via the skill index), so
+    skill rarity (IDF) is then relative to those candidates.
+    """
+    candidates = [UserDB.role == "volunteer"]
+    wanted = normalize_skills(skills) if skills is not None else []
+    if wanted:
+        candidates.append(has_any_skill(wanted))
+
+    vol_result = await db.execute(
+        select(UserDB.id, UserDB.name, UserDB.skills, UserDB.skills_normalized, UserDB.tier, UserDB.phone_number)
+        .where(*candidates)
+        .order_by(UserDB.id)
+    )
+    volunteers = vol_result.all()
+
+    since = datetime.utcnow() - timedelta(days=RECENT_DAYS)
+    history_result = await db.execute(
+        select(
+            AttendanceDB.user_id,
+            ActivityDB.activity_type,
+            func.count(AttendanceDB.id),
+            func.coalesce(func.sum(AttendanceDB.hours_earned).filter(AttendanceDB.check_in_time >= since), 0)
+        )
+        .join(ActivityDB, ActivityDB.id == AttendanceDB.activity_id)
+        .join(UserDB, UserDB.id == AttendanceDB.user_id)
+        .where(*candidates)
+        .group_by(AttendanceDB.user_id, ActivityDB.activity_type)
+    )
+
+    return build_roster(volunteers, history_result.all())
+
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    """log-scale to [0, 1] so a few very active volunteers don't flatten everyone else"""
+    scaled = np.log1p(values)
+    peak = scaled.max() if scaled.size else 0
+    return scaled / peak if peak > 0 else np.zeros_like(scaled)
+
+
+def requirement_matrix(roster: Roster, activities: Sequence[Dict]) -> np.ndarray:
+    """m x a matrix of IDF weights of each activity's required skills, columns summing to 1"""
+    weights = np.zeros((len(roster.vocabulary), len(activities)), dtype=np.float32)
+    for j, activity in enumerate(activities):
+        total = 0.0
+        for skill in normalize_skills(activity.get("skills_required")):
+            col = roster.vocabulary.get(skill)
+            # Skills nobody has still count towards the total, so coverage stays honest
+            weight = float(roster.idf[col]) if col is not None else math.log(1 + len(roster)) + 1
+            total += weight
+            if col is not None:
+                weights[col, j] = weight
+        if total > 0:
+            weights[:, j] /= total
+    return weights
+
+
+def score_matrix(roster: Roster, activities: Sequence[Dict]) -> np.ndarray:
+    """n x a scores in [0, 100] for every volunteer against every activity"""
+    n, a = len(roster), len(activities)
+    if n == 0 or a == 0:
+        return np.zeros((n, a), dtype=np.float32)
+
+    coverage = roster.matrix @ requirement_matrix(roster, activities)  # n x a
+    hours = _normalize(roster.recent_hours)
+    experience = np.zeros((n, a), dtype=np.float32)
+    for j, activity in enumerate(activities):
+        counts = roster.type_counts.get(activity.get("activity_type") or "volunteer")
+        if counts is not None:
+            experience[:, j] = _normalize(counts)
+
+    has_requirements = np.array([bool(normalize_skills(act.get("skills_required"))) for act in activities])
+    skill_weight = np.where(has_requirements, MATCH_WEIGHTS["skills"], 0.0)
+    # Without required skills the other signals share the whole score
+    scale = 1.0 / (1.0 - MATCH_WEIGHTS["skills"] + skill_weight)
+
+    score = (
+        coverage * skill_weight
+        + experience * MATCH_WEIGHTS["experience"]
+        + (hours * MATCH_WEIGHTS["hours"])[:, None]
+        + (roster.tier_weight * MATCH_WEIGHTS["tier"])[:, None]
+    ) * scale
+    return np.round(score * 100, 1)
+
+
+def availability_mask(roster: Roster, unavailable: Set[UUID]) -> np.ndarray:
+    """True for volunteers not in `unavailable` (e.g. services/schedule.busy_user_ids)"""
+    return np.fromiter((user_id not in unavailable for user_id in roster.ids), dtype=bool, count=len(roster))
+
+
+def top_indices(scores: np.ndarray, k: Optional[int], mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices of the k best scores (ties broken by roster order), optionally only where mask is set"""
+    candidates = np.arange(scores.size) if mask is None else np.flatnonzero(mask)
+    if k is not None and k < candidates.size:
+        # argpartition finds the top k in O(n); only those get fully sorted
+        part = np.argpartition(-scores[candidates], k - 1)[:k]
+        threshold = scores[candidates[part]].min()
+        candidates = candidates[scores[candidates] >= threshold]
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k] if k is not None else candidates[order]
+
+
+def describe_match(roster: Roster, i: int, activity: Dict) -> dict:
+    wanted = set(normalize_skills(activity.get("skills_required")))
+    matching = [s for s in roster.skills[i] if normalize_skill(s) in wanted]
+    hours = int(roster.recent_hours[i])
+
+    parts = []
+    if wanted:
+        parts.append(
+            f"Matches {len(matching)}/{len(wanted)} required skill(s)"
+            + (f": {', '.join(matching)}" if matching else "")
+        )
+    else:
+        parts.append("General volunteer")
+    if hours:
+        parts.append(f"{hours}h in the last {RECENT_DAYS} days")
+
+    return {"matching_skills": matching, "reason": "; ".join(parts)}
+
+
+def match_item(roster: Roster, i: int, score: float, activity: Dict) -> Dict:
+    return {
+        "volunteer_id": str(roster.ids[i]),
+        "name": roster.names[i],
+        "skills": roster.skills[i],
+        "score": float(score),
+        **describe_match(roster, i, activity)
+    }
+
+
+def rank_volunteers(roster: Roster, activity: Dict, limit: Optional[int] = 10, mask: Optional[np.ndarray] = None) -> List[Dict]:
+    """Best volunteers for one activity, highest score first"""
+    scores = score_matrix(roster, [activity])[:, 0]
+    return [match_item(roster, i, scores[i], activity) for i in top_indices(scores, limit, mask)]
+
+
+def _times(values: Iterable[datetime]) -> np.ndarray:
+    return np.array(list(values), dtype="datetime64[us]")
+
+
+def commitment_conflicts(roster: Roster, activities: Sequence[Dict], commitments: Iterable) -> np.ndarray:
+    """
+    n x a, True where a volunteer has a commitment, given as (user_id,
+    start_time, end_time) rows, overlapping the activity.
+    """
+    starts = _times(act["start_time"] for act in activities)
+    ends = _times(act["end_time"] for act in activities)
+    blocked = np.zeros((len(roster), len(activities)), dtype=bool)
+    index = {user_id: i for i, user_id in enumerate(roster.ids)}
+    rows, busy_from, busy_until = [], [], []
+    for user_id, start, end in commitments:
+        i = index.get(user_id)
+        if i is not None:
+            rows.append(i)
+            busy_from.append(start)
+            busy_until.append(end)
+    if rows:
+        hits = (_times(busy_from)[:, None] < ends) & (starts < _times(busy_until)[:, None])
+        np.logical_or.at(blocked, np.array(rows), hits)
+    return blocked
+
+
+def suggest_for_activities(
+    roster: Roster,
+    activities: Sequence[Dict],
+    commitments: Iterable = (),
+    limit: Optional[int] = None
+) -> List[List[Dict]]:
+    """
+    Ranked suggestions for several activities from a single score matrix.
+
+    Activities are filled in the given order, so pass the most urgent first.
+    Each gets up to its "shortage" volunteers (at most `limit`). Nobody is
+    suggested for an activity overlapping one of their commitments, given as
+    (user_id, start_time, end_time) rows, or overlapping another activity
+    they were already suggested for in this batch.
+    """
+    scores = score_matrix(roster, activities)
+    blocked = commitment_conflicts(roster, activities, commitments)
+    starts = _times(act["start_time"] for act in activities)
+    ends = _times(act["end_time"] for act in activities)
+
+    clashes = (starts[:, None] < ends) & (starts < ends[:, None])  # a x a, diagonal set
+    plans = []
+    for j, activity in enumerate(activities):
+        wanted = max(0, activity.get("shortage") or 0)
+        if limit is not None:
+            wanted = min(wanted, limit)
+        picked = top_indices(scores[:, j], wanted, ~blocked[:, j]) if wanted else []
+        for i in picked:
+            blocked[i] |= clashes[j]
+        plans.append([match_item(roster, i, scores[i, j], activity) for i in picked])
+    return plans
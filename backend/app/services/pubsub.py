@@ -0,0 +1,69 @@
+"""
+In-process pub/sub for pushing live updates to connected dashboards.
+
+Each subscriber gets a bounded queue. Publishing never blocks: a subscriber
+whose queue is full is considered too slow, is dropped and receives a final
+`None` so its stream can tell the client to reconnect and resync.
+"""
+
+import asyncio
+from collections import defaultdict
+from typing import Dict, Hashable, Optional, Set
+
+
+class Subscription:
+    def __init__(self, broker: "Broker", topic: Hashable, maxsize: int):
+        self.broker = broker
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """Next event, or None once dropped. Raises asyncio.TimeoutError when idle."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[Hashable, Set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, topic: Hashable) -> Subscription:
+        subscription = Subscription(self, topic, self.queue_size)
+        self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.topic)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.topic]
+
+    def publish(self, topic: Hashable, event: dict):
+        for subscription in list(self._subscribers.get(topic, ())):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription):
+        subscription.dropped = True
+        self.unsubscribe(subscription)
+        # Make room for the sentinel; the client resyncs on reconnect anyway
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        return {
+            "topics": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values())
+        }
+
+
+# Topic: activity UUID. Fed by services/attendance after each committed check-in.
+attendance_broker = Broker()
@@ -0,0 +1,55 @@
+import asyncio
+import io
+import time
+from functools import lru_cache
+from typing import Tuple
+from uuid import UUID
+
+import qrcode
+import qrcode.image.svg
+
+# Check-in QR codes change once per window, so every screen showing the same
+# activity within a window shares one cached render.
+QR_REFRESH_SECONDS = 300
+
+QR_MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+def current_window() -> Tuple[int, int]:
+    """Return the current refresh window and the seconds left in it."""
+    now = time.time()
+    window = int(now // QR_REFRESH_SECONDS)
+    remaining = int((window + 1) * QR_REFRESH_SECONDS - now)
+    return window, max(1, remaining)
+
+
+def activity_qr_data(activity_id: UUID, window: int) -> str:
+    """Signed self check-in payload for the given window."""
+    from .checkin_token import QR_PREFIX, issue_checkin_token
+    return f"{QR_PREFIX}{issue_checkin_token(activity_id, window)}"
+
+
+@lru_cache(maxsize=512)
+def render_qr(data: str, fmt: str = "png") -> bytes:
+    """Render a QR code as PNG or SVG bytes. CPU bound; call via render_qr_async."""
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    buffer = io.BytesIO()
+    if fmt == "svg":
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+        img.save(buffer)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(buffer, format="PNG")
+
+    return buffer.getvalue()
+
+
+async def render_qr_async(data: str, fmt: str = "png") -> bytes:
+    """Render on a worker thread so PIL doesn't block the event loop."""
+    return await asyncio.to_thread(render_qr, data, fmt)
@@ -0,0 +1,196 @@
+"""
+Paged volunteer lists for the admin screens.
+
+Both lists select only the requested `fields` and page with a keyset on
+(sort value, user id), so a 500-person event or the whole roster is read a
+page at a time at the same cost for every page. Sort values are coalesced so
+NULLs sort like empty names, zero hours or the earliest application.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, func, tuple_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.user import UserDB, normalize_skills
+from ..models.volunteer import VolunteerDB
+from .skill_index import VOLUNTEER_ROLE
+
+ROSTER_FIELDS = {
+    "name": UserDB.name,
+    "email": UserDB.email,
+    "role": UserDB.role,
+    "tier": UserDB.tier,
+    "location": UserDB.location,
+    "phone_number": UserDB.phone_number,
+    "total_events": UserDB.total_events,
+    "volunteer_hours": UserDB.volunteer_hours,
+    "skills": UserDB.skills,
+}
+ROSTER_SORTS = {
+    "name": func.coalesce(UserDB.name, ""),
+    "hours": func.coalesce(UserDB.volunteer_hours, 0),
+}
+
+ACTIVITY_VOLUNTEER_FIELDS = {
+    "name": UserDB.name,
+    "email": UserDB.email,
+    "phone_number": UserDB.phone_number,
+    "volunteer_hours": UserDB.volunteer_hours,
+    "role": VolunteerDB.role,
+    "status": VolunteerDB.status,
+    "applied_at": VolunteerDB.applied_at,
+    "skills": VolunteerDB.skills_offered,
+}
+ACTIVITY_VOLUNTEER_SORTS = {
+    "applied_at": func.coalesce(VolunteerDB.applied_at, datetime.min),
+    "name": func.coalesce(UserDB.name, ""),
+    "hours": func.coalesce(UserDB.volunteer_hours, 0),
+}
+
+
+def parse_fields(fields: Optional[str], allowed: Dict) -> List[str]:
+    """Comma separated field names, all of `allowed` if empty. Raises ValueError for unknown fields."""
+    if not fields:
+        return list(allowed)
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f != "id" and f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: id, {', '.join(allowed)}")
+    return [f for f in dict.fromkeys(names) if f != "id"]
+
+
+def encode_roster_cursor(sort: str, value, user_id: UUID) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort, "v": value, "id": str(user_id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_roster_cursor(cursor: str, sort: str) -> Tuple[object, UUID]:
+    """Raises ValueError for malformed cursors or ones from a different sort."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if payload["s"] != sort:
+            raise ValueError("Cursor is for a different sort")
+        value = payload["v"]
+        if sort == "applied_at":
+            value = datetime.fromisoformat(value)
+        return value, UUID(payload["id"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+async def _page(
+    db: AsyncSession,
+    query,
+    sort: str,
+    sort_expr,
+    user_id_col,
+    fields: List[str],
+    descending: bool,
+    limit: int,
+    cursor: Optional[str]
+) -> dict:
+    key = tuple_(sort_expr, user_id_col)
+    if cursor:
+        after = decode_roster_cursor(cursor, sort)
+        query = query.where(key < after if descending else key > after)
+    if descending:
+        query = query.order_by(sort_expr.desc(), user_id_col.desc())
+    else:
+        query = query.order_by(sort_expr, user_id_col)
+
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "volunteers": [
+            {"id": str(row.user_id), **{f: _value(getattr(row, f)) for f in fields}}
+            for row in rows
+        ],
+        "next_cursor": encode_roster_cursor(sort, rows[-1].sort_value, rows[-1].user_id) if has_more else None
+    }
+
+
+def _skill_filter(column, skills: Optional[List[str]]):
+    wanted = normalize_skills(skills)
+    return column.op("&&")(bindparam("skills", wanted, type_=ARRAY(String))) if wanted else None
+
+
+async def list_volunteers(
+    db: AsyncSession,
+    sort: str = "name",
+    descending: bool = False,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    skills: Optional[List[str]] = None,
+    tier: Optional[str] = None,
+    fields: Optional[str] = None
+) -> dict:
+    """A page of users with the volunteer role. Raises ValueError for bad fields or cursors."""
+    names = parse_fields(fields, ROSTER_FIELDS)
+    sort_expr = ROSTER_SORTS[sort]
+
+    query = select(
+        UserDB.id.label("user_id"),
+        sort_expr.label("sort_value"),
+        *(ROSTER_FIELDS[f].label(f) for f in names)
+    ).where(UserDB.role == VOLUNTEER_ROLE)
+    skill_filter = _skill_filter(UserDB.skills_normalized, skills)
+    if skill_filter is not None:
+        query = query.where(skill_filter)
+    if tier:
+        query = query.where(UserDB.tier == tier)
+
+    return await _page(db, query, sort, sort_expr, UserDB.id, names, descending, limit, cursor)
+
+
+async def list_activity_volunteers(
+    db: AsyncSession,
+    activity_id: UUID,
+    sort: str = "applied_at",
+    descending: bool = False,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    statuses: Optional[List[str]] = None,
+    skills: Optional[List[str]] = None,
+    fields: Optional[str] = None
+) -> dict:
+    """A page of an activity's volunteer registrations. Raises ValueError for bad fields or cursors."""
+    names = parse_fields(fields, ACTIVITY_VOLUNTEER_FIELDS)
+    sort_expr = ACTIVITY_VOLUNTEER_SORTS[sort]
+
+    query = (
+        select(
+            VolunteerDB.user_id.label("user_id"),
+            sort_expr.label("sort_value"),
+            *(ACTIVITY_VOLUNTEER_FIELDS[f].label(f) for f in names)
+        )
+        .join(UserDB, VolunteerDB.user_id == UserDB.id)
+        .where(VolunteerDB.activity_id == activity_id)
+    )
+    if statuses:
+        query = query.where(VolunteerDB.status.in_(statuses))
+    # Filter on the skills offered for this activity, which is what the list
+    # shows, normalized in SQL the same way as users.skills_normalized
+    skill_filter = _skill_filter(func.normalize_skills(VolunteerDB.skills_offered, type_=ARRAY(String)), skills)
+    if skill_filter is not None:
+        query = query.where(skill_filter)
+
+    return await _page(db, query, sort, sort_expr, VolunteerDB.user_id, names, descending, limit, cursor)
@@ -0,0 +1,163 @@
+import heapq
+from datetime import datetime
+from typing import List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import select, func, literal, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.activity import ActivityDB
+from ..models.booking import BookingDB
+from ..models.volunteer import VolunteerDB
+
+
+def activity_range():
+    """Half-open [start_time, end_time) range, matching ix_activities_time_range."""
+    return func.tsrange(ActivityDB.start_time, ActivityDB.end_time)
+
+
+def _schedule_query(user_id: Optional[UUID], start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """Union of confirmed bookings and active volunteer shifts, of one user or everyone."""
+    booked = (
+        select(
+            BookingDB.user_id.label("user_id"),
+            ActivityDB.id.label("activity_id"),
+            ActivityDB.title.label("title"),
+            ActivityDB.start_time.label("start_time"),
+            ActivityDB.end_time.label("end_time"),
+            literal("booking").label("kind")
+        )
+        .join(BookingDB, BookingDB.activity_id == ActivityDB.id)
+        .where(BookingDB.status == "confirmed")
+    )
+    volunteering = (
+        select(
+            VolunteerDB.user_id.label("user_id"),
+            ActivityDB.id.label("activity_id"),
+            ActivityDB.title.label("title"),
+            ActivityDB.start_time.label("start_time"),
+            ActivityDB.end_time.label("end_time"),
+            literal("volunteer").label("kind")
+        )
+        .join(VolunteerDB, VolunteerDB.activity_id == ActivityDB.id)
+        .where(VolunteerDB.status != "withdrawn")
+    )
+
+    if user_id is not None:
+        booked = booked.where(BookingDB.user_id == user_id)
+        volunteering = volunteering.where(VolunteerDB.user_id == user_id)
+
+    if start is not None or end is not None:
+        window = func.tsrange(start, end)
+        booked = booked.where(activity_range().op("&&")(window))
+        volunteering = volunteering.where(activity_range().op("&&")(window))
+
+    return union_all(booked, volunteering)
+
+
+def _entry(row) -> dict:
+    return {
+        "activity_id": str(row.activity_id),
+        "title": row.title,
+        "start_time": row.start_time,
+        "end_time": row.end_time,
+        "kind": row.kind
+    }
+
+
+async def get_user_schedule(
+    db: AsyncSession,
+    user_id: UUID,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> List[dict]:
+    """All bookings and volunteer shifts of a user, optionally limited to a window."""
+    query = _schedule_query(user_id, start, end)
+    result = await db.execute(query.order_by("start_time"))
+    return [_entry(row) for row in result.all()]
+
+
+async def lock_user_schedule(db: AsyncSession, user_id: UUID):
+    """
+    Serialize schedule changes of one user until the transaction ends.
+
+    Take this before find_conflicts and keep the insert in the same
+    transaction, so two concurrent requests for overlapping activities can't
+    both pass the check.
+    """
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(str(user_id)))))
+
+
+async def find_conflicts(
+    db: AsyncSession,
+    user_id: UUID,
+    start_time: datetime,
+    end_time: datetime,
+    exclude_activity_id: Optional[UUID] = None
+) -> List[dict]:
+    """Bookings and shifts of the user that overlap [start_time, end_time)."""
+    entries = await get_user_schedule(db, user_id, start_time, end_time)
+    if exclude_activity_id is not None:
+        entries = [e for e in entries if e["activity_id"] != str(exclude_activity_id)]
+    return entries
+
+
+def busy_users_query(start_time: datetime, end_time: datetime):
+    """Ids of everyone with a booking or shift overlapping [start_time, end_time)."""
+    schedule = _schedule_query(None, start_time, end_time).subquery()
+    return select(schedule.c.user_id).distinct()
+
+
+async def busy_user_ids(
+    db: AsyncSession,
+    start_time: datetime,
+    end_time: datetime
+) -> Set[UUID]:
+    """
+    Everyone with a booking or shift overlapping [start_time, end_time), in
+    one query. Includes people already on the activity occupying that slot.
+    """
+    result = await db.execute(busy_users_query(start_time, end_time))
+    return set(result.scalars().all())
+
+
+async def get_schedules_between(db: AsyncSession, start: datetime, end: datetime) -> List[tuple]:
+    """(user_id, start_time, end_time) of every booking and shift overlapping [start, end)."""
+    schedule = _schedule_query(None, start, end).subquery()
+    result = await db.execute(select(schedule.c.user_id, schedule.c.start_time, schedule.c.end_time))
+    return [tuple(row) for row in result.all()]
+
+
+def overlaps(a: dict, b: dict) -> bool:
+    return a["start_time"] < b["end_time"] and b["start_time"] < a["end_time"]
+
+
+def scan_conflicts(entries: List[dict]) -> List[dict]:
+    """
+    Sweep-line over schedule entries, returning every overlapping pair.
+
+    Runs in O(n log n + k) for n entries and k conflicts. Entries for the
+    same activity (e.g. booked and volunteering) are not reported.
+    """
+    ordered = sorted(entries, key=lambda e: (e["start_time"], e["end_time"]))
+    active = []  # heap of (end_time, index into ordered)
+    conflicts = []
+
+    for i, entry in enumerate(ordered):
+        while active and active[0][0] <= entry["start_time"]:
+            heapq.heappop(active)
+        for _, j in active:
+            other = ordered[j]
+            if other["activity_id"] != entry["activity_id"]:
+                conflicts.append({"first": other, "second": entry})
+        heapq.heappush(active, (entry["end_time"], i))
+
+    return conflicts
+
+
+def serialize_entry(entry: dict) -> dict:
+    return {
+        **entry,
+        "start_time": entry["start_time"].isoformat() if entry["start_time"] else None,
+        "end_time": entry["end_time"].isoformat() if entry["end_time"] else None
+    }
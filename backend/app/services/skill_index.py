@@ -0,0 +1,333 @@
+"""
+Process-local inverted index of volunteer skills.
+
+Every volunteer gets a slot number; each normalized skill maps to a Python
+int used as a bitset over slots. AND/OR queries are a handful of big-int
+operations and overlap ranking adds the bitsets with a bit-sliced counter,
+so multi-skill lookups take microseconds instead of a scan over all users.
+
+The index is loaded in the app lifespan and kept current from ORM commits
+(see `_collect_changes`). Writes that bypass the ORM, such as migration
+scripts or other worker processes, are caught by `check_consistency`, which
+`SkillIndexChecker` runs periodically with repair on.
+"""
+
+import asyncio
+import heapq
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import String, any_, bindparam, event, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..db import async_session_maker
+from ..models.user import UserDB, normalize_skill, normalize_skills
+
+VOLUNTEER_ROLE = "volunteer"
+
+
+def _iter_bits(bits: int):
+    """Positions of the set bits, lowest first"""
+    # Scanning the binary string runs in C; repeated big-int masking is
+    # O(size) per bit and dominated queries over large rosters.
+    digits = bin(bits)[:1:-1]
+    i = digits.find("1")
+    while i != -1:
+        yield i
+        i = digits.find("1", i + 1)
+
+
+class SkillIndex:
+    def __init__(self):
+        self._reset()
+        self.ready = False
+        self.loaded_at: Optional[datetime] = None
+        self._pending: Optional[List[Dict[UUID, Optional[List[str]]]]] = None
+
+    def _reset(self):
+        self._slots: Dict[UUID, int] = {}
+        self._ids: List[Optional[UUID]] = []
+        self._keys: List[int] = []  # UUID.int per slot, sorts like Postgres uuid ordering
+        self._skills: List[frozenset] = []
+        self._free: List[int] = []
+        self._postings: Dict[str, int] = {}
+
+    # --- Maintenance ---
+
+    def _set(self, user_id: UUID, skills: Optional[Iterable[str]]):
+        """Index a volunteer's normalized skills, or drop them when `skills` is None"""
+        slot = self._slots.get(user_id)
+        if slot is not None:
+            bit = 1 << slot
+            for skill in self._skills[slot]:
+                remaining = self._postings[skill] & ~bit
+                if remaining:
+                    self._postings[skill] = remaining
+                else:
+                    del self._postings[skill]
+
+        if skills is None:
+            if slot is not None:
+                del self._slots[user_id]
+                self._ids[slot] = None
+                self._skills[slot] = frozenset()
+                self._free.append(slot)
+            return
+
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+                self._ids[slot] = user_id
+                self._keys[slot] = user_id.int
+            else:
+                slot = len(self._ids)
+                self._ids.append(user_id)
+                self._keys.append(user_id.int)
+                self._skills.append(frozenset())
+            self._slots[user_id] = slot
+
+        bit = 1 << slot
+        self._skills[slot] = frozenset(skills)
+        for skill in self._skills[slot]:
+            self._postings[skill] = self._postings.get(skill, 0) | bit
+
+    def apply(self, changes: Dict[UUID, Optional[List[str]]]):
+        """Apply committed changes: user id -> normalized skills, or None if no longer a volunteer"""
+        if self._pending is not None:
+            self._pending.append(changes)
+        for user_id, skills in changes.items():
+            self._set(user_id, skills)
+
+    async def load(self):
+        """(Re)build the index from the database"""
+        self._pending = []
+        try:
+            async with async_session_maker() as session:
+                result = await session.stream(
+                    select(UserDB.id, UserDB.skills_normalized)
+                    .where(UserDB.role == VOLUNTEER_ROLE)
+                    .execution_options(yield_per=1000)
+                )
+                rows = [(user_id, skills or []) async for user_id, skills in result]
+
+            self._reset()
+            for user_id, skills in rows:
+                self._set(user_id, skills)
+            # Replay commits that landed while the snapshot was being read
+            for changes in self._pending:
+                for user_id, skills in changes.items():
+                    self._set(user_id, skills)
+        finally:
+            self._pending = None
+
+        self.ready = True
+        self.loaded_at = datetime.utcnow()
+
+    # --- Queries ---
+
+    def _bitsets(self, skills: Iterable[str]) -> List[int]:
+        return [self._postings.get(normalize_skill(s), 0) for s in {normalize_skill(s) for s in skills}]
+
+    def _ids_of(self, bits: int, limit: Optional[int] = None) -> List[UUID]:
+        """Ids in a bitset in uuid order, only the first `limit` if given"""
+        slots = _iter_bits(bits)
+        if limit is None:
+            ordered = sorted(slots, key=self._keys.__getitem__)
+        else:
+            ordered = heapq.nsmallest(limit, slots, key=self._keys.__getitem__)
+        return [self._ids[slot] for slot in ordered]
+
+    def match_all(self, skills: Iterable[str]) -> List[UUID]:
+        """Volunteers having every one of `skills`"""
+        bitsets = self._bitsets(skills)
+        if not bitsets:
+            return []
+        bits = bitsets[0]
+        for b in bitsets[1:]:
+            bits &= b
+        return self._ids_of(bits)
+
+    def match_any(self, skills: Iterable[str]) -> List[UUID]:
+        """Volunteers having at least one of `skills`"""
+        bits = 0
+        for b in self._bitsets(skills):
+            bits |= b
+        return self._ids_of(bits)
+
+    def rank(self, skills: Iterable[str], require_all: bool = False, limit: Optional[int] = None) -> List[Tuple[UUID, int]]:
+        """
+        (user id, matching skill count) ordered by count desc then id.
+
+        The posting bitsets are summed with a ripple-carry adder over bit
+        planes, so plane i holds bit i of every volunteer's match count.
+        Groups are then read off from the highest count down, stopping once
+        `limit` volunteers are collected.
+        """
+        bitsets = self._bitsets(skills)
+        planes: List[int] = []
+        matched = 0
+        for carry in bitsets:
+            matched |= carry
+            for i in range(len(planes)):
+                planes[i], carry = planes[i] ^ carry, planes[i] & carry
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+
+        ranked: List[Tuple[UUID, int]] = []
+        lowest = len(bitsets) if require_all else 1
+        for count in range(len(bitsets), lowest - 1, -1):
+            group = matched
+            for i, plane in enumerate(planes):
+                group &= plane if count >> i & 1 else ~plane
+            remaining = None if limit is None else limit - len(ranked)
+            ranked.extend((user_id, count) for user_id in self._ids_of(group, remaining))
+            if limit is not None and len(ranked) >= limit:
+                break
+        return ranked
+
+    def top_k(self, skills: Iterable[str], k: int) -> List[Tuple[UUID, int]]:
+        return self.rank(skills, limit=k)
+
+    # --- Introspection ---
+
+    def stats(self) -> dict:
+        postings_bytes = sum(sys.getsizeof(bits) for bits in self._postings.values())
+        slot_bytes = (
+            sys.getsizeof(self._ids) + sys.getsizeof(self._keys) + sys.getsizeof(self._skills)
+            + sum(sys.getsizeof(s) for s in self._skills) + sys.getsizeof(self._slots)
+        )
+        return {
+            "ready": self.ready,
+            "loaded_at": self.loaded_at,
+            "volunteers": len(self._slots),
+            "slots": len(self._ids),
+            "free_slots": len(self._free),
+            "skills": len(self._postings),
+            "postings_bytes": postings_bytes,
+            "slot_bytes": slot_bytes,
+            "total_bytes": postings_bytes + slot_bytes + sys.getsizeof(self._postings)
+        }
+
+    async def check_consistency(self, db: AsyncSession, repair: bool = False) -> dict:
+        """Compare the index with the users table; optionally rebuild if they differ"""
+        result = await db.stream(
+            select(UserDB.id, UserDB.skills_normalized)
+            .where(UserDB.role == VOLUNTEER_ROLE)
+            .execution_options(yield_per=1000)
+        )
+        seen = set()
+        missing, stale = [], []
+        async for user_id, skills in result:
+            seen.add(user_id)
+            slot = self._slots.get(user_id)
+            if slot is None:
+                missing.append(str(user_id))
+            elif self._skills[slot] != frozenset(skills or []):
+                stale.append(str(user_id))
+        extra = [str(user_id) for user_id in self._slots if user_id not in seen]
+
+        consistent = not (missing or stale or extra)
+        if repair and not consistent:
+            await self.load()
+
+        return {
+            "consistent": consistent,
+            "repaired": repair and not consistent,
+            "missing": missing[:100],
+            "stale": stale[:100],
+            "extra": extra[:100],
+            "counts": {"missing": len(missing), "stale": len(stale), "extra": len(extra)}
+        }
+
+
+skill_index = SkillIndex()
+
+
+def has_any_skill(skills: List[str]):
+    """
+    WHERE clause for volunteers with at least one of the normalized `skills`.
+
+    Answered from the skill index once it is loaded, as an id array the
+    planner probes by primary key; until then `skills_normalized && :skills`
+    on the GIN index.
+    """
+    if skill_index.ready:
+        ids = skill_index.match_any(skills)
+        return UserDB.id == any_(bindparam("skilled_ids", ids, type_=ARRAY(PG_UUID(as_uuid=True))))
+    return UserDB.skills_normalized.op("&&")(bindparam("skills", skills, type_=ARRAY(String)))
+
+
+# --- ORM hooks: changes are collected per session on flush and applied on commit ---
+
+_CHANGES_KEY = "skill_index_changes"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    changes = None
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, UserDB):
+            if changes is None:
+                changes = session.info.setdefault(_CHANGES_KEY, {})
+            is_volunteer = obj.role == VOLUNTEER_ROLE
+            changes[obj.id] = normalize_skills(obj.skills) if is_volunteer else None
+    for obj in session.deleted:
+        if isinstance(obj, UserDB):
+            if changes is None:
+                changes = session.info.setdefault(_CHANGES_KEY, {})
+            changes[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if changes:
+        skill_index.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_CHANGES_KEY, None)
+
+
+class SkillIndexChecker:
+    """
+    Runs `check_consistency(repair=True)` every `interval` seconds in the
+    background, so writes the ORM hooks never see (other processes, SQL
+    scripts) are picked up, and a failed startup load is retried.
+    """
+
+    def __init__(self, index: SkillIndex, interval: int):
+        self.index = index
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with async_session_maker() as session:
+                    report = await self.index.check_consistency(session, repair=True)
+                if report["repaired"]:
+                    print(f"[SKILL INDEX] Rebuilt after drift: {report['counts']}")
+            except Exception as e:
+                print(f"[SKILL INDEX] Consistency check failed: {e}")
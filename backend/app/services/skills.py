@@ -0,0 +1,117 @@
+import base64
+import bisect
+import json
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, func, any_, or_, and_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.user import UserDB, normalize_skill, normalize_skills
+from .skill_index import VOLUNTEER_ROLE, skill_index
+
+
+def encode_match_cursor(match_count: int, user_id: UUID) -> str:
+    payload = json.dumps({"m": match_count, "id": str(user_id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_match_cursor(cursor: str) -> Tuple[int, UUID]:
+    """Raises ValueError for malformed cursors."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(payload["m"]), UUID(payload["id"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def match_count_expr(wanted):
+    """Number of a user's normalized skills that are in `wanted`, as a correlated subquery"""
+    skills = func.unnest(UserDB.skills_normalized).table_valued("skill").render_derived()
+    return select(func.count()).select_from(skills).where(skills.c.skill == any_(wanted)).scalar_subquery()
+
+
+def _volunteer_item(row, match_count: int, wanted: set) -> dict:
+    return {
+        "id": str(row.id),
+        "name": row.name,
+        "email": row.email,
+        "phone": row.phone_number,
+        "skills": row.skills or [],
+        "matching_skills": [s for s in row.skills or [] if normalize_skill(s) in wanted],
+        "match_count": match_count,
+        "tier": row.tier
+    }
+
+
+VOLUNTEER_COLUMNS = (UserDB.id, UserDB.name, UserDB.email, UserDB.phone_number, UserDB.skills, UserDB.tier)
+
+
+async def search_volunteers_by_skills(
+    db: AsyncSession,
+    skills: List[str],
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    match: str = "any"
+) -> dict:
+    """
+    Volunteers having any (or with match="all", every one) of `skills`,
+    most matching skills first. Pages are keyset on (match count desc, id).
+
+    Ranking comes from the in-memory skill index once it is loaded, leaving
+    only a primary key lookup for the page. Until then the same ranking runs
+    in SQL: `skills_normalized && :wanted` (or `@>`) is served by the GIN
+    index and the match count is computed per candidate in the query.
+    """
+    after = decode_match_cursor(cursor) if cursor else None
+    wanted_list = normalize_skills(skills)
+    wanted_set = set(wanted_list)
+
+    if skill_index.ready:
+        ranked = skill_index.rank(wanted_list, require_all=match == "all")
+        start = 0
+        if after:
+            # ranked is sorted by (-count, id), so bisect on the same key
+            keys = [(-count, user_id.int) for user_id, count in ranked]
+            start = bisect.bisect_right(keys, (-after[0], after[1].int))
+        page = ranked[start:start + limit]
+
+        result = await db.execute(select(*VOLUNTEER_COLUMNS).where(UserDB.id.in_([user_id for user_id, _ in page])))
+        rows = {row.id: row for row in result.all()}
+        volunteers = [_volunteer_item(rows[user_id], count, wanted_set) for user_id, count in page if user_id in rows]
+
+        return {
+            "requested_skills": skills,
+            "total_found": len(ranked),
+            "volunteers": volunteers,
+            "next_cursor": encode_match_cursor(page[-1][1], page[-1][0]) if start + limit < len(ranked) else None
+        }
+
+    wanted = bindparam("wanted", wanted_list, type_=ARRAY(String))
+    match_count = match_count_expr(wanted).label("match_count")
+    operator = "@>" if match == "all" else "&&"
+
+    candidates = (
+        select(*VOLUNTEER_COLUMNS, match_count, func.count().over().label("total"))
+        .where(UserDB.role == VOLUNTEER_ROLE, UserDB.skills_normalized.op(operator)(wanted))
+        .subquery()
+    )
+    query = select(candidates).order_by(candidates.c.match_count.desc(), candidates.c.id).limit(limit + 1)
+    if after:
+        after_count, after_id = after
+        query = query.where(or_(
+            candidates.c.match_count < after_count,
+            and_(candidates.c.match_count == after_count, candidates.c.id > after_id)
+        ))
+
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "requested_skills": skills,
+        "total_found": rows[0].total if rows else 0,
+        "volunteers": [_volunteer_item(row, row.match_count, wanted_set) for row in rows],
+        "next_cursor": encode_match_cursor(rows[-1].match_count, rows[-1].id) if has_more else None
+    }
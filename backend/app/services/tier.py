@@ -1,10 +1,14 @@
 from datetime import datetime, timedelta
 from typing import Optional, Dict
+from uuid import UUID
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.user import MembershipTier
-from ..models.booking import BookingStatus
+from ..models.booking import BookingDB
 
 TIER_LIMITS: Dict[MembershipTier, Optional[int]] = {
     MembershipTier.AD_HOC: None,           # Unlimited
+    MembershipTier.WEEKLY: 1,              # Same commitment as once-a-week
     MembershipTier.ONCE_A_WEEK: 1,
     MembershipTier.TWICE_A_WEEK: 2,
     MembershipTier.THREE_PLUS_A_WEEK: None # Unlimited
@@ -27,13 +31,16 @@ def get_week_boundaries(date: datetime = None):
     
     return week_start, week_end
 
-async def get_user_weekly_booking_count(user_id: str, week_start: datetime, week_end: datetime, db) -> int:
-    count = await db.bookings.count_documents({
-        "user_id": user_id,
-        "status": BookingStatus.CONFIRMED,
-        "timestamp": {"$gte": week_start, "$lte": week_end}
-    })
-    return count
+async def get_user_weekly_booking_count(user_id: str, week_start: datetime, week_end: datetime, db: AsyncSession) -> int:
+    result = await db.execute(
+        select(func.count(BookingDB.id)).where(
+            BookingDB.user_id == UUID(user_id),
+            BookingDB.status == "confirmed",
+            BookingDB.booked_at >= week_start,
+            BookingDB.booked_at <= week_end
+        )
+    )
+    return result.scalar() or 0
 
 async def can_user_book(
     user_tier: MembershipTier,
@@ -41,7 +48,8 @@ async def can_user_book(
     activity_allowed_tiers: Optional[list[MembershipTier]],
     db
 ) -> dict:
-    # 1. Check tier eligibility
+    # 1. Check tier eligibility. ActivityDB has no allowed_tiers column, so the
+    # booking routes don't call this and only the weekly limit below is enforced.
     if activity_allowed_tiers and len(activity_allowed_tiers) > 0:
         if user_tier not in activity_allowed_tiers:
             return {
@@ -69,3 +77,14 @@ async def can_user_book(
         }
 
     return {"allowed": True, "currentCount": current_count, "limit": limit}
+
+async def get_remaining_weekly_bookings(user_tier: str, user_id: str, db: AsyncSession) -> Optional[int]:
+    """Number of bookings the user can still make this week, or None if unlimited."""
+    limit = TIER_LIMITS.get(user_tier)
+
+    if limit is None:
+        return None
+
+    week_start, week_end = get_week_boundaries()
+    current_count = await get_user_weekly_booking_count(user_id, week_start, week_end, db)
+    return max(0, limit - current_count)
@@ -0,0 +1,93 @@
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# The stats columns on users are maintained incrementally by the attendance
+# statements in services/attendance.py. This recomputes them from the
+# attendance table for one keyset batch of users and fixes any that drifted
+# (manual SQL edits, activities whose type changed after check-in, etc.).
+RECONCILE_USER_STATS = text("""
+WITH batch AS (
+    SELECT id FROM users
+    WHERE CAST(:after AS uuid) IS NULL OR id > CAST(:after AS uuid)
+    ORDER BY id
+    LIMIT :limit
+),
+actual AS (
+    SELECT
+        b.id,
+        COUNT(att.id) AS total_events,
+        COALESCE(SUM(att.hours_earned), 0) AS volunteer_hours,
+        COUNT(att.id) FILTER (WHERE a.activity_type = 'volunteer') AS volunteer_count,
+        COUNT(att.id) FILTER (WHERE a.activity_type = 'meetup') AS meetups_count
+    FROM batch b
+    LEFT JOIN attendance att ON att.user_id = b.id
+    LEFT JOIN activities a ON a.id = att.activity_id
+    GROUP BY b.id
+),
+fixed AS (
+    UPDATE users u
+    SET total_events = actual.total_events,
+        volunteer_hours = actual.volunteer_hours,
+        volunteer_count = actual.volunteer_count,
+        meetups_count = actual.meetups_count
+    FROM actual
+    WHERE u.id = actual.id
+      AND (u.total_events IS DISTINCT FROM actual.total_events
+           OR u.volunteer_hours IS DISTINCT FROM actual.volunteer_hours
+           OR u.volunteer_count IS DISTINCT FROM actual.volunteer_count
+           OR u.meetups_count IS DISTINCT FROM actual.meetups_count)
+    RETURNING u.id
+)
+SELECT
+    (SELECT COUNT(*) FROM batch) AS scanned,
+    (SELECT COUNT(*) FROM fixed) AS fixed,
+    (SELECT id FROM batch ORDER BY id DESC LIMIT 1) AS last_id
+""")
+
+
+# Same for activities.attended_count, e.g. after users were deleted directly
+# in the database and their check-ins cascaded away.
+RECONCILE_ATTENDED_COUNTS = text("""
+UPDATE activities a
+SET attended_count = actual.attended
+FROM (
+    SELECT act.id, COUNT(att.id) AS attended
+    FROM activities act
+    LEFT JOIN attendance att ON att.activity_id = act.id
+    GROUP BY act.id
+) actual
+WHERE a.id = actual.id AND a.attended_count IS DISTINCT FROM actual.attended
+""")
+
+
+async def reconcile_attended_counts(db: AsyncSession) -> int:
+    """Recompute activities.attended_count from attendance; returns how many were fixed"""
+    result = await db.execute(RECONCILE_ATTENDED_COUNTS)
+    await db.commit()
+    return result.rowcount
+
+
+async def reconcile_user_stats(db: AsyncSession, batch_size: int = 500) -> dict:
+    """
+    Recompute stored user stats from attendance, one batch per transaction.
+
+    Returns how many users were scanned and how many had drifted.
+    """
+    scanned = fixed = 0
+    after: Optional[UUID] = None
+
+    while True:
+        result = await db.execute(RECONCILE_USER_STATS, {"after": after, "limit": batch_size})
+        row = result.one()
+        await db.commit()
+
+        scanned += row.scanned
+        fixed += row.fixed
+        if row.scanned < batch_size:
+            break
+        after = row.last_id
+
+    return {"scanned": scanned, "fixed": fixed}
@@ -0,0 +1,133 @@
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .crisis import crisis_snapshots
+
+# Inserts the registration and bumps activities.volunteers_registered in one
+# round-trip. The unique constraint on (activity_id, user_id) turns a second
+# sign-up into a no-op, so concurrent requests can neither double-register nor
+# lose an increment. A withdrawn registration is reactivated instead.
+REGISTER_VOLUNTEER = text("""
+WITH ins AS (
+    INSERT INTO event_volunteers (id, user_id, activity_id, role, status, applied_at, skills_offered)
+    SELECT gen_random_uuid(), CAST(:user_id AS uuid), a.id, :role, :status, CAST(:applied_at AS timestamp), CAST(:skills_offered AS varchar[])
+    FROM activities a
+    WHERE a.id = CAST(:activity_id AS uuid)
+    ON CONFLICT (activity_id, user_id) DO UPDATE
+    SET status = EXCLUDED.status,
+        role = EXCLUDED.role,
+        applied_at = EXCLUDED.applied_at,
+        skills_offered = EXCLUDED.skills_offered
+    WHERE event_volunteers.status = 'withdrawn'
+    RETURNING id, status
+),
+cnt AS (
+    UPDATE activities
+    SET volunteers_registered = COALESCE(volunteers_registered, 0) + 1
+    WHERE id = CAST(:activity_id AS uuid) AND EXISTS (SELECT 1 FROM ins)
+    RETURNING volunteers_registered
+)
+SELECT
+    (SELECT id FROM ins) AS volunteer_id,
+    (SELECT status FROM ins) AS status,
+    (SELECT volunteers_registered FROM cnt) AS volunteers_registered
+""")
+
+# Reverse of REGISTER_VOLUNTEER. The row is kept with status 'withdrawn' so the
+# application and any form responses stay on record.
+WITHDRAW_VOLUNTEER = text("""
+WITH upd AS (
+    UPDATE event_volunteers
+    SET status = 'withdrawn'
+    WHERE activity_id = CAST(:activity_id AS uuid)
+      AND user_id = CAST(:user_id AS uuid)
+      AND status <> 'withdrawn'
+    RETURNING id
+),
+cnt AS (
+    UPDATE activities
+    SET volunteers_registered = GREATEST(COALESCE(volunteers_registered, 0) - 1, 0)
+    WHERE id = CAST(:activity_id AS uuid) AND EXISTS (SELECT 1 FROM upd)
+    RETURNING volunteers_registered
+)
+SELECT
+    (SELECT id FROM upd) AS volunteer_id,
+    (SELECT volunteers_registered FROM cnt) AS volunteers_registered
+""")
+
+# Recomputes every activity's volunteers_registered from event_volunteers in
+# one statement, touching only the rows that drifted.
+RECOUNT_VOLUNTEERS = text("""
+UPDATE activities a
+SET volunteers_registered = COALESCE(counts.total, 0)
+FROM activities a2
+LEFT JOIN (
+    SELECT activity_id, COUNT(*) AS total
+    FROM event_volunteers
+    WHERE status <> 'withdrawn'
+    GROUP BY activity_id
+) counts ON counts.activity_id = a2.id
+WHERE a.id = a2.id
+  AND a.volunteers_registered IS DISTINCT FROM COALESCE(counts.total, 0)
+""")
+
+
+async def register_volunteer(
+    db: AsyncSession,
+    activity_id: UUID,
+    user_id: UUID,
+    role: str = "Volunteer",
+    skills_offered: Optional[List[str]] = None,
+    status: str = "confirmed"
+) -> dict:
+    """
+    Register a volunteer for an activity and commit.
+
+    `volunteer_id` is None when the user already has an active registration
+    (or the activity doesn't exist).
+    """
+    result = await db.execute(REGISTER_VOLUNTEER, {
+        "activity_id": activity_id,
+        "user_id": user_id,
+        "role": role,
+        "status": status,
+        "applied_at": datetime.utcnow(),
+        "skills_offered": skills_offered or []
+    })
+    row = result.one()
+    await db.commit()
+    if row.volunteer_id is not None:
+        crisis_snapshots.invalidate()
+
+    return {
+        "volunteer_id": row.volunteer_id,
+        "status": row.status,
+        "volunteers_registered": row.volunteers_registered
+    }
+
+
+async def withdraw_volunteer(db: AsyncSession, activity_id: UUID, user_id: UUID) -> dict:
+    """Withdraw an active registration and commit; `withdrawn` is False if there was none."""
+    result = await db.execute(WITHDRAW_VOLUNTEER, {"activity_id": activity_id, "user_id": user_id})
+    row = result.one()
+    await db.commit()
+    if row.volunteer_id is not None:
+        crisis_snapshots.invalidate()
+
+    return {
+        "withdrawn": row.volunteer_id is not None,
+        "volunteers_registered": row.volunteers_registered
+    }
+
+
+async def reconcile_volunteer_counts(db: AsyncSession) -> int:
+    """Fix activities.volunteers_registered wherever it drifted; returns the number of activities updated"""
+    result = await db.execute(RECOUNT_VOLUNTEERS)
+    await db.commit()
+    if result.rowcount:
+        crisis_snapshots.invalidate()
+    return result.rowcount
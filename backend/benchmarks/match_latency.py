@@ -0,0 +1,170 @@
+"""
+Volunteer matching latency and prompt-size benchmark.
+
+Builds synthetic rosters of increasing size in memory, then times the local
+ranking stage (services/matching.py) and measures the rerank prompt that
+would be sent to the model: the whole roster vs the top-K shortlist. With
+--live and an admin API key configured, the shortlist is also sent to the
+model once per roster size to record real latency and token usage.
+
+No database is needed; DATABASE_URL only has to be set for the app imports.
+
+Usage (from the backend/ directory):
+
+    python -m benchmarks.match_latency --sizes 100 1000 5000 20000 --top-k 20
+
+    python -m benchmarks.match_latency --live --sizes 1000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from app.services import ai as ai_service
+from app.services.matching import build_roster, rank_volunteers
+
+from .booking_load import SKILLS, TIERS, git_revision
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+ACTIVITY_TYPES = ["volunteer", "meetup", "workshop"]
+# Rough English average for Gemini-family tokenizers; only used when no live count is available
+CHARS_PER_TOKEN = 4
+
+Volunteer = namedtuple("Volunteer", "id name skills skills_normalized tier phone_number")
+
+
+def synthetic_roster(size: int, rng: random.Random):
+    volunteers = [
+        Volunteer(
+            id=uuid.UUID(int=rng.getrandbits(128)),
+            name=f"Volunteer {i}",
+            skills=rng.sample(SKILLS, rng.randint(0, 4)),
+            skills_normalized=None,
+            tier=rng.choice(TIERS),
+            phone_number=f"+65 9{i:07d}"
+        )
+        for i in range(size)
+    ]
+    history = [
+        (vol.id, rng.choice(ACTIVITY_TYPES), rng.randint(1, 20), rng.randint(0, 40))
+        for vol in volunteers
+        if rng.random() < 0.6
+    ]
+    return volunteers, history
+
+
+def synthetic_activity(rng: random.Random) -> Dict:
+    return {
+        "title": "Benchmark Cleanup",
+        "skills_required": rng.sample(SKILLS, 2),
+        "activity_type": "volunteer",
+        "start_time": datetime.utcnow() + timedelta(days=3)
+    }
+
+
+def _ms(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3) if len(ordered) >= 20 else None,
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+
+def prompt_size(activity: Dict, candidates: List[Dict]) -> Dict:
+    prompt = ai_service.build_rerank_prompt(activity, candidates)
+    return {"candidates": len(candidates), "chars": len(prompt), "est_tokens": len(prompt) // CHARS_PER_TOKEN}
+
+
+async def live_rerank(activity: Dict, shortlist: List[Dict]) -> Dict:
+    started = time.perf_counter()
+    _, reranked, usage = await ai_service.rerank_volunteers(activity, shortlist)
+    return {"latency_ms": round((time.perf_counter() - started) * 1000, 1), "reranked": reranked, "token_usage": usage}
+
+
+async def run_size(size: int, args, rng: random.Random) -> Dict:
+    volunteers, history = synthetic_roster(size, rng)
+
+    started = time.perf_counter()
+    roster = build_roster(volunteers, history)
+    build_seconds = time.perf_counter() - started
+
+    activity = synthetic_activity(rng)
+    rank_samples = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        shortlist = rank_volunteers(roster, activity, limit=args.top_k)
+        rank_samples.append(time.perf_counter() - started)
+
+    everyone = rank_volunteers(roster, activity, limit=None)
+    result = {
+        "volunteers": size,
+        "build_ms": round(build_seconds * 1000, 3),
+        "rank": _ms(rank_samples),
+        "prompt_all": prompt_size(activity, everyone),
+        "prompt_top_k": prompt_size(activity, shortlist),
+    }
+    if args.live:
+        result["live"] = await live_rerank(activity, shortlist)
+    return result
+
+
+def save_results(results: Dict) -> Path:
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = RESULTS_DIR / f"match_latency_{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    path.write_text(json.dumps(results, indent=2))
+    return path
+
+
+def print_report(results: Dict):
+    print(f"\n{'volunteers':>10}{'build':>10}{'rank p50':>10}{'all tok':>10}{'top-k tok':>11}{'live ms':>9}{'live tok':>10}")
+    for row in results["sizes"]:
+        live = row.get("live") or {}
+        usage = live.get("token_usage") or {}
+        print(
+            f"{row['volunteers']:>10}{row['build_ms']:>10}{row['rank']['p50_ms']:>10}"
+            f"{row['prompt_all']['est_tokens']:>10}{row['prompt_top_k']['est_tokens']:>11}"
+            f"{live.get('latency_ms', '-'):>9}{usage.get('total_tokens', '-'):>10}"
+        )
+
+
+async def main(args):
+    if args.live and not ai_service.admin_client:
+        raise SystemExit("--live needs ADMIN_GOOGLE_GENERATIVE_AI_API_KEY to be set")
+
+    rng = random.Random(args.seed)
+    results = {
+        "started_at": datetime.utcnow().isoformat(),
+        "git_revision": git_revision(),
+        "config": {"top_k": args.top_k, "repeat": args.repeat, "live": args.live},
+        "sizes": [],
+    }
+    for size in args.sizes:
+        print(f"Roster of {size} volunteers...")
+        results["sizes"].append(await run_size(size, args, rng))
+
+    path = save_results(results)
+    print_report(results)
+    print(f"\nResults written to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark volunteer matching latency and rerank prompt size")
+    parser.add_argument("--sizes", nargs="*", type=int, default=[100, 1000, 5000, 20000])
+    parser.add_argument("--top-k", type=int, default=20, help="Shortlist size sent to the model")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed rankings per roster size")
+    parser.add_argument("--live", action="store_true", help="Also send each shortlist to the model once")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible rosters")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,84 @@
+import asyncio
+from sqlalchemy import text
+from app.db import engine
+
+# Moves attendance off the legacy activities.attendees array: adds the
+# attended_count column, removes duplicate check-ins and adds the
+# (activity_id, user_id) unique constraint, backfills attendance rows for ids
+# that only exist in the array, then recomputes attended_count from the
+# attendance table. Safe to run repeatedly.
+
+ADD_COLUMN = "ALTER TABLE activities ADD COLUMN IF NOT EXISTS attended_count INTEGER DEFAULT 0"
+
+# Keep the earliest check-in per (activity, user)
+DEDUPE = """
+DELETE FROM attendance
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY activity_id, user_id ORDER BY check_in_time, id
+        ) AS rn
+        FROM attendance
+    ) ranked
+    WHERE ranked.rn > 1
+)
+"""
+
+ADD_UNIQUE = """
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_attendance_activity_user') THEN
+        ALTER TABLE attendance ADD CONSTRAINT uq_attendance_activity_user UNIQUE (activity_id, user_id);
+    END IF;
+END $$
+"""
+
+BACKFILL = """
+INSERT INTO attendance (id, user_id, activity_id, check_in_time, hours_earned)
+SELECT DISTINCT ON (a.id, u.id)
+    gen_random_uuid(),
+    u.id,
+    a.id,
+    a.start_time,
+    COALESCE(NULLIF(TRUNC(EXTRACT(EPOCH FROM (a.end_time - a.start_time)) / 3600)::int, 0), 2)
+FROM activities a
+CROSS JOIN LATERAL unnest(a.attendees) AS legacy(user_id)
+JOIN users u ON u.id::text = legacy.user_id
+ON CONFLICT (activity_id, user_id) DO NOTHING
+"""
+
+RECOUNT = """
+UPDATE activities a
+SET attended_count = COALESCE(counts.total, 0)
+FROM activities a2
+LEFT JOIN (
+    SELECT activity_id, COUNT(*) AS total
+    FROM attendance
+    GROUP BY activity_id
+) counts ON counts.activity_id = a2.id
+WHERE a.id = a2.id
+  AND a.attended_count IS DISTINCT FROM COALESCE(counts.total, 0)
+"""
+
+async def migrate_attendance():
+    async with engine.begin() as conn:
+        print("Adding attended_count column...")
+        await conn.execute(text(ADD_COLUMN))
+
+        print("Removing duplicate check-ins...")
+        result = await conn.execute(text(DEDUPE))
+        print(f"{result.rowcount} duplicate attendance rows removed.")
+
+        print("Adding unique (activity_id, user_id) constraint...")
+        await conn.execute(text(ADD_UNIQUE))
+
+        print("Backfilling attendance from legacy attendees arrays...")
+        result = await conn.execute(text(BACKFILL))
+        print(f"{result.rowcount} attendance rows backfilled.")
+
+        print("Recomputing attended_count...")
+        result = await conn.execute(text(RECOUNT))
+        print(f"{result.rowcount} activities updated.")
+
+if __name__ == "__main__":
+    asyncio.run(migrate_attendance())
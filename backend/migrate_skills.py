@@ -0,0 +1,34 @@
+import asyncio
+from sqlalchemy import text
+from app.db import engine
+from app.models.user import SKILLS_NORMALIZED_DDL
+
+# Adds users.skills_normalized (lowercased, whitespace collapsed, deduplicated
+# and sorted copy of users.skills), the normalize_skills() SQL function and
+# the trigger that keeps the column in sync on every insert or update of
+# skills, whoever writes it, then backfills existing rows. Run add_indexes.py
+# afterwards for the GIN index. Safe to run repeatedly.
+
+ADD_COLUMN = "ALTER TABLE users ADD COLUMN IF NOT EXISTS skills_normalized VARCHAR[] DEFAULT '{}'"
+
+BACKFILL = """
+UPDATE users
+SET skills_normalized = normalize_skills(skills)
+WHERE skills_normalized IS DISTINCT FROM normalize_skills(skills)
+"""
+
+async def migrate_skills():
+    async with engine.begin() as conn:
+        print("Adding skills_normalized column...")
+        await conn.execute(text(ADD_COLUMN))
+
+        print("Installing normalize_skills() and the sync trigger...")
+        for statement in SKILLS_NORMALIZED_DDL:
+            await conn.execute(text(statement))
+
+        print("Backfilling normalized skills...")
+        result = await conn.execute(text(BACKFILL))
+        print(f"{result.rowcount} users updated.")
+
+if __name__ == "__main__":
+    asyncio.run(migrate_skills())
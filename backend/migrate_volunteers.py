@@ -0,0 +1,50 @@
+import asyncio
+from sqlalchemy import text
+from app.db import engine
+from app.services.volunteering import RECOUNT_VOLUNTEERS
+
+# Prepares event_volunteers for atomic registration: removes duplicate
+# registrations, adds the (activity_id, user_id) unique constraint that
+# INSERT ... ON CONFLICT relies on, then recomputes
+# activities.volunteers_registered. Safe to run repeatedly.
+
+# Keep one row per (activity, user), preferring an active registration and
+# then the earliest application
+DEDUPE = """
+DELETE FROM event_volunteers
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY activity_id, user_id
+            ORDER BY (status = 'withdrawn'), applied_at, id
+        ) AS rn
+        FROM event_volunteers
+    ) ranked
+    WHERE ranked.rn > 1
+)
+"""
+
+ADD_UNIQUE = """
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_event_volunteers_activity_user') THEN
+        ALTER TABLE event_volunteers ADD CONSTRAINT uq_event_volunteers_activity_user UNIQUE (activity_id, user_id);
+    END IF;
+END $$
+"""
+
+async def migrate_volunteers():
+    async with engine.begin() as conn:
+        print("Removing duplicate volunteer registrations...")
+        result = await conn.execute(text(DEDUPE))
+        print(f"{result.rowcount} duplicate registrations removed.")
+
+        print("Adding unique (activity_id, user_id) constraint...")
+        await conn.execute(text(ADD_UNIQUE))
+
+        print("Recomputing volunteers_registered...")
+        result = await conn.execute(RECOUNT_VOLUNTEERS)
+        print(f"{result.rowcount} activities updated.")
+
+if __name__ == "__main__":
+    asyncio.run(migrate_volunteers())
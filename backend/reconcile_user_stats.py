@@ -0,0 +1,28 @@
+import asyncio
+from app.db import async_session_maker
+from app.services.user_stats import reconcile_attended_counts, reconcile_user_stats
+from app.services.achievements import reevaluate_achievements
+
+# Recomputes users.total_events / volunteer_count / meetups_count /
+# volunteer_hours, activities.attended_count and achievement progress from the
+# attendance table. Run once after deploying the incremental stats, after
+# changing achievement rules, after deleting users directly in the database
+# (their check-ins cascade away past the counters) and any time drift is
+# suspected. Safe to run repeatedly.
+
+async def main():
+    async with async_session_maker() as session:
+        print("Reconciling user stats...")
+        result = await reconcile_user_stats(session)
+        print(f"{result['scanned']} users scanned, {result['fixed']} updated.")
+
+        print("Reconciling activity attendance counts...")
+        fixed = await reconcile_attended_counts(session)
+        print(f"{fixed} activities updated.")
+
+        print("Re-evaluating achievements...")
+        result = await reevaluate_achievements(session)
+        print(f"{result['scanned']} users scanned, {result['updated']} updated.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,178 @@
+import itertools
+import random
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.models.user import normalize_skills
+from app.services.assignment import WEEKLY_LIMITS, MinCostFlow, plan_assignments
+from app.services.matching import build_roster, score_matrix
+
+SKILLS = ["First Aid", "Driving", "Cooking", "Teaching"]
+TIERS = ["ad-hoc", "weekly", "once-a-week", "twice-a-week", "three-plus-a-week"]
+
+
+def _brute_force_flow(supply, demand, edges):
+    """Best (flow, cost) over every subset of unit edges volunteer -> shift"""
+    best = (0, 0)
+    for chosen in itertools.product((0, 1), repeat=len(edges)):
+        used_supply = [0] * len(supply)
+        used_demand = [0] * len(demand)
+        cost = 0
+        for take, (u, v, c) in zip(chosen, edges):
+            if take:
+                used_supply[u] += 1
+                used_demand[v] += 1
+                cost += c
+        if all(x <= cap for x, cap in zip(used_supply, supply)) and all(x <= cap for x, cap in zip(used_demand, demand)):
+            flow = sum(chosen)
+            if flow > best[0] or (flow == best[0] and cost < best[1]):
+                best = (flow, cost)
+    return best
+
+
+def test_min_cost_flow_matches_brute_force():
+    rng = random.Random(3)
+    for _ in range(150):
+        supply = [rng.randint(0, 2) for _ in range(rng.randint(1, 4))]
+        demand = [rng.randint(0, 2) for _ in range(rng.randint(1, 3))]
+        pairs = [(u, v) for u in range(len(supply)) for v in range(len(demand)) if rng.random() < 0.7]
+        edges = [(u, v, rng.randint(0, 20)) for u, v in pairs]
+
+        source, sink = 0, 1
+        network = MinCostFlow(2 + len(supply) + len(demand))
+        for u, cap in enumerate(supply):
+            network.add_edge(source, 2 + u, cap, 0)
+        for v, cap in enumerate(demand):
+            network.add_edge(2 + len(supply) + v, sink, cap, 0)
+        for u, v, cost in edges:
+            network.add_edge(2 + u, 2 + len(supply) + v, 1, cost)
+
+        assert network.solve(source, sink) == _brute_force_flow(supply, demand, edges)
+
+
+def test_residual_capacity_shows_the_chosen_edges():
+    network = MinCostFlow(4)
+    network.add_edge(0, 1, 1, 0)
+    cheap = network.add_edge(1, 3, 1, 1)
+    network.add_edge(0, 2, 1, 0)
+    expensive = network.add_edge(2, 3, 1, 5)
+
+    assert network.solve(0, 3) == (2, 6)
+    assert network.residual(cheap) == 0 and network.residual(expensive) == 0
+
+
+def _scenario(rng):
+    volunteers = []
+    for i in range(4):
+        skills = rng.sample(SKILLS, k=rng.randint(0, 2))
+        volunteers.append(SimpleNamespace(
+            id=uuid.uuid4(),
+            name=f"Volunteer {i}",
+            skills=skills,
+            skills_normalized=normalize_skills(skills),
+            tier=rng.choice(TIERS),
+            phone_number=None
+        ))
+    # Shifts in the same slot all overlap each other; different slots never do,
+    # so the solver's slot grouping is exactly the overlap constraint
+    monday = datetime(2030, 1, 7, 9)
+    activities = []
+    for j in range(3):
+        slot = rng.randint(0, 1)
+        start = monday + timedelta(days=slot)
+        activities.append({
+            "id": uuid.uuid4(),
+            "title": f"Shift {j}",
+            "start_time": start,
+            "end_time": start + timedelta(hours=rng.randint(1, 3)),
+            "skills_required": rng.sample(SKILLS, k=rng.randint(0, 2)),
+            "activity_type": "volunteer",
+            "shortage": rng.randint(0, 2)
+        })
+    return volunteers, activities
+
+
+def _brute_force_plan(roster, activities, require_skills):
+    """Most seats filled, then highest total of the (rounded) scores the solver optimizes"""
+    scores = np.round(score_matrix(roster, activities)).astype(int)
+    n, a = scores.shape
+    allowed = np.ones((n, a), dtype=bool)
+    if require_skills:
+        for j, act in enumerate(activities):
+            wanted = set(normalize_skills(act["skills_required"]))
+            if wanted:
+                for i in range(n):
+                    allowed[i, j] = bool(wanted & set(normalize_skills(roster.skills[i])))
+
+    pairs = [(i, j) for i in range(n) for j in range(a) if allowed[i, j]]
+    best = (0, 0)
+    for chosen in itertools.product((0, 1), repeat=len(pairs)):
+        picked = [pair for take, pair in zip(chosen, pairs) if take]
+        per_shift = [sum(1 for _, j in picked if j == jj) for jj in range(a)]
+        if any(count > activities[j]["shortage"] for j, count in enumerate(per_shift)):
+            continue
+        feasible = True
+        for i in range(n):
+            mine = [activities[j] for ii, j in picked if ii == i]
+            limit = WEEKLY_LIMITS.get(roster.tiers[i])
+            if limit is not None and len(mine) > limit:
+                feasible = False
+                break
+            if any(x["start_time"] < y["end_time"] and y["start_time"] < x["end_time"]
+                   for x, y in itertools.combinations(mine, 2)):
+                feasible = False
+                break
+        if feasible:
+            candidate = (len(picked), sum(int(scores[i, j]) for i, j in picked))
+            best = max(best, candidate)
+    return best
+
+
+def test_plan_assignments_is_optimal_on_small_cases():
+    rng = random.Random(5)
+    for trial in range(40):
+        volunteers, activities = _scenario(rng)
+        roster = build_roster(volunteers)
+        require_skills = trial % 2 == 0
+
+        plan = plan_assignments(roster, activities, require_skills=require_skills)
+
+        items = [(item, act) for items, act in zip(plan["assignments"], activities) for item in items]
+        total = sum(int(round(item["score"])) for item, _ in items)
+        assert (plan["filled"], total) == _brute_force_plan(roster, activities, require_skills)
+        # Nobody is placed on two overlapping shifts
+        by_volunteer = {}
+        for item, act in items:
+            by_volunteer.setdefault(item["volunteer_id"], []).append(act)
+        for shifts in by_volunteer.values():
+            for x, y in itertools.combinations(shifts, 2):
+                assert not (x["start_time"] < y["end_time"] and y["start_time"] < x["end_time"])
+
+
+def test_pinned_and_excluded_volunteers():
+    volunteers = [
+        SimpleNamespace(id=uuid.uuid4(), name=f"V{i}", skills=["Cooking"], skills_normalized=["cooking"],
+                        tier="ad-hoc", phone_number=None)
+        for i in range(3)
+    ]
+    roster = build_roster(volunteers)
+    start = datetime(2030, 1, 7, 9)
+    activity = {
+        "id": uuid.uuid4(), "title": "Kitchen", "start_time": start, "end_time": start + timedelta(hours=2),
+        "skills_required": ["Cooking"], "activity_type": "volunteer", "shortage": 3
+    }
+
+    plan = plan_assignments(
+        roster, [activity],
+        pinned=[(volunteers[0].id, activity["id"])],
+        excluded={volunteers[1].id}
+    )
+
+    assigned = {item["volunteer_id"]: item["pinned"] for item in plan["assignments"][0]}
+    assert assigned == {str(volunteers[0].id): True, str(volunteers[2].id): False}
+    assert plan["seats"] == 2
+    assert plan["filled"] == 1
+    assert plan["unfilled"] == [1]
@@ -0,0 +1,102 @@
+import asyncio
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import attendance
+
+
+class FakeResult:
+    def __init__(self, row):
+        self._row = row
+
+    def one(self):
+        return self._row
+
+
+class FakeSession:
+    def __init__(self, row):
+        self.row = row
+        self.params = None
+        self.committed = False
+
+    async def execute(self, statement, params=None):
+        self.params = params
+        return FakeResult(self.row)
+
+    async def commit(self):
+        self.committed = True
+
+
+def _row(activity_found=True, user_found=True, inserted=True):
+    return SimpleNamespace(
+        activity_found=activity_found,
+        user_found=user_found,
+        user_name="Vol" if user_found else None,
+        activity_type="volunteer",
+        skills_required=["First Aid"],
+        hours_earned=3 if inserted else None,
+        check_in_time=datetime(2024, 5, 1, 9) if inserted else None,
+        attended_count=7 if inserted else None
+    )
+
+
+@pytest.fixture
+def side_effects(monkeypatch):
+    calls = {"progress": [], "published": []}
+
+    async def record_achievement_progress(db, user_ids, activity_type, skills, hours, sign=1):
+        calls["progress"].append((list(user_ids), activity_type, hours, sign))
+
+    def publish_check_ins(activity_id, attendees, total_attended):
+        calls["published"].append((activity_id, attendees, total_attended))
+
+    monkeypatch.setattr(attendance, "record_achievement_progress", record_achievement_progress)
+    monkeypatch.setattr(attendance, "publish_check_ins", publish_check_ins)
+    return calls
+
+
+def test_new_check_in_updates_progress_and_publishes(side_effects):
+    activity_id, user_id = uuid.uuid4(), uuid.uuid4()
+    db = FakeSession(_row())
+
+    result = asyncio.run(attendance.record_attendance(db, activity_id, user_id))
+
+    assert result["already_attended"] is False
+    assert result["hours_earned"] == 3
+    assert result["attended_count"] == 7
+    assert db.committed
+    assert db.params["activity_id"] == activity_id and db.params["user_id"] == user_id
+    assert side_effects["progress"] == [([user_id], "volunteer", 3, 1)]
+    [(published_activity, attendees, total)] = side_effects["published"]
+    assert published_activity == activity_id and total == 7
+    assert attendees == [{
+        "user_id": str(user_id),
+        "name": "Vol",
+        "check_in_time": "2024-05-01T09:00:00",
+        "hours_earned": 3
+    }]
+
+
+def test_repeat_check_in_is_reported_without_side_effects(side_effects):
+    db = FakeSession(_row(inserted=False))
+
+    result = asyncio.run(attendance.record_attendance(db, uuid.uuid4(), uuid.uuid4()))
+
+    assert result["already_attended"] is True
+    assert result["hours_earned"] is None
+    assert side_effects == {"progress": [], "published": []}
+
+
+@pytest.mark.parametrize("activity_found, user_found", [(False, True), (True, False)])
+def test_missing_activity_or_user_is_not_already_attended(side_effects, activity_found, user_found):
+    db = FakeSession(_row(activity_found=activity_found, user_found=user_found, inserted=False))
+
+    result = asyncio.run(attendance.record_attendance(db, uuid.uuid4(), uuid.uuid4()))
+
+    assert result["activity_found"] is activity_found
+    assert result["user_found"] is user_found
+    assert result["already_attended"] is False
+    assert side_effects == {"progress": [], "published": []}
@@ -0,0 +1,117 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from app.models.activity import ActivityDB
+from app.models.booking import BookingBatchCreate
+from app.models.user import UserResponse
+from app.routers import bookings
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return list(self._rows)
+
+
+class FakeSession:
+    """Answers the batch route's three queries in order and records what it adds"""
+
+    def __init__(self, *results):
+        self._results = list(results)
+        self.added = []
+
+    async def execute(self, statement):
+        return FakeResult(self._results.pop(0))
+
+    def add_all(self, objects):
+        self.added.extend(objects)
+
+    async def commit(self):
+        for obj in self.added:
+            obj.id = obj.id or uuid.uuid4()
+
+
+def _activity(start, hours=2, capacity=20):
+    return ActivityDB(
+        id=uuid.uuid4(),
+        title="Park Cleanup",
+        description="",
+        location="East Coast Park",
+        start_time=start,
+        end_time=start + timedelta(hours=hours),
+        capacity=capacity,
+        updated_at=datetime(2030, 1, 1)
+    )
+
+
+def test_batch_booking_reports_a_status_per_item(monkeypatch):
+    monday = datetime(2030, 1, 7, 9)
+    booked = _activity(monday)
+    overlapping = _activity(monday + timedelta(hours=1))
+    already = _activity(monday + timedelta(days=1))
+    full = _activity(monday + timedelta(days=2), capacity=3)
+    clashing = _activity(monday + timedelta(days=3))
+    second = _activity(monday + timedelta(days=4))
+    over_limit = _activity(monday + timedelta(days=5))
+    missing = uuid.uuid4()
+
+    # Something else the user already has during `clashing`
+    schedule = [{
+        "activity_id": str(uuid.uuid4()),
+        "start_time": clashing.start_time + timedelta(minutes=30),
+        "end_time": clashing.end_time + timedelta(hours=1)
+    }]
+
+    async def no_lock(db, user_id):
+        pass
+
+    async def get_user_schedule(db, user_id, start, end):
+        return list(schedule)
+
+    async def get_remaining_weekly_bookings(tier, user_id, db):
+        return 2
+
+    monkeypatch.setattr(bookings, "lock_user_schedule", no_lock)
+    monkeypatch.setattr(bookings, "get_user_schedule", get_user_schedule)
+    monkeypatch.setattr(bookings, "get_remaining_weekly_bookings", get_remaining_weekly_bookings)
+
+    found = [booked, overlapping, already, full, clashing, second, over_limit]
+    db = FakeSession(found, [(full.id, 3)], [already.id])
+    request = BookingBatchCreate(activity_ids=[
+        "not-a-uuid",
+        str(booked.id),
+        str(booked.id),
+        str(missing),
+        str(already.id),
+        str(full.id),
+        str(clashing.id),
+        str(overlapping.id),
+        str(second.id),
+        str(over_limit.id),
+    ])
+    user = UserResponse(id=str(uuid.uuid4()), email="vol@example.com", name="Vol", tier="twice-a-week")
+
+    response = asyncio.run(bookings.create_bookings_batch(request, current_user=user, db=db))
+
+    assert [item["status"] for item in response["results"]] == [
+        "invalid_id",
+        "booked",
+        "duplicate",
+        "not_found",
+        "already_booked",
+        "full",
+        "conflict",
+        "conflict",  # overlaps `booked`, accepted earlier in the same batch
+        "booked",
+        "tier_limit_exceeded",
+    ]
+    assert response["booked"] == 2
+    assert {b.activity_id for b in db.added} == {booked.id, second.id}
+    for item in response["results"]:
+        assert (item["bookingId"] is not None) == (item["status"] == "booked")
@@ -0,0 +1,104 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.attendance import AttendanceBulkCreate
+from app.models.user import UserResponse
+from app.routers import attendance
+
+STAFF = UserResponse(id=str(uuid.uuid4()), email="staff@example.com", name="Staff", role="staff")
+
+
+def _sync(monkeypatch, scans, known=None, inserted=None, activity_found=True):
+    """Run the bulk endpoint, recording the scans it hands to record_attendance_bulk"""
+    calls = []
+
+    async def record_attendance_bulk(db, activity_id, scans, verified_by=None):
+        calls.append(scans)
+        users = {user_id for user_id, _ in scans}
+        return {
+            "activity_found": activity_found,
+            "hours_earned": 2,
+            "attended_count": 1,
+            "known": users if known is None else known,
+            "inserted": users if inserted is None else inserted
+        }
+
+    monkeypatch.setattr(attendance, "record_attendance_bulk", record_attendance_bulk)
+    request = AttendanceBulkCreate(activity_id=str(uuid.uuid4()), scans=scans)
+    response = asyncio.run(attendance.mark_attendance_bulk(request, current_user=STAFF, db=None))
+    return response, calls
+
+
+def test_keeps_the_earliest_scan_per_user(monkeypatch):
+    user = str(uuid.uuid4())
+    other = str(uuid.uuid4())
+    noon = datetime(2024, 5, 1, 12)
+    scans = [
+        {"user_id": user, "scanned_at": noon},
+        {"user_id": other, "scanned_at": noon},
+        {"user_id": user, "scanned_at": noon - timedelta(minutes=5)},
+        {"user_id": user, "scanned_at": noon + timedelta(minutes=5)},
+    ]
+
+    response, calls = _sync(monkeypatch, scans)
+
+    assert [item["status"] for item in response["results"]] == ["duplicate", "checked_in", "checked_in", "duplicate"]
+    assert response["checked_in"] == 2
+    assert sorted(calls[0]) == sorted([
+        (uuid.UUID(user), noon - timedelta(minutes=5)),
+        (uuid.UUID(other), noon),
+    ])
+
+
+def test_future_and_aware_scans_are_clamped_to_naive_utc(monkeypatch):
+    future_user = str(uuid.uuid4())
+    aware_user = str(uuid.uuid4())
+    aware = datetime(2030, 1, 7, 20, tzinfo=timezone(timedelta(hours=8)))
+    before = datetime.utcnow()
+
+    response, calls = _sync(monkeypatch, [
+        {"user_id": future_user, "scanned_at": datetime.utcnow() + timedelta(days=1)},
+        {"user_id": aware_user, "scanned_at": aware},
+    ])
+
+    recorded = dict(calls[0])
+    clamped = recorded[uuid.UUID(future_user)]
+    assert before <= clamped <= datetime.utcnow()
+    # 20:00 at UTC+8 is in the future too, so it is clamped as well
+    assert recorded[uuid.UUID(aware_user)] == clamped
+    assert all(t.tzinfo is None for t in recorded.values())
+
+
+def test_past_aware_scans_are_converted_to_utc(monkeypatch):
+    user = str(uuid.uuid4())
+    scanned = datetime(2024, 5, 1, 9, tzinfo=timezone(timedelta(hours=8)))
+
+    response, calls = _sync(monkeypatch, [{"user_id": user, "scanned_at": scanned}])
+
+    assert calls[0] == [(uuid.UUID(user), datetime(2024, 5, 1, 1))]
+    assert response["results"][0]["scanned_at"] == "2024-05-01T01:00:00"
+
+
+def test_statuses_for_invalid_unknown_and_repeat_users(monkeypatch):
+    new, repeat, unknown = (str(uuid.uuid4()) for _ in range(3))
+    response, calls = _sync(
+        monkeypatch,
+        [{"user_id": "bad"}, {"user_id": new}, {"user_id": repeat}, {"user_id": unknown}],
+        known={uuid.UUID(new), uuid.UUID(repeat)},
+        inserted={uuid.UUID(new)}
+    )
+
+    assert [item["status"] for item in response["results"]] == [
+        "invalid_id", "checked_in", "already_attended", "unknown_user"
+    ]
+    assert len(calls[0]) == 3
+
+
+def test_unknown_activity_is_404(monkeypatch):
+    with pytest.raises(HTTPException) as exc:
+        _sync(monkeypatch, [{"user_id": str(uuid.uuid4())}], activity_found=False)
+    assert exc.value.status_code == 404
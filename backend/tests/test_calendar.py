@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from app.services.calendar import ICS_LINE_LIMIT, escape_ics_text, fold_ics_line, generate_ics_content
+
+
+def _unfold(content: str) -> str:
+    return content.replace("\r\n ", "")
+
+
+def test_escape_ics_text_escapes_specials_and_newlines():
+    assert escape_ics_text("a\\b;c,d") == "a\\\\b\\;c\\,d"
+    assert escape_ics_text("one\r\ntwo\nthree\rfour") == "one\\ntwo\\nthree\\nfour"
+    # The backslash is escaped first, so escapes added later aren't doubled
+    assert escape_ics_text("\\n") == "\\\\n"
+
+
+def test_short_lines_are_not_folded():
+    line = "SUMMARY:" + "x" * (ICS_LINE_LIMIT - len("SUMMARY:"))
+    assert fold_ics_line(line) == line
+
+
+def test_long_lines_fold_at_75_octets():
+    line = "DESCRIPTION:" + "abcdefghij" * 30
+    folded = fold_ics_line(line)
+
+    parts = folded.split("\r\n")
+    assert len(parts) > 1
+    assert all(len(part.encode("utf-8")) <= ICS_LINE_LIMIT for part in parts)
+    assert all(part.startswith(" ") for part in parts[1:])
+    assert len(parts[0].encode("utf-8")) == ICS_LINE_LIMIT
+    assert _unfold(folded) == line
+
+
+def test_folding_never_splits_multibyte_characters():
+    line = "LOCATION:" + "Café ☕ 公园 🌳 " * 20
+    folded = fold_ics_line(line)
+
+    for part in folded.split("\r\n"):
+        encoded = part.encode("utf-8")
+        assert len(encoded) <= ICS_LINE_LIMIT
+        encoded.decode("utf-8")  # raises if a character was cut in half
+    assert _unfold(folded) == line
+
+
+def test_generated_calendar_is_escaped_and_folded():
+    content = generate_ics_content(
+        title="Beach cleanup; bring gloves, hats",
+        description="Meet at the car park.\nLunch provided. " * 5,
+        location="East Coast Park, Area C",
+        start_time=datetime(2030, 1, 7, 9),
+        end_time=datetime(2030, 1, 7, 11),
+        uid="activity-1",
+        dtstamp=datetime(2030, 1, 1)
+    )
+
+    assert content.endswith("\r\n")
+    lines = content[:-2].split("\r\n")
+    assert all(len(line.encode("utf-8")) <= ICS_LINE_LIMIT for line in lines)
+
+    unfolded = _unfold(content).split("\r\n")
+    assert "SUMMARY:Beach cleanup\\; bring gloves\\, hats" in unfolded
+    assert "LOCATION:East Coast Park\\, Area C" in unfolded
+    assert "UID:activity-1@holysheet.com" in unfolded
+    assert "DTSTART:20300107T090000Z" in unfolded
+    description = next(line for line in unfolded if line.startswith("DESCRIPTION:"))
+    assert "\n" not in description
+    assert description.endswith("\\n\\nLocation: East Coast Park\\, Area C")
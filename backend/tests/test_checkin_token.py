@@ -0,0 +1,84 @@
+import uuid
+
+import pytest
+
+from app.services import checkin_token
+from app.services.checkin_token import (
+    GRACE_WINDOWS,
+    QR_PREFIX,
+    TOKEN_VERSION,
+    InvalidCheckinToken,
+    issue_checkin_token,
+    verify_checkin_token,
+)
+from app.services.qr import current_window
+
+ACTIVITY = uuid.uuid4()
+
+
+def _signed(payload: str) -> str:
+    return f"{payload}.{checkin_token._sign(payload)}"
+
+
+def test_round_trip_with_and_without_qr_prefix():
+    token = issue_checkin_token(ACTIVITY)
+
+    assert verify_checkin_token(token) == ACTIVITY
+    assert verify_checkin_token(QR_PREFIX + token) == ACTIVITY
+
+
+def test_previous_window_is_accepted_within_grace():
+    window, _ = current_window()
+    assert verify_checkin_token(issue_checkin_token(ACTIVITY, window - GRACE_WINDOWS)) == ACTIVITY
+
+
+@pytest.mark.parametrize("offset", [-GRACE_WINDOWS - 1, 1])
+def test_windows_outside_grace_are_expired(offset):
+    window, _ = current_window()
+    with pytest.raises(InvalidCheckinToken, match="expired"):
+        verify_checkin_token(issue_checkin_token(ACTIVITY, window + offset))
+
+
+def test_tampered_tokens_are_rejected():
+    version, activity_hex, window, signature = issue_checkin_token(ACTIVITY).split(".")
+    other = uuid.uuid4().hex
+
+    with pytest.raises(InvalidCheckinToken, match="Invalid"):
+        verify_checkin_token(f"{version}.{other}.{window}.{signature}")
+    with pytest.raises(InvalidCheckinToken, match="Invalid"):
+        verify_checkin_token(f"{version}.{activity_hex}.{int(window) + 1}.{signature}")
+    flipped = ("A" if signature[0] != "A" else "B") + signature[1:]
+    with pytest.raises(InvalidCheckinToken, match="Invalid"):
+        verify_checkin_token(f"{version}.{activity_hex}.{window}.{flipped}")
+
+
+@pytest.mark.parametrize("token", [
+    "",
+    "garbage",
+    "v1.abc.123",
+    "v1.a.b.c.d",
+    f"v2.{ACTIVITY.hex}.1.sig",
+    QR_PREFIX,
+])
+def test_malformed_tokens_are_rejected(token):
+    with pytest.raises(InvalidCheckinToken, match="Malformed"):
+        verify_checkin_token(token)
+
+
+def test_signed_but_unparseable_fields_are_malformed():
+    window, _ = current_window()
+    with pytest.raises(InvalidCheckinToken, match="Malformed"):
+        verify_checkin_token(_signed(f"{TOKEN_VERSION}.not-hex.{window}"))
+    with pytest.raises(InvalidCheckinToken, match="Malformed"):
+        verify_checkin_token(_signed(f"{TOKEN_VERSION}.{ACTIVITY.hex}.soon"))
+
+
+@pytest.mark.parametrize("token", [
+    f"v1.{ACTIVITY.hex}.1.sïgnätüre",
+    f"v1.{ACTIVITY.hex}.1.签名",
+    f"v1.{ACTIVITY.hex}.١٢٣.sig",
+    "v1.ünïcødé.1.sig",
+])
+def test_non_ascii_input_is_rejected_not_crashing(token):
+    with pytest.raises(InvalidCheckinToken):
+        verify_checkin_token(token)
@@ -0,0 +1,120 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.activity import ActivityDB
+from app.models.user import UserDB
+from app.services.loader import EntityLoader, Loaders
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return list(self._rows)
+
+
+class FakeSession:
+    """Serves entities by id and records the ids of each query"""
+
+    def __init__(self, entities=(), fail=False):
+        self.entities = {e.id: e for e in entities}
+        self.queries = []
+        self.fail = fail
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def execute(self, statement):
+        ids = statement.compile().params["ids"]
+        self.queries.append(list(ids))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0)
+            if self.fail:
+                raise RuntimeError("connection lost")
+            return FakeResult([self.entities[i] for i in ids if i in self.entities])
+        finally:
+            self.in_flight -= 1
+
+
+def _entities(n):
+    return [SimpleNamespace(id=uuid.uuid4()) for _ in range(n)]
+
+
+def test_loads_in_one_tick_are_batched_and_deduplicated():
+    a, b = _entities(2)
+    missing = uuid.uuid4()
+    db = FakeSession([a, b])
+
+    async def run():
+        loader = EntityLoader(db, UserDB)
+        return await asyncio.gather(
+            loader.load(a.id), loader.load(str(a.id)), loader.load(b.id), loader.load(missing)
+        )
+
+    results = asyncio.run(run())
+
+    assert results == [a, a, b, None]
+    assert len(db.queries) == 1
+    assert sorted(db.queries[0]) == sorted([a.id, b.id, missing])
+
+
+def test_results_are_memoized_for_the_loader():
+    a, b = _entities(2)
+    db = FakeSession([a, b])
+
+    async def run():
+        loader = EntityLoader(db, UserDB)
+        first = await loader.load(a.id)
+        again = await loader.load(a.id)
+        second = await loader.load(b.id)
+        return first, again, second
+
+    assert asyncio.run(run()) == (a, a, b)
+    assert db.queries == [[a.id], [b.id]]
+
+
+def test_load_many_maps_malformed_and_unknown_ids_to_none():
+    a, = _entities(1)
+    db = FakeSession([a])
+
+    async def run():
+        return await EntityLoader(db, ActivityDB).load_many(["nope", str(a.id), str(uuid.uuid4())])
+
+    assert asyncio.run(run()) == [None, a, None]
+    assert len(db.queries) == 1
+
+
+def test_failed_batch_fails_its_loads_and_is_not_cached():
+    a, = _entities(1)
+    db = FakeSession([a], fail=True)
+
+    async def run():
+        loader = EntityLoader(db, UserDB)
+        with pytest.raises(RuntimeError):
+            await loader.load(a.id)
+        db.fail = False
+        return await loader.load(a.id)
+
+    assert asyncio.run(run()) is a
+    assert len(db.queries) == 2
+
+
+def test_loaders_on_one_session_dispatch_one_at_a_time():
+    user, activity = _entities(2)
+    db = FakeSession([user, activity])
+
+    async def run():
+        loaders = Loaders(db)
+        return await asyncio.gather(loaders.users.load(user.id), loaders.activities.load(activity.id))
+
+    assert asyncio.run(run()) == [user, activity]
+    assert len(db.queries) == 2
+    assert db.max_in_flight == 1
@@ -0,0 +1,64 @@
+import random
+from datetime import datetime, timedelta
+
+from app.services.schedule import overlaps, scan_conflicts
+
+BASE = datetime(2030, 1, 7)
+
+
+def _entry(activity_id, start_hour, end_hour, kind="booking"):
+    return {
+        "activity_id": activity_id,
+        "type": kind,
+        "start_time": BASE + timedelta(hours=start_hour),
+        "end_time": BASE + timedelta(hours=end_hour)
+    }
+
+
+def _pairs(conflicts):
+    return {frozenset((id(c["first"]), id(c["second"]))) for c in conflicts}
+
+
+def test_back_to_back_entries_do_not_conflict():
+    entries = [_entry("a", 9, 11), _entry("b", 11, 13), _entry("c", 13, 14)]
+    assert scan_conflicts(entries) == []
+
+
+def test_same_activity_is_not_reported():
+    entries = [_entry("a", 9, 11, "booking"), _entry("a", 9, 11, "volunteer"), _entry("b", 10, 12)]
+    conflicts = scan_conflicts(entries)
+
+    assert len(conflicts) == 2
+    assert all({c["first"]["activity_id"], c["second"]["activity_id"]} == {"a", "b"} for c in conflicts)
+
+
+def test_contained_entry_conflicts_with_every_enclosing_one():
+    entries = [_entry("long", 8, 18), _entry("x", 9, 10), _entry("y", 12, 13)]
+    conflicts = scan_conflicts(entries)
+
+    assert _pairs(conflicts) == {
+        frozenset((id(entries[0]), id(entries[1]))),
+        frozenset((id(entries[0]), id(entries[2])))
+    }
+    for c in conflicts:
+        assert c["first"]["start_time"] <= c["second"]["start_time"]
+
+
+def test_sweep_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(200):
+        entries = []
+        for _ in range(rng.randint(0, 12)):
+            start = rng.randint(0, 40)
+            entries.append(_entry(f"act-{rng.randint(0, 6)}", start, start + rng.randint(1, 8)))
+
+        expected = {
+            frozenset((id(a), id(b)))
+            for i, a in enumerate(entries)
+            for b in entries[i + 1:]
+            if a["activity_id"] != b["activity_id"] and overlaps(a, b)
+        }
+        conflicts = scan_conflicts(entries)
+
+        assert len(conflicts) == len(expected)
+        assert _pairs(conflicts) == expected
@@ -0,0 +1,88 @@
+import random
+import uuid
+
+from app.models.user import normalize_skills
+from app.services.skill_index import SkillIndex
+
+SKILLS = ["first aid", "driving", "cooking", "photography", "teaching", "logistics", "design"]
+
+
+def _brute_rank(volunteers, wanted, require_all=False):
+    wanted = set(normalize_skills(wanted))
+    counted = [(user_id, len(wanted & set(skills))) for user_id, skills in volunteers.items()]
+    lowest = len(wanted) if require_all else 1
+    return sorted(((u, c) for u, c in counted if c >= max(lowest, 1)), key=lambda uc: (-uc[1], uc[0].int))
+
+
+def _index(volunteers):
+    index = SkillIndex()
+    index.apply({user_id: normalize_skills(skills) for user_id, skills in volunteers.items()})
+    return index
+
+
+def test_rank_orders_by_match_count_then_id():
+    a, b, c, d = sorted((uuid.uuid4() for _ in range(4)), key=lambda u: u.int)
+    index = _index({
+        d: ["Cooking", "Driving", "First Aid"],
+        c: ["Cooking"],
+        b: ["Driving", "Cooking"],
+        a: ["Cooking", "First Aid"],
+        uuid.uuid4(): ["Design"],
+    })
+
+    assert index.rank(["cooking", "  DRIVING ", "First Aid"]) == [(d, 3), (a, 2), (b, 2), (c, 1)]
+    assert index.rank(["cooking", "driving", "first aid"], require_all=True) == [(d, 3)]
+    assert index.rank(["cooking", "driving", "first aid"], limit=2) == [(d, 3), (a, 2)]
+    assert index.top_k(["cooking"], 10) == [(a, 1), (b, 1), (c, 1), (d, 1)]
+    assert index.rank(["underwater welding"]) == []
+    assert index.rank([]) == []
+
+
+def test_rank_matches_brute_force():
+    rng = random.Random(11)
+    volunteers = {uuid.uuid4(): rng.sample(SKILLS, k=rng.randint(0, 5)) for _ in range(300)}
+    index = _index(volunteers)
+
+    for _ in range(50):
+        wanted = rng.sample(SKILLS, k=rng.randint(1, 6))
+        expected = _brute_rank(volunteers, wanted)
+        assert index.rank(wanted) == expected
+        assert index.rank(wanted, require_all=True) == _brute_rank(volunteers, wanted, require_all=True)
+        limit = rng.randint(1, 40)
+        assert index.rank(wanted, limit=limit) == expected[:limit]
+        assert set(index.match_any(wanted)) == {u for u, _ in expected}
+        assert set(index.match_all(wanted)) == {u for u, c in expected if c == len(set(wanted))}
+
+
+def test_updates_and_removals_reuse_slots():
+    first, second, third = (uuid.uuid4() for _ in range(3))
+    index = _index({first: ["Cooking"], second: ["Cooking", "Driving"]})
+
+    index.apply({first: None, second: normalize_skills(["Driving"])})
+    assert index.rank(["cooking"]) == []
+    assert index.rank(["driving"]) == [(second, 1)]
+
+    index.apply({third: normalize_skills(["Cooking"])})
+    stats = index.stats()
+    assert stats["volunteers"] == 2
+    assert stats["slots"] == 2  # the removed volunteer's slot was reused
+    assert index.rank(["cooking", "driving"]) == sorted([(second, 1), (third, 1)], key=lambda uc: uc[0].int)
+
+
+def test_has_any_skill_uses_the_index_once_loaded(monkeypatch):
+    from sqlalchemy.dialects import postgresql
+
+    from app.services import skill_index as module
+
+    volunteer = uuid.uuid4()
+    index = _index({volunteer: ["Cooking"]})
+    monkeypatch.setattr(module, "skill_index", index)
+
+    fallback = module.has_any_skill(["cooking"]).compile(dialect=postgresql.dialect())
+    assert "skills_normalized &&" in str(fallback)
+    assert fallback.params == {"skills": ["cooking"]}
+
+    index.ready = True
+    indexed = module.has_any_skill(["cooking"]).compile(dialect=postgresql.dialect())
+    assert "users.id = ANY" in str(indexed)
+    assert indexed.params == {"skilled_ids": [volunteer]}